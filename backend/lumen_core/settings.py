@@ -137,6 +137,41 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Background calculation jobs (python manage.py run_calculation_workers)
+CALCULATION_WORKERS = config("CALCULATION_WORKERS", default=2, cast=int)
+CALCULATION_POLL_INTERVAL = config("CALCULATION_POLL_INTERVAL", default=1.0, cast=float)
+CALCULATION_JOB_TIMEOUT = config("CALCULATION_JOB_TIMEOUT", default=300, cast=int)  # seconds without a heartbeat
+CALCULATION_JOB_HEARTBEAT = config("CALCULATION_JOB_HEARTBEAT", default=30.0, cast=float)  # seconds
+CALCULATION_JOB_MAX_ATTEMPTS = config("CALCULATION_JOB_MAX_ATTEMPTS", default=3, cast=int)
+
+# Django cache alias shared by all processes for calculator results ("" disables the shared tier)
+CALCULATION_RESULT_CACHE = config("CALCULATION_RESULT_CACHE", default="default")
+
+# PDF rendering pool (WeasyPrint runs in these worker processes)
+PDF_RENDER_WORKERS = config("PDF_RENDER_WORKERS", default=2, cast=int)
+PDF_RENDER_MAX_PENDING = config("PDF_RENDER_MAX_PENDING", default=8, cast=int)
+PDF_RENDER_TIMEOUT = config("PDF_RENDER_TIMEOUT", default=30.0, cast=float)  # seconds per report
+PDF_ARTIFACT_ROOT = config("PDF_ARTIFACT_ROOT", default=str(MEDIA_ROOT / "pdf_artifacts"))
+
+# HL7 ORU^R01 result messages (MSH/FHS header fields)
+HL7_SENDING_APPLICATION = config("HL7_SENDING_APPLICATION", default="LUMEN")
+HL7_SENDING_FACILITY = config("HL7_SENDING_FACILITY", default="")
+HL7_RECEIVING_APPLICATION = config("HL7_RECEIVING_APPLICATION", default="")
+HL7_RECEIVING_FACILITY = config("HL7_RECEIVING_FACILITY", default="")
+HL7_PROCESSING_ID = config("HL7_PROCESSING_ID", default="P")  # P = production, T = training, D = debugging
+
+# Outbound MLLP delivery (python manage.py send_oru_messages)
+HL7_MLLP_HOST = config("HL7_MLLP_HOST", default="")
+HL7_MLLP_PORT = config("HL7_MLLP_PORT", default=2575, cast=int)
+HL7_MLLP_POOL_SIZE = config("HL7_MLLP_POOL_SIZE", default=2, cast=int)
+HL7_MLLP_MAX_IN_FLIGHT = config("HL7_MLLP_MAX_IN_FLIGHT", default=16, cast=int)  # unacknowledged messages per connection
+HL7_MLLP_TIMEOUT = config("HL7_MLLP_TIMEOUT", default=30.0, cast=float)  # seconds to wait for an ACK
+HL7_MLLP_RETRIES = config("HL7_MLLP_RETRIES", default=3, cast=int)
+HL7_SPOOL_DIR = config("HL7_SPOOL_DIR", default=str(MEDIA_ROOT / "hl7_spool"))
+
+# Exam worklist page size (clients may pass ?page_size= up to 200)
+WORKLIST_PAGE_SIZE = config("WORKLIST_PAGE_SIZE", default=50, cast=int)
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -10,6 +10,12 @@ urlpatterns = [
     # 📊 Carotid API endpoints (modular)
     path("api/", include("reports.urls.carotid_urls")),
 
+    # 📋 Exam worklist (all exam types)
+    path("api/", include("reports.urls.exam_urls")),
+
+    # 📥 Bulk exam import (NDJSON/CSV)
+    path("api/", include("reports.urls.import_urls")),
+
     # 🧾 OpenAPI schema + Swagger
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path("docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
@@ -0,0 +1,30 @@
+# report_template/registry/frozen.py
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for data shared across requests (templates, site criteria).
+
+    Still a real `dict` (so `isinstance`, `.get()` and `json.dumps` work), but any
+    mutation raises TypeError, which makes one parsed copy safe to share across
+    threads and callers.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only; copy it before modifying.")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+def freeze(value):
+    """
+    Recursively convert parsed JSON into FrozenDict / tuple containers.
+    """
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
@@ -1,17 +1,130 @@
 import json
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-from functools import lru_cache
+
+from django.apps import apps
+
+from report_template.registry.frozen import FrozenDict, freeze
 
 # Define the root directory where your template folders live
 TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
 
+
+@dataclass(frozen=True)
+class SegmentBlueprint:
+    """
+    Precomputed recipe for one template segment's Segment + Measurement rows.
+
+    Attributes:
+        segment_id (str): Segment name (e.g., "ica_prox_right").
+        artery (str): Lower-cased vessel (e.g., "ica").
+        side (str): "right", "left" or "n/a".
+        core_fields (tuple[str]): Measurement columns initialized to None.
+        additional_data (FrozenDict): Default `Measurement.additional_data`
+            (non-core fields set to None plus `<field>_unit` entries).
+        units (FrozenDict): Field name → resolved unit.
+    """
+    segment_id: str
+    artery: str
+    side: str
+    core_fields: tuple
+    additional_data: FrozenDict
+    units: FrozenDict
+
+    def new_additional_data(self) -> dict:
+        """
+        Returns:
+            dict: A fresh, mutable copy of the default additional_data.
+        """
+        return dict(self.additional_data)
+
+
+def _measurement_columns() -> frozenset:
+    """
+    Names of the Measurement model's concrete columns (core fields).
+    """
+    Measurement = apps.get_model("reports", "Measurement")
+    return frozenset(field.name for field in Measurement._meta.concrete_fields)
+
+
+def build_segment_blueprint(seg: dict, units_map: dict, core_columns: frozenset) -> SegmentBlueprint:
+    """
+    Resolve one template segment into a SegmentBlueprint.
+
+    Handles both compact ["psv", "edv"] and verbose [{"name": "psv", "unit": "cm/s"}]
+    measurement styles. Units come from the field itself or the template-level
+    `units` block.
+
+    Args:
+        seg (dict): Segment entry from the template.
+        units_map (dict): Template-level units override block.
+        core_columns (frozenset): Measurement column names.
+
+    Returns:
+        SegmentBlueprint: Frozen blueprint for the segment.
+    """
+    core_fields: list[str] = []
+    additional_data: dict = {}
+    units: dict = {}
+
+    for m in seg.get("measurements", []):
+        field_name = m if isinstance(m, str) else m.get("name")
+        if not field_name:
+            continue
+
+        if field_name in core_columns:
+            core_fields.append(field_name)
+        else:
+            additional_data[field_name] = None
+
+        if isinstance(m, dict) and "unit" in m:
+            field_unit = m["unit"]
+        else:
+            field_unit = units_map.get(field_name)
+
+        if field_unit:
+            units[field_name] = field_unit
+            additional_data[f"{field_name}_unit"] = field_unit
+
+    return SegmentBlueprint(
+        segment_id=seg["id"],
+        artery=seg["vessel"].lower(),
+        side=seg.get("side", "n/a"),
+        core_fields=tuple(core_fields),
+        additional_data=FrozenDict(additional_data),
+        units=FrozenDict(units),
+    )
+
+
+class ExamTemplate(FrozenDict):
+    """
+    Immutable exam template returned by the registry.
+
+    Behaves like the parsed JSON (read-only dicts and tuples) and additionally
+    exposes `blueprints`, one SegmentBlueprint per template segment, computed once
+    per cached template.
+    """
+
+    @cached_property
+    def blueprints(self) -> tuple:
+        core_columns = _measurement_columns()
+        units_map = self.get("units", {})
+        return tuple(
+            build_segment_blueprint(seg, units_map, core_columns)
+            for seg in self["segments"]
+        )
+
+
 @lru_cache(maxsize=32)
-def get_template(exam_type: str, site: str) -> dict:
+def get_template(exam_type: str, site: str) -> ExamTemplate:
     """
     Loads a vascular exam template (e.g., carotid.json) based on exam_type, site, and version.
 
-    This function reads a JSON template file from disk and returns it as a Python dictionary.
-    It uses in-memory caching via @lru_cache to avoid repeated file reads for the same input.
+    This function reads a JSON template file from disk and returns it as an immutable
+    ExamTemplate. It uses in-memory caching via @lru_cache to avoid repeated file reads
+    for the same input; because the result is read-only, callers cannot corrupt the
+    shared cached copy.
 
     Args:
         exam_type (str): Type of exam (e.g., "carotid", "renal", etc.).
@@ -23,7 +136,7 @@ def get_template(exam_type: str, site: str) -> dict:
         ValueError: If the loaded template does not match the expected site or version.
 
     Returns:
-        dict: The parsed template as a Python dictionary.
+        ExamTemplate: The parsed, read-only template with precomputed segment blueprints.
     """
 
     # Build the expected path to the JSON file: templates/carotid/carotid.json
@@ -45,5 +158,5 @@ def get_template(exam_type: str, site: str) -> dict:
     # if data.get("version") != version:
     #     raise ValueError(f"Version mismatch: expected {version}, found {data.get('version')}")
 
-    # Return the loaded and validated template
-    return data
+    # Return the loaded, validated and frozen template
+    return ExamTemplate(freeze(data))
@@ -45,3 +45,32 @@ def test_raises_value_error_for_wrong_version():
         get_template("carotid", site="mount_sinai_hospital", version="999.0.0")
 
         
+
+
+# ✅ Test: The cached template is read-only so callers cannot corrupt it
+def test_template_is_immutable():
+    tpl = get_template("carotid", site="mount_sinai_hospital")
+    with pytest.raises(TypeError):
+        tpl["id"] = "renal"
+    with pytest.raises(TypeError):
+        tpl["units"]["psv"] = "m/s"
+    assert isinstance(tpl["segments"], tuple)
+
+
+# ✅ Test: Segment blueprints resolve core fields, additional_data and units once
+@pytest.mark.django_db
+def test_segment_blueprints_are_precomputed():
+    tpl = get_template("carotid", site="mount_sinai_hospital")
+    assert len(tpl.blueprints) == len(tpl["segments"])
+    assert tpl.blueprints is tpl.blueprints
+
+    ica = next(bp for bp in tpl.blueprints if bp.segment_id == "ica_prox_right")
+    assert ica.artery == "ica"
+    assert ica.core_fields == ("psv", "edv", "ica_cca_ratio")
+    assert ica.units["ica_cca_ratio"] == "ratio"
+    assert ica.additional_data["artery_diameter"] is None
+    assert ica.additional_data["artery_diameter_unit"] == "cm"
+
+    data = ica.new_additional_data()
+    data["artery_diameter"] = 0.5
+    assert ica.additional_data["artery_diameter"] is None
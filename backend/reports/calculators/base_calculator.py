@@ -1,12 +1,123 @@
 # report/calculators/base.py
 
+import ast
+import operator
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
-from typing import Optional, Union
+from functools import lru_cache
+from typing import Callable, Optional, Union
 from math import isfinite
 
 # Step 0: Allow any number-like input
 Number = Union[int, float, Decimal]
 
+# Operators a formula may use. Anything else (calls, attributes, subscripts,
+# comparisons, power) is rejected when the expression is compiled.
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """
+    A formula parsed and validated once, ready to evaluate many times.
+
+    Attributes:
+        expression (str): The original formula text (e.g., "psv / cca_psv").
+        variables (frozenset[str]): Variable names referenced by the formula.
+        evaluate (Callable): Takes a name -> Decimal mapping and returns the result.
+    """
+    expression: str
+    variables: frozenset
+    evaluate: Callable[[dict], Decimal]
+
+
+def _compile_node(node: ast.AST, names: set) -> Callable[[dict], Decimal]:
+    """
+    Recursively turn a validated AST node into a closure over Decimal operands.
+
+    Args:
+        node (ast.AST): Node from `ast.parse(..., mode="eval")`.
+        names (set): Collects every variable name encountered.
+
+    Returns:
+        Callable: Function taking the variables mapping and returning a Decimal.
+
+    Raises:
+        ValueError: If the node is not an allowed arithmetic element.
+    """
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
+        return lambda variables: op(left(variables), right(variables))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, names)
+        return lambda variables: op(operand(variables))
+
+    if isinstance(node, ast.Name):
+        names.add(node.id)
+        return operator.itemgetter(node.id)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        constant = Decimal(str(node.value))
+        return lambda variables: constant
+
+    raise ValueError(f"Unsupported element in expression: {ast.dump(node)}")
+
+
+@lru_cache(maxsize=128)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Parse and validate a math expression once, caching the result by its text.
+
+    Only numeric constants, variable names, unary +/- and the binary operators
+    +, -, *, / are allowed, so the compiled formula never needs `eval()`.
+
+    Example:
+        compiled = compile_expression("psv / cca_psv")
+        compiled.variables            # frozenset({"psv", "cca_psv"})
+        compiled.evaluate({"psv": Decimal(300), "cca_psv": Decimal(100)})  # Decimal("3")
+
+    Args:
+        expression (str): A simple math expression.
+
+    Returns:
+        CompiledExpression: Cached, reusable compiled formula.
+
+    Raises:
+        ValueError: If the expression is not valid Python syntax or uses
+            anything other than the allowed arithmetic.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression '{expression}': {e.msg}") from e
+
+    names: set = set()
+    evaluate = _compile_node(tree.body, names)
+    return CompiledExpression(expression, frozenset(names), evaluate)
+
+
+def _to_decimal(value: Number) -> Decimal:
+    """
+    Convert a number-like value to Decimal, reusing values that already are.
+    """
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
 
 def resolve_value_from_segment(segment: dict, field_name: str) -> Optional[Decimal]:
     """
@@ -37,6 +148,9 @@ def evaluate_expression_with_variables(
     """
     Safely evaluate a math expression using Decimal variables.
 
+    The expression is compiled once via `compile_expression()` and reused on
+    subsequent calls with the same text.
+
     Example:
         expression = "psv / cca_psv"
         variables = {"psv": 300, "cca_psv": 100}
@@ -49,15 +163,18 @@ def evaluate_expression_with_variables(
         Optional[Decimal]: Result of the evaluation, or None if invalid.
     """
     try:
-        # Step 1: Convert all input values to Decimal
+        # Step 1: Fetch the compiled formula (parsed once per expression text)
+        compiled = compile_expression(expression)
+
+        # Step 2: Convert only the referenced inputs that are not Decimal yet
         decimal_vars = {
-            var_name: Decimal(str(var_value)) for var_name, var_value in variables.items()
+            var_name: _to_decimal(variables[var_name]) for var_name in compiled.variables
         }
 
-        # Step 2: Evaluate using only these safe variables (no builtins allowed)
-        result = eval(expression, {"__builtins__": {}}, decimal_vars)
+        # Step 3: Evaluate the compiled closure tree (no eval involved)
+        result = compiled.evaluate(decimal_vars)
 
-        # Step 3: Ensure result is valid and numeric
+        # Step 4: Ensure result is valid and numeric
         if isinstance(result, (int, float, Decimal)) and isfinite(result):
             return Decimal(result)
     except Exception:
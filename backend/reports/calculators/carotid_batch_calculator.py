@@ -0,0 +1,443 @@
+"""
+Carotid Batch Calculator Module
+
+This module contains the CarotidBatchCalculator class, a vectorized counterpart of
+CarotidCalculator used to re-score many exams at once (e.g., after a site changes
+its criteria). Segment values for N exams are loaded into NumPy column arrays, the
+ICA/CCA ratio, stenosis bands and vertebral rules are applied as whole-column
+passes, and the annotated results are written back with bulk updates.
+
+Results are identical to running CarotidCalculator on each exam individually.
+"""
+
+import logging
+from functools import cached_property
+from typing import Iterable, Optional
+
+import numpy as np
+from django.db import transaction
+
+from reports.models import Exam, Measurement
+from reports.site.site_loader import load_carotid_criteria
+from reports.services.compact_store import save_block_calculated
+from reports.services.exam_snapshot import load_exam_snapshots
+from reports.services.preliminary_reports import materialize_conclusions
+from reports.calculators.base_calculator import calculate_from_segment
+from reports.calculators.carotid_calculator import (
+    CALCULATOR_VERSION,
+    is_vertebral_segment,
+    persist_calculated_fields,
+)
+from reports.calculators.result_cache import calculation_fingerprint
+from reports.calculators.dependency_graph import SegmentDependencyGraph, get_dependency_graph
+from reports.calculators.derived_columns import (
+    DERIVED_COLUMNS,
+    VERTEBRAL_NORMAL,
+    VERTEBRAL_PRE_STEAL,
+    VERTEBRAL_STEAL,
+)
+from reports.calculators.stenosis_table import (
+    HIGH_EDV_CATEGORY,
+    UNCONFIRMED_NOTE,
+    StenosisTable,
+    get_stenosis_table,
+)
+from reports.types.segments.carotid_segments import CarotidSegmentDict
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Default number of exams loaded, scored and written per round trip
+DEFAULT_CHUNK_SIZE = 500
+
+
+# ========================
+# Column Helpers
+# ========================
+
+def _float_column(rows: list[CarotidSegmentDict], field_name: str) -> np.ndarray:
+    """
+    Build a float64 column for a numeric field, using NaN for missing/invalid values.
+
+    Args:
+        rows (list): Segment dictionaries in row order.
+        field_name (str): Key to read from each segment (e.g., "psv").
+
+    Returns:
+        np.ndarray: Column of floats aligned with `rows`.
+    """
+    column = np.full(len(rows), np.nan)
+    for index, segment in enumerate(rows):
+        value = segment.get(field_name)
+        if value is None:
+            continue
+        try:
+            column[index] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return column
+
+
+def _text_column(rows: list[CarotidSegmentDict], field_name: str) -> np.ndarray:
+    """
+    Build a lower-cased string column for a text field ("" when missing).
+    """
+    return np.array([(segment.get(field_name) or "").lower() for segment in rows], dtype=object)
+
+
+def _round_ratios(psv: np.ndarray, cca_psv: np.ndarray, rows: list[CarotidSegmentDict]) -> np.ndarray:
+    """
+    Compute ICA/CCA ratios rounded to two decimals, matching the Decimal-based scalar path.
+
+    Binary floats can land on the wrong side of a half-way value (e.g., 5.025), so the
+    few rows sitting on a rounding tie are recomputed with `calculate_from_segment`.
+
+    Args:
+        psv (np.ndarray): ICA PSV column.
+        cca_psv (np.ndarray): CCA PSV column.
+        rows (list): Segment dictionaries (used for the tie fallback).
+
+    Returns:
+        np.ndarray: Rounded ratios, NaN where no ratio applies.
+    """
+    valid = ~np.isnan(psv) & ~np.isnan(cca_psv) & (cca_psv != 0)
+    ratios = np.full(len(psv), np.nan)
+    np.divide(psv, cca_psv, out=ratios, where=valid)
+
+    scaled = ratios * 100
+    ties = valid & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    ratios = np.round(ratios, 2)
+
+    for index in np.flatnonzero(ties):
+        ratio = calculate_from_segment("psv / cca_psv", rows[index], ["psv", "cca_psv"])
+        ratios[index] = float(round(ratio, 2)) if ratio is not None else np.nan
+
+    return ratios
+
+
+# ========================
+# Core Batch Calculator
+# ========================
+
+class CarotidBatchCalculator:
+    """
+    Applies CarotidCalculator rules to many exams at once using column arrays.
+
+    Input and output mirror CarotidCalculator, with one extra level keyed by exam ID:
+        { exam_id: { segment_name: CarotidSegmentDict } }
+    """
+
+    def __init__(
+        self,
+        exam_segments: dict[int, dict[str, CarotidSegmentDict]],
+        criteria: dict,
+        graph: Optional[SegmentDependencyGraph] = None,
+    ):
+        """
+        Initializes the batch calculator.
+
+        Args:
+            exam_segments (dict): Exam ID to segment dictionary (as built by build_segment_dict).
+            criteria (dict): Site-specific JSON thresholds and rules.
+            graph (SegmentDependencyGraph, optional): Cross-segment dependencies
+                whose inputs (e.g., ICA `cca_psv`) are joined in before scoring.
+        """
+        self.exam_segments = exam_segments
+        self.criteria = criteria
+        self.graph = graph
+
+        if graph is not None:
+            for segments in exam_segments.values():
+                graph.join_inputs(segments)
+
+        # Flatten every (exam, segment) pair into aligned rows
+        self.exam_ids: list[int] = []
+        self.segment_names: list[str] = []
+        self.rows: list[CarotidSegmentDict] = []
+        for exam_id, segments in exam_segments.items():
+            for segment_name, segment in segments.items():
+                self.exam_ids.append(exam_id)
+                self.segment_names.append(segment_name)
+                self.rows.append(segment)
+
+    @cached_property
+    def stenosis_table(self) -> StenosisTable:
+        """
+        Returns:
+            StenosisTable: Compiled decision table shared by all calculators with these criteria.
+        """
+        return get_stenosis_table(self.criteria)
+
+    def compute_ica_cca_ratio(self) -> np.ndarray:
+        """
+        Computes ICA/CCA ratios for all rows.
+
+        Returns:
+            np.ndarray: Ratio column (NaN where PSV or CCA PSV is missing).
+        """
+        psv = _float_column(self.rows, "psv")
+        cca_psv = _float_column(self.rows, "cca_psv")
+        return _round_ratios(psv, cca_psv, self.rows)
+
+    def apply_stenosis_logic(self, ratios: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Classifies ICA stenosis for all rows using the site's compiled StenosisTable.
+
+        Bands are located with `np.searchsorted` (the column form of the table's
+        bisect lookup) and then refined by each band's EDV limits and the upgrade ratio.
+
+        Args:
+            ratios (np.ndarray): ICA/CCA ratio column from compute_ica_cca_ratio().
+
+        Returns:
+            tuple: (category column, notes column); "" where nothing applies.
+        """
+        table = self.stenosis_table
+        psv = _float_column(self.rows, "psv")
+        edv = _float_column(self.rows, "edv")
+        size = len(self.rows)
+
+        # Per-band lookup columns (NaN marks "no limit")
+        bands = table.bands
+        upper = np.array([band.psv_max for band in bands], dtype=float)
+        edv_max = np.array([np.nan if band.edv_max is None else band.edv_max for band in bands])
+        edv_min = np.array([np.nan if band.edv_min is None else band.edv_min for band in bands])
+        labels = np.array([band.label for band in bands], dtype=object)
+        high_edv_notes = np.array([band.high_edv_note for band in bands], dtype=object)
+        unconfirmed = np.array(
+            [band.unconfirmed_category if band.edv_min is not None else "" for band in bands],
+            dtype=object,
+        )
+
+        # Locate each row's band; rows in a gap or with no PSV match nothing
+        index = np.searchsorted(np.array(table.lower_bounds, dtype=float), psv, side="right") - 1
+        safe = np.clip(index, 0, None)
+        in_band = ~np.isnan(psv) & (index >= 0) & (psv <= upper[safe])
+
+        uses_edv_max = in_band & ~np.isnan(edv_max[safe])
+        uses_edv_min = in_band & ~uses_edv_max & ~np.isnan(edv_min[safe])
+        edv_below_max = edv <= edv_max[safe]
+        edv_above_min = edv >= edv_min[safe]
+        if table.upgrade_if_ratio_gt is not None:
+            ratio_upgrade = ratios > table.upgrade_if_ratio_gt
+        else:
+            ratio_upgrade = np.zeros(size, dtype=bool)
+
+        conditions = [
+            uses_edv_max & edv_below_max & ratio_upgrade,
+            uses_edv_max & edv_below_max,
+            uses_edv_max,
+            uses_edv_min & ~edv_above_min,
+            in_band,
+        ]
+        upgrade_category = table.upgrade_category if table.upgrade_if_ratio_gt is not None else ""
+        upgrade_note = table.upgrade_note if table.upgrade_if_ratio_gt is not None else ""
+        categories = [
+            np.full(size, upgrade_category, dtype=object),
+            labels[safe],
+            np.full(size, HIGH_EDV_CATEGORY, dtype=object),
+            unconfirmed[safe],
+            labels[safe],
+        ]
+        notes = [
+            np.full(size, upgrade_note, dtype=object),
+            np.full(size, "", dtype=object),
+            high_edv_notes[safe],
+            np.full(size, UNCONFIRMED_NOTE, dtype=object),
+            np.full(size, "", dtype=object),
+        ]
+
+        category_column = np.select(conditions, categories, default="")
+        notes_column = np.select(conditions, notes, default="")
+        return category_column, notes_column
+
+    def interpret_vertebral_waveform(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Adds vertebral flow interpretation for rows of vertebral segments (see is_vertebral_segment()).
+
+        Returns:
+            tuple: (comment column, flow flag column); "" for non-vertebral segments.
+        """
+        rules = self.criteria.get("vertebral_rules", {})
+        steal_direction = rules.get("steal_direction", "retrograde").lower()
+        pre_steal_waveforms = [w.lower() for w in rules.get("pre_steal_waveforms", [])]
+
+        vertebral_names = {name for name in set(self.segment_names) if is_vertebral_segment(name, self.graph)}
+        is_vertebral = np.array([name in vertebral_names for name in self.segment_names], dtype=bool)
+        direction = _text_column(self.rows, "direction")
+        waveform = _text_column(self.rows, "waveform")
+
+        is_steal = is_vertebral & (direction == steal_direction)
+        is_pre_steal = is_vertebral & ~is_steal & np.isin(waveform, pre_steal_waveforms)
+
+        comments = np.where(is_vertebral, "Normal vertebral flow pattern.", "").astype(object)
+        comments[is_steal] = "Retrograde vertebral flow is consistent with subclavian steal."
+        for index in np.flatnonzero(is_pre_steal):
+            label = waveform[index].replace("_", " ").capitalize()
+            comments[index] = f"{label} waveform pattern indicative of pre-steal physiology."
+
+        flows = np.select([is_steal, is_pre_steal, is_vertebral],
+                          [VERTEBRAL_STEAL, VERTEBRAL_PRE_STEAL, VERTEBRAL_NORMAL], default="")
+        return comments, flows
+
+    def run_all(self) -> None:
+        """
+        Runs all carotid calculations across every exam and writes results into the segment dicts.
+        """
+        logger.info(
+            f"Running batch carotid calculation: {len(self.exam_segments)} exams, "
+            f"{len(self.rows)} segments"
+        )
+        if not self.rows:
+            return
+
+        ratios = self.compute_ica_cca_ratio()
+        categories, notes = self.apply_stenosis_logic(ratios)
+        comments, flows = self.interpret_vertebral_waveform()
+
+        for index, segment in enumerate(self.rows):
+            if not np.isnan(ratios[index]):
+                segment["ica_cca_ratio"] = float(ratios[index])
+            if categories[index]:
+                segment["stenosis_category"] = categories[index]
+            if notes[index]:
+                segment["stenosis_notes"] = notes[index]
+            if comments[index]:
+                segment["vertebral_comment"] = comments[index]
+            if flows[index]:
+                segment["vertebral_flow"] = str(flows[index])
+
+    def get_segment_data(self) -> dict[int, dict[str, CarotidSegmentDict]]:
+        """
+        Returns:
+            dict: Annotated segment dictionaries keyed by exam ID.
+        """
+        return self.exam_segments
+
+    def fingerprints(self) -> dict[int, str]:
+        """
+        Calculation fingerprint of each exam's inputs (call before `run_all()`).
+
+        Returns:
+            dict: Exam ID → fingerprint, as stored by run_carotid_calculator().
+        """
+        return {
+            exam_id: calculation_fingerprint(segments, self.criteria, CALCULATOR_VERSION)
+            for exam_id, segments in self.exam_segments.items()
+        }
+
+
+# ========================
+# Batch Helpers
+# ========================
+
+def load_segment_dicts_for_exams(exam_ids: Iterable[int]) -> dict[int, dict[str, CarotidSegmentDict]]:
+    """
+    Loads segment dictionaries for many exams in a single query.
+
+    Produces the same shape as build_segment_dict() for each exam, using the first
+    measurement of each segment.
+
+    Args:
+        exam_ids (Iterable[int]): Exam primary keys.
+
+    Returns:
+        dict: Exam ID to segment name to measurement dictionary.
+    """
+    return {
+        exam_id: snapshot.segment_dict()
+        for exam_id, snapshot in load_exam_snapshots(exam_ids).items()
+    }
+
+
+def save_batch_results(
+    exam_segments: dict[int, dict[str, CarotidSegmentDict]], batch_size: int = 1000
+) -> int:
+    """
+    Writes annotated segment data into Measurement.calculated_fields with bulk updates.
+
+    Rows whose stored results are unchanged are skipped. Exams in compact storage
+    are written through `save_block_calculated()`.
+
+    Args:
+        exam_segments (dict): Output from CarotidBatchCalculator.get_segment_data().
+        batch_size (int): Rows per UPDATE statement.
+
+    Returns:
+        int: Number of measurement rows written.
+    """
+    rows = list(
+        Measurement.objects
+        .filter(segment__exam_id__in=list(exam_segments))
+        .order_by("segment_id", "id")
+        .values_list("id", "segment__exam_id", "segment__name", "calculated_fields", *DERIVED_COLUMNS)
+    )
+    results = {
+        (exam_id, name): data
+        for exam_id, segments in exam_segments.items()
+        for name, data in segments.items()
+    }
+    saved = persist_calculated_fields(
+        (
+            (measurement_id, (exam_id, name), stored, dict(zip(DERIVED_COLUMNS, columns)))
+            for measurement_id, exam_id, name, stored, *columns in rows
+        ),
+        results,
+        batch_size=batch_size,
+    )
+
+    # Exams without measurement rows may be in compact storage
+    row_exams = {row[1] for row in rows}
+    compact = {exam_id: segments for exam_id, segments in exam_segments.items() if exam_id not in row_exams}
+    return saved + save_block_calculated(compact)
+
+
+def run_carotid_calculator_batch(
+    exam_ids: Iterable[int],
+    site: Optional[str] = "mount_sinai_gp1c",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Re-scores many carotid exams with vectorized passes and persists all results.
+
+    Exams are processed in chunks so memory stays bounded on large archives.
+
+    Args:
+        exam_ids (Iterable[int]): Carotid exam primary keys to score.
+        site (str, optional): Site whose criteria should be applied.
+        chunk_size (int): Number of exams per load/score/write round.
+
+    Returns:
+        int: Number of measurement rows updated.
+    """
+    criteria = load_carotid_criteria(site)
+    graph = get_dependency_graph("carotid")
+    exam_ids = list(exam_ids)
+    updated = 0
+
+    logger.info(f"Running batch carotid calculator for {len(exam_ids)} exams (site={site})")
+
+    for start in range(0, len(exam_ids), chunk_size):
+        chunk = exam_ids[start:start + chunk_size]
+        calculator = CarotidBatchCalculator(load_segment_dicts_for_exams(chunk), criteria, graph)
+        fingerprints = calculator.fingerprints()
+        calculator.run_all()
+        exam_segments = calculator.get_segment_data()
+
+        # Step 1: Exams whose inputs changed since their last calculation
+        stored = dict(Exam.objects.filter(id__in=chunk).values_list("id", "calculation_fingerprint"))
+        rescored = {exam_id: fp for exam_id, fp in fingerprints.items() if stored.get(exam_id) != fp}
+
+        with transaction.atomic(savepoint=False):
+            updated += save_batch_results(exam_segments)
+            # Step 2: bulk_update() bypasses Exam.save(), so drop pinned report PDFs here
+            Exam.objects.bulk_update(
+                [Exam(id=exam_id, calculation_fingerprint=fp, report_pdf_key="") for exam_id, fp in rescored.items()],
+                ["calculation_fingerprint", "report_pdf_key"],
+            )
+            # Step 3: Keep conclusions in step with the new results, as the scalar path does
+            materialize_conclusions({exam_id: exam_segments[exam_id] for exam_id in rescored}, rescored)
+        logger.debug(f"Batch chunk complete: exams {start}–{start + len(chunk) - 1}")
+
+    logger.info(f"Batch carotid calculation complete: {updated} measurements updated")
+    return updated
@@ -9,18 +9,62 @@ to an Exam instance and persist the annotated results.
 
 import logging
 import json
+from functools import cached_property
 from decimal import Decimal
-from typing import Optional
+from typing import Callable, Hashable, Iterable, Mapping, Optional
 
-from reports.models import Exam
+from django.db import transaction
+
+from reports.models import Exam, Measurement
 from reports.site.site_loader import load_carotid_criteria
 from reports.types.segments.carotid_segments import build_segment_dict
 from reports.calculators.base_calculator import calculate_from_segment
+from reports.calculators.stenosis_table import StenosisTable, get_stenosis_table
+from reports.calculators.dependency_graph import SegmentDependencyGraph, get_dependency_graph
+from reports.calculators.derived_columns import (
+    DERIVED_COLUMNS,
+    VERTEBRAL_NORMAL,
+    VERTEBRAL_PRE_STEAL,
+    VERTEBRAL_STEAL,
+    derived_columns,
+)
+from reports.calculators.result_cache import calculation_fingerprint, result_cache
+from reports.services.compact_store import COMPACT, save_block_calculated
+from reports.services.exam_snapshot import load_exam_snapshot
+from reports.services.preliminary_reports import materialize_conclusion
 from reports.types.segments.carotid_segments import CarotidSegmentDict
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Part of every calculation fingerprint: bump whenever the calculator's output can change
+CALCULATOR_VERSION = "carotid-4"
+
+# Keys written by the calculator; cleared before a segment is recomputed
+DERIVED_FIELDS = ("ica_cca_ratio", "stenosis_category", "stenosis_notes", "vertebral_comment", "vertebral_flow")
+
+# Template vessel of the segments that get vertebral flow interpretation
+VERTEBRAL_VESSEL = "vertebral"
+
+
+def is_vertebral_segment(segment_key: str, graph: Optional[SegmentDependencyGraph] = None) -> bool:
+    """
+    Whether a segment is vertebral, judged by its template vessel (e.g. "va_prox_right").
+
+    Segments unknown to the graph (or all segments when no graph is given, e.g.
+    ad-hoc dictionaries) fall back to their name, such as "vertebral_left".
+
+    Args:
+        segment_key (str): Name of the segment.
+        graph (SegmentDependencyGraph, optional): Template graph carrying segment vessels.
+
+    Returns:
+        bool: True for vertebral segments.
+    """
+    if graph is not None and segment_key in graph.vessels:
+        return graph.vessels[segment_key] == VERTEBRAL_VESSEL
+    return VERTEBRAL_VESSEL in segment_key.lower()
+
 
 # ========================
 # Core Calculator Class
@@ -32,18 +76,37 @@ class CarotidCalculator:
     to carotid segments using site-specific JSON criteria.
 
     This calculator operates on in-memory dictionaries that represent per-segment data.
+    When given a SegmentDependencyGraph, cross-segment inputs (e.g., the same-side
+    distal CCA PSV for ICA segments) are joined in before each segment is computed,
+    and `recalculate()` can refresh just the segments affected by an edit.
     """
 
-    def __init__(self, segments: dict[str, CarotidSegmentDict], criteria: dict):
+    def __init__(
+        self,
+        segments: dict[str, CarotidSegmentDict],
+        criteria: dict,
+        graph: Optional[SegmentDependencyGraph] = None,
+    ):
         """
         Initializes the calculator.
 
         Args:
             segments (dict): Segment name to measurement dictionary.
             criteria (dict): Site-specific JSON thresholds and rules.
+            graph (SegmentDependencyGraph, optional): Cross-segment dependencies;
+                without it, segments must already carry inputs such as `cca_psv`.
         """
         self.segments = segments
         self.criteria = criteria
+        self.graph = graph
+
+    @cached_property
+    def stenosis_table(self) -> StenosisTable:
+        """
+        Returns:
+            StenosisTable: Compiled decision table shared by all calculators with these criteria.
+        """
+        return get_stenosis_table(self.criteria)
 
     def compute_ica_cca_ratio(self, segment: CarotidSegmentDict) -> None:
         """
@@ -61,14 +124,15 @@ class CarotidCalculator:
         """
         Applies PSV/EDV/ratio-based rules to classify ICA stenosis.
 
+        The band is found by a bisect lookup in the compiled StenosisTable,
+        then refined by the band's EDV limit and the ICA/CCA upgrade ratio.
+
         Args:
             segment (CarotidSegmentDict): Segment with velocity values.
         """
         psv = segment.get("psv")
         edv = segment.get("edv")
         ica_cca_ratio = segment.get("ica_cca_ratio")
-        thresholds = self.criteria["stenosis_thresholds"]
-        notes = []
 
         if psv is None:
             logger.debug("PSV missing; skipping stenosis classification.")
@@ -76,35 +140,12 @@ class CarotidCalculator:
 
         logger.debug(f"Stenosis evaluation: PSV={psv}, EDV={edv}, ICA/CCA={ica_cca_ratio}")
 
-        if psv <= thresholds["0_19"]["psv_max"]:
-            segment["stenosis_category"] = "0–19%"
-
-        elif thresholds["20_39"]["psv_min"] <= psv <= thresholds["20_39"]["psv_max"]:
-            segment["stenosis_category"] = "20–39%"
-
-        elif thresholds["40_59"]["psv_min"] <= psv <= thresholds["40_59"]["psv_max"]:
-            segment["stenosis_category"] = "40–59%"
-
-        elif thresholds["60_79"]["psv_min"] <= psv <= thresholds["60_79"]["psv_max"]:
-            if edv is not None and edv <= thresholds["60_79"]["edv_max"]:
-                if ica_cca_ratio is not None and ica_cca_ratio > thresholds["upgrade_if_ratio_gt"]:
-                    segment["stenosis_category"] = "≥70% (ICA/CCA > 4)"
-                    notes.append("Ratio > 4.0 suggests upgrade to ≥70% stenosis.")
-                else:
-                    segment["stenosis_category"] = "60–79%"
-            else:
-                segment["stenosis_category"] = "Uncertain (missing or high EDV)"
-                notes.append("Unable to confirm 60–79% due to missing or high EDV.")
-
-        elif psv >= thresholds["80_99"]["psv_min"]:
-            if edv is not None and edv >= thresholds["80_99"]["edv_min"]:
-                segment["stenosis_category"] = "80–99%"
-            else:
-                segment["stenosis_category"] = "Uncertain (PSV >240, EDV not >135)"
-                notes.append("PSV suggests high-grade, but EDV does not confirm.")
-
-        if notes:
-            segment["stenosis_notes"] = " ".join(notes)
+        category, note = self.stenosis_table.classify(psv, edv, ica_cca_ratio)
+        if category:
+            segment["stenosis_category"] = category
+
+        if note:
+            segment["stenosis_notes"] = note
             logger.debug(f"Stenosis notes: {segment['stenosis_notes']}")
 
     def interpret_vertebral_waveform(self, segment_key: str, segment: CarotidSegmentDict) -> None:
@@ -115,7 +156,7 @@ class CarotidCalculator:
             segment_key (str): Name of the segment.
             segment (CarotidSegmentDict): Segment data dictionary.
         """
-        if "vertebral" not in segment_key.lower():
+        if not is_vertebral_segment(segment_key, self.graph):
             return
 
         rules = self.criteria.get("vertebral_rules", {})
@@ -129,21 +170,58 @@ class CarotidCalculator:
 
         if direction == steal_direction:
             segment["vertebral_comment"] = "Retrograde vertebral flow is consistent with subclavian steal."
+            segment["vertebral_flow"] = VERTEBRAL_STEAL
         elif waveform in pre_steal_waveforms:
             label = waveform.replace("_", " ").capitalize()
             segment["vertebral_comment"] = f"{label} waveform pattern indicative of pre-steal physiology."
+            segment["vertebral_flow"] = VERTEBRAL_PRE_STEAL
         else:
             segment["vertebral_comment"] = "Normal vertebral flow pattern."
+            segment["vertebral_flow"] = VERTEBRAL_NORMAL
+
+    def calculate_segment(self, segment_key: str, segment: CarotidSegmentDict) -> None:
+        """
+        Recomputes every calculated field of one segment from its current inputs.
+
+        Args:
+            segment_key (str): Name of the segment.
+            segment (CarotidSegmentDict): Segment data dictionary (modified in place).
+        """
+        logger.debug(f"Processing segment: {segment_key}")
+        for field in DERIVED_FIELDS:
+            segment.pop(field, None)
+        if self.graph is not None:
+            self.graph.join_inputs(self.segments, [segment_key])
+        self.compute_ica_cca_ratio(segment)
+        self.apply_stenosis_logic(segment)
+        self.interpret_vertebral_waveform(segment_key, segment)
+
+    def recalculate(self, dirty) -> list[str]:
+        """
+        Recomputes only the segments affected by an edit, in dependency order.
+
+        Args:
+            dirty: Edited segment names, or a mapping of segment name → changed
+                fields (see SegmentDependencyGraph.affected()).
+
+        Returns:
+            list[str]: Names of the segments that were recomputed.
+        """
+        names = self.graph.affected(dirty) if self.graph is not None else list(dirty)
+        recalculated = []
+        for segment_key in names:
+            segment = self.segments.get(segment_key)
+            if segment is None:
+                continue
+            self.calculate_segment(segment_key, segment)
+            recalculated.append(segment_key)
+        return recalculated
 
     def run_all(self) -> None:
         """
         Runs all carotid calculations across all segments.
         """
-        for segment_key, segment in self.segments.items():
-            logger.debug(f"Processing segment: {segment_key}")
-            self.compute_ica_cca_ratio(segment)
-            self.apply_stenosis_logic(segment)
-            self.interpret_vertebral_waveform(segment_key, segment)
+        self.recalculate(list(self.segments))
 
     def get_segment_data(self) -> dict[str, CarotidSegmentDict]:
         """
@@ -178,44 +256,227 @@ class CarotidCalculator:
 # Calculator Helpers
 # ========================
 
-def save_segment_results_to_exam(exam: Exam, segment_results: dict[str, dict]) -> None:
+def _canonical_json(data: dict) -> str:
+    """
+    Encode calculated fields deterministically so stored and fresh results compare byte-for-byte.
+    """
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+def persist_calculated_fields(
+    rows: Iterable[tuple[int, Hashable, dict, Mapping]],
+    results: dict[Hashable, dict],
+    batch_size: int = 1000,
+) -> int:
+    """
+    Writes calculator output into Measurement.calculated_fields with one bulk update.
+
+    The typed finding columns (DERIVED_COLUMNS: ratio, category, grade, vertebral
+    flow) are written in the same UPDATE, so cohort queries can use their indexes.
+
+    Rows are skipped only when both the stored output is byte-identical to the new
+    output and the stored finding columns already match it, so stale columns are
+    repaired by the next calculation. When a key appears more than once (several
+    measurements per segment), only the first row is written, matching
+    build_segment_dict().
+
+    Args:
+        rows (Iterable): (measurement_id, result_key, stored calculated_fields,
+            stored DERIVED_COLUMNS values) tuples.
+        results (dict): Result key to freshly calculated segment data.
+        batch_size (int): Rows per UPDATE statement.
+
+    Returns:
+        int: Number of measurement rows written.
+    """
+    changed: list[Measurement] = []
+    seen: set = set()
+
+    for measurement_id, key, stored, stored_columns in rows:
+        data = results.get(key)
+        if data is None or key in seen:
+            continue
+        seen.add(key)
+        columns = derived_columns(data)
+        if _canonical_json(stored) == _canonical_json(data) and all(
+            stored_columns.get(column) == value for column, value in columns.items()
+        ):
+            continue
+        changed.append(Measurement(id=measurement_id, calculated_fields=data, **columns))
+
+    if changed:
+        Measurement.objects.bulk_update(changed, ["calculated_fields", *DERIVED_COLUMNS], batch_size=batch_size)
+    return len(changed)
+
+
+def save_segment_results_to_exam(
+    exam: Exam,
+    segment_results: dict[str, dict],
+    fingerprint: Optional[str] = None,
+) -> int:
     """
     Saves calculated segment data into Measurement.calculated_fields for persistence.
 
+    All measurements for the exam are loaded in one query and changed rows are
+    written with a single bulk update; unchanged rows are not rewritten.
+
     Args:
         exam (Exam): Target exam instance.
         segment_results (dict): Output from CarotidCalculator.get_segment_data().
-    """
-    for name, data in segment_results.items():
-        try:
-            segment = exam.segments.get(name=name)
-            measurement = segment.measurement
-            if not measurement:
-                logger.warning(f"Measurement missing for segment '{name}' in exam ID {exam.id}")
-                continue
-            measurement.calculated_fields = data
-            measurement.save()
-            logger.debug(f"Saved results for segment '{name}' (exam ID {exam.id})")
-        except Exception as e:
-            logger.error(f"Error saving segment '{name}' (exam ID {exam.id}): {str(e)}")
+        fingerprint (str, optional): Calculation fingerprint of these results,
+            stored on the exam in the same transaction.
 
-
-def run_carotid_calculator(exam: Exam) -> None:
+    Returns:
+        int: Number of measurements whose results changed.
+    """
+    if exam.storage_mode == COMPACT:
+        with transaction.atomic(savepoint=False):
+            saved = save_block_calculated({exam.id: segment_results})
+            if fingerprint is not None and fingerprint != exam.calculation_fingerprint:
+                Exam.objects.filter(id=exam.id).update(calculation_fingerprint=fingerprint)
+                exam.calculation_fingerprint = fingerprint
+        logger.debug(f"Saved results for {saved} segments (exam ID {exam.id}, compact)")
+        return saved
+
+    rows = [
+        (measurement_id, name, stored, dict(zip(DERIVED_COLUMNS, columns)))
+        for measurement_id, name, stored, *columns in (
+            Measurement.objects
+            .filter(segment__exam=exam, segment__name__in=list(segment_results))
+            .order_by("segment_id", "id")
+            .values_list("id", "segment__name", "calculated_fields", *DERIVED_COLUMNS)
+        )
+    ]
+
+    missing = set(segment_results) - {row[1] for row in rows}
+    for name in sorted(missing):
+        logger.warning(f"Measurement missing for segment '{name}' in exam ID {exam.id}")
+
+    # savepoint=False: no extra SAVEPOINT round trips when called inside a transaction
+    with transaction.atomic(savepoint=False):
+        saved = persist_calculated_fields(rows, segment_results)
+        if fingerprint is not None and fingerprint != exam.calculation_fingerprint:
+            Exam.objects.filter(id=exam.id).update(calculation_fingerprint=fingerprint)
+            exam.calculation_fingerprint = fingerprint
+
+    logger.debug(f"Saved results for {saved} segments (exam ID {exam.id})")
+    return saved
+
+
+def run_carotid_calculator(
+    exam: Exam,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
     """
     Applies CarotidCalculator to a given Exam and persists all results.
 
+    The normalized inputs are fingerprinted first. If the fingerprint matches the
+    one stored with the exam's current results, nothing is recomputed or written;
+    otherwise results come from the result cache when available, and the
+    calculator runs only on a cache miss.
+
     Args:
         exam (Exam): The target carotid exam.
+        on_progress (Callable[[int], None], optional): Called with a completion
+            percentage after each stage (used by background calculation jobs).
+
+    Returns:
+        int: Number of measurements whose calculated_fields were written.
     """
+    report = on_progress or (lambda percent: None)
     logger.info(f"Running carotid calculator for exam ID {exam.id}")
 
     segments = build_segment_dict(exam)
     site = getattr(exam, "site", "mount_sinai_gp1c")
     criteria = load_carotid_criteria(site)
+    graph = get_dependency_graph("carotid")
+
+    # Step 1: Fingerprint the normalized inputs (cross-segment values joined in)
+    graph.join_inputs(segments)
+    fingerprint = calculation_fingerprint(segments, criteria, CALCULATOR_VERSION)
+    report(25)
+
+    if fingerprint == exam.calculation_fingerprint:
+        logger.info(f"Carotid results for exam ID {exam.id} are up to date; skipping calculation")
+        report(100)
+        return 0
+
+    # Step 2: Reuse cached results for identical inputs, otherwise calculate
+    results = result_cache.get(fingerprint)
+    if results is None:
+        calculator = CarotidCalculator(segments, criteria, graph)
+        calculator.run_all()
+        results = calculator.get_segment_data()
+        result_cache.set(fingerprint, results)
+    report(50)
+
+    # Step 3: Persist results together with their fingerprint, and materialize the conclusion
+    with transaction.atomic():
+        saved = save_segment_results_to_exam(exam, results, fingerprint)
+        materialize_conclusion(exam, results, fingerprint)
+    report(100)
 
-    calculator = CarotidCalculator(segments, criteria)
-    calculator.run_all()
+    logger.info(f"Carotid calculation complete and results saved for exam ID {exam.id}")
+    return saved
 
-    save_segment_results_to_exam(exam, calculator.get_segment_data())
 
-    logger.info(f"Carotid calculation complete and results saved for exam ID {exam.id}")
+def recalculate_carotid_segments(exam: Exam, dirty, results_current: bool = False) -> list[str]:
+    """
+    Incrementally recomputes the segments affected by an edit and persists them.
+
+    Only the affected segments and the segments they read from are loaded (one
+    query); unchanged results are not rewritten (at most one bulk update).
+
+    When the exam's results were current before the edit (`results_current`),
+    the whole exam is loaded instead (still one query) so the new inputs can be
+    fingerprinted and the conclusion re-materialized: the exam stays current and
+    readers, as well as a later full calculation, do not redo the work. Results
+    calculated under different site criteria or an older calculator version are
+    not detected here; the full calculation (`run_carotid_calculator`) does that.
+
+    Args:
+        exam (Exam): The target carotid exam.
+        dirty: Edited segment names, or a mapping of segment name → changed fields.
+        results_current (bool): Whether the stored results matched the inputs
+            before the edit (i.e., the exam had a calculation fingerprint).
+
+    Returns:
+        list[str]: Names of the segments that were recomputed.
+    """
+    graph = get_dependency_graph("carotid")
+    affected = graph.affected(dirty)
+    if not affected:
+        return []
+
+    # Step 1: Load the inputs (the whole exam when the fingerprint is kept current)
+    snapshot = load_exam_snapshot(exam.id, None if results_current else set(affected) | graph.sources(affected))
+    segments = snapshot.segment_dict()
+    criteria = load_carotid_criteria(getattr(exam, "site", "mount_sinai_gp1c"))
+
+    fingerprint = None
+    if results_current:
+        graph.join_inputs(segments)
+        fingerprint = calculation_fingerprint(segments, criteria, CALCULATOR_VERSION)
+
+    # Step 2: Recompute the affected segments
+    calculator = CarotidCalculator(segments, criteria, graph)
+    recalculated = calculator.recalculate(affected)
+
+    # Step 3: Persist them (with the fingerprint), and refresh the conclusion
+    results = {name: segments[name] for name in recalculated}
+    if exam.storage_mode == COMPACT:
+        saved = save_block_calculated({exam.id: results})
+    else:
+        rows = [row for row in snapshot.measurement_rows() if row[1] in results]
+        saved = persist_calculated_fields(rows, results)
+
+    if fingerprint is not None:
+        Exam.objects.filter(id=exam.id).update(calculation_fingerprint=fingerprint)
+        exam.calculation_fingerprint = fingerprint
+        materialize_conclusion(exam, {**snapshot.segment_dict(include_calculated=True), **results}, fingerprint)
+
+    logger.debug(
+        f"Incremental recalculation for exam ID {exam.id}: "
+        f"{len(recalculated)} segments recomputed, {saved} saved"
+    )
+    return recalculated
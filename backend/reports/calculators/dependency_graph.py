@@ -0,0 +1,244 @@
+"""
+Segment Dependency Graph
+
+Some calculated values read measurements from a *different* segment: the ICA/CCA
+ratio of every ICA segment divides its PSV by the PSV of the same-side distal CCA.
+This module builds, once per template, a graph of those cross-segment inputs so that:
+
+  - the calculator can join the referenced values (e.g., `cca_psv`) into each
+    segment before computing it, and
+  - an edit to a few segments recomputes only those segments and the segments
+    that read them, in topological order, instead of the whole exam.
+
+Edges are declared as DependencyRule entries (per exam type) and resolved against
+the template's segments by vessel, side and position.
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional, Union
+
+from report_template.registry.frozen import FrozenDict
+from report_template.registry.template_registry import get_template
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Template site used when the caller does not name one (exams do not store their site)
+DEFAULT_TEMPLATE_SITE = "mount_sinai_hospital"
+
+# Marker meaning "every field of the segment may have changed"
+ALL_FIELDS = None
+
+
+@dataclass(frozen=True)
+class DependencyRule:
+    """
+    Declares that segments of one vessel read a field from a same-side segment of another.
+
+    Attributes:
+        target_vessel (str): Vessel of the reading segments (e.g., "ica").
+        target_field (str): Key filled in on the reading segment (e.g., "cca_psv").
+        source_vessel (str): Vessel of the referenced segment (e.g., "cca").
+        source_field (str): Key read from the referenced segment (e.g., "psv").
+        source_positions (tuple[str]): Acceptable source positions, most preferred first.
+    """
+    target_vessel: str
+    target_field: str
+    source_vessel: str
+    source_field: str
+    source_positions: tuple
+
+
+# ICA/CCA ratio: ICA PSV over the same-side distal CCA PSV (mid/prox if no distal segment)
+CAROTID_DEPENDENCY_RULES = (
+    DependencyRule("ica", "cca_psv", "cca", "psv", ("dist", "mid", "prox")),
+)
+
+DEPENDENCY_RULES = {
+    "carotid": CAROTID_DEPENDENCY_RULES,
+}
+
+
+@dataclass(frozen=True)
+class SegmentInput:
+    """
+    One cross-segment value read by a segment: `segment[field] = source[source_field]`.
+    """
+    field: str
+    source: str
+    source_field: str
+
+
+@dataclass(frozen=True)
+class SegmentDependencyGraph:
+    """
+    Immutable dependency graph over the segments of one exam template.
+
+    Attributes:
+        order (tuple[str]): Every segment, sources before the segments that read them.
+        inputs (FrozenDict): Segment → tuple of SegmentInput it reads.
+        dependents (FrozenDict): Segment → tuple of (reading segment, source field).
+        rank (FrozenDict): Segment → position in `order`.
+        vessels (FrozenDict): Segment → template vessel (lower-case, e.g. "vertebral").
+    """
+    order: tuple
+    inputs: FrozenDict
+    dependents: FrozenDict
+    rank: FrozenDict
+    vessels: FrozenDict
+
+    def affected(self, dirty: Union[Mapping[str, Optional[Iterable[str]]], Iterable[str]]) -> list[str]:
+        """
+        Segments to recompute after an edit, in topological order.
+
+        A dependent is only included when a field it actually reads changed; e.g.
+        editing a CCA's EDV does not touch the ICA segments, editing its PSV does.
+
+        Args:
+            dirty: Segment names, or a mapping of segment name → changed field
+                names (None meaning "any field").
+
+        Returns:
+            list[str]: Dirty segments plus their transitive dependents. Names
+                unknown to the graph are kept, after the known ones.
+        """
+        if not isinstance(dirty, Mapping):
+            dirty = dict.fromkeys(dirty, ALL_FIELDS)
+
+        changed: dict[str, Optional[frozenset]] = {}
+        stack = [(name, None if fields is ALL_FIELDS else frozenset(fields)) for name, fields in dirty.items()]
+        while stack:
+            name, fields = stack.pop()
+            if name in changed:
+                previous = changed[name]
+                if previous is ALL_FIELDS or (fields is not ALL_FIELDS and fields <= previous):
+                    continue
+                fields = ALL_FIELDS if fields is ALL_FIELDS else fields | previous
+            changed[name] = fields
+
+            for target, source_field in self.dependents.get(name, ()):
+                if fields is ALL_FIELDS or source_field in fields:
+                    # The reader's own calculated fields change, so propagate conservatively
+                    stack.append((target, ALL_FIELDS))
+
+        unknown = len(self.rank)
+        return sorted(changed, key=lambda name: self.rank.get(name, unknown))
+
+    def sources(self, names: Iterable[str]) -> set[str]:
+        """
+        Segments whose values are read by `names` (needed to recompute them).
+        """
+        return {item.source for name in names for item in self.inputs.get(name, ())}
+
+    def join_inputs(self, segments: dict[str, dict], names: Optional[Iterable[str]] = None) -> None:
+        """
+        Copy cross-segment inputs into the reading segments (e.g., ICA `cca_psv`).
+
+        Inputs whose source segment is absent from `segments` are left untouched.
+
+        Args:
+            segments (dict): Segment name → measurement dictionary (modified in place).
+            names (Iterable[str], optional): Segments to fill; defaults to all of them.
+        """
+        for name in segments if names is None else names:
+            segment = segments.get(name)
+            if segment is None:
+                continue
+            for item in self.inputs.get(name, ()):
+                source = segments.get(item.source)
+                if source is not None:
+                    segment[item.field] = source.get(item.source_field)
+
+
+def _select_source(rule: DependencyRule, side: str, by_vessel_side: dict) -> Optional[str]:
+    """
+    Pick the source segment for a rule on one side, honoring the position preference.
+    """
+    candidates = by_vessel_side.get((rule.source_vessel, side), {})
+    for position in rule.source_positions:
+        if position in candidates:
+            return candidates[position]
+    return None
+
+
+def build_dependency_graph(segments: Iterable[Mapping], rules: Iterable[DependencyRule]) -> SegmentDependencyGraph:
+    """
+    Resolve dependency rules against template segments and sort them topologically.
+
+    Args:
+        segments (Iterable[Mapping]): Template segment entries (id, vessel, side, position).
+        rules (Iterable[DependencyRule]): Cross-segment inputs for this exam type.
+
+    Returns:
+        SegmentDependencyGraph: The immutable graph.
+
+    Raises:
+        ValueError: If the rules produce a dependency cycle.
+    """
+    segments = list(segments)
+    template_index = {seg["id"]: index for index, seg in enumerate(segments)}
+
+    # Step 1: Index segments by (vessel, side) → position → segment id
+    by_vessel_side: dict[tuple[str, str], dict[str, str]] = {}
+    for seg in segments:
+        key = (seg["vessel"].lower(), seg.get("side", "n/a"))
+        by_vessel_side.setdefault(key, {}).setdefault(seg.get("position", ""), seg["id"])
+
+    # Step 2: Resolve every rule into per-segment inputs
+    inputs: dict[str, list[SegmentInput]] = {}
+    dependents: dict[str, list[tuple[str, str]]] = {}
+    for rule in rules:
+        for seg in segments:
+            if seg["vessel"].lower() != rule.target_vessel:
+                continue
+            source = _select_source(rule, seg.get("side", "n/a"), by_vessel_side)
+            if source is None or source == seg["id"]:
+                continue
+            inputs.setdefault(seg["id"], []).append(SegmentInput(rule.target_field, source, rule.source_field))
+            dependents.setdefault(source, []).append((seg["id"], rule.source_field))
+
+    # Step 3: Topological sort (Kahn), ties broken by template order
+    pending = {name: len({item.source for item in inputs.get(name, ())}) for name in template_index}
+    ready = [(template_index[name], name) for name, count in pending.items() if count == 0]
+    heapq.heapify(ready)
+    order: list[str] = []
+    while ready:
+        _, name = heapq.heappop(ready)
+        order.append(name)
+        for target in {target for target, _ in dependents.get(name, ())}:
+            pending[target] -= 1
+            if pending[target] == 0:
+                heapq.heappush(ready, (template_index[target], target))
+
+    if len(order) != len(template_index):
+        cyclic = sorted(set(template_index) - set(order))
+        raise ValueError(f"Segment dependency cycle between: {', '.join(cyclic)}")
+
+    return SegmentDependencyGraph(
+        order=tuple(order),
+        inputs=FrozenDict({name: tuple(items) for name, items in inputs.items()}),
+        dependents=FrozenDict({name: tuple(items) for name, items in dependents.items()}),
+        rank=FrozenDict({name: index for index, name in enumerate(order)}),
+        vessels=FrozenDict({seg["id"]: seg["vessel"].lower() for seg in segments}),
+    )
+
+
+@lru_cache(maxsize=32)
+def get_dependency_graph(exam_type: str = "carotid", site: str = DEFAULT_TEMPLATE_SITE) -> SegmentDependencyGraph:
+    """
+    Returns the dependency graph for an exam template, built once per (exam_type, site).
+
+    Args:
+        exam_type (str): Exam type (e.g., "carotid").
+        site (str): Template site identifier.
+
+    Returns:
+        SegmentDependencyGraph: Shared, immutable graph.
+    """
+    template = get_template(exam_type, site)
+    graph = build_dependency_graph(template["segments"], DEPENDENCY_RULES.get(exam_type, ()))
+    logger.debug(f"Built {exam_type} dependency graph: {len(graph.order)} segments, {len(graph.inputs)} with inputs")
+    return graph
@@ -0,0 +1,64 @@
+"""
+Derived Columns
+
+Maps calculator output (the `calculated_fields` JSON of a segment) onto the
+typed, indexed Measurement columns used by cohort queries:
+
+    derived_ica_cca_ratio       float, from "ica_cca_ratio"
+    derived_stenosis_category   text, from "stenosis_category"
+    stenosis_grade              lower bound of the category in %, e.g. "≥70% (ICA/CCA > 4)" → 70
+    vertebral_flow              "normal" / "pre_steal" / "steal", from "vertebral_flow"
+
+The entered `ica_cca_ratio` / `stenosis_category` columns are technologist inputs
+and are never written here.
+
+Both the scalar and the batch calculator persist through
+`persist_calculated_fields()`, which writes these columns together with the JSON.
+"""
+
+import re
+from typing import Optional
+
+# Vertebral flow flags written by the calculators (Measurement.VERTEBRAL_FLOWS)
+VERTEBRAL_NORMAL = "normal"
+VERTEBRAL_PRE_STEAL = "pre_steal"
+VERTEBRAL_STEAL = "steal"
+
+# Measurement columns filled from calculator output
+DERIVED_COLUMNS = ("derived_ica_cca_ratio", "derived_stenosis_category", "stenosis_grade", "vertebral_flow")
+
+# Leading percentage of a graded category ("0–19%", "60–79%", "≥70% (...)")
+_GRADE_PATTERN = re.compile(r"^\s*[≥>]?\s*(\d+)\s*(?:%|[–-])")
+
+_CATEGORY_MAX_LENGTH = 64
+
+
+def stenosis_grade(category: Optional[str]) -> Optional[int]:
+    """
+    Lower bound (%) of a stenosis category, or None for ungraded categories
+    such as "Uncertain (missing or high EDV)".
+    """
+    if not category:
+        return None
+    match = _GRADE_PATTERN.match(category)
+    return int(match.group(1)) if match else None
+
+
+def derived_columns(data: dict) -> dict:
+    """
+    Typed column values for one segment's calculator output.
+
+    Args:
+        data (dict): Calculated segment data.
+
+    Returns:
+        dict: DERIVED_COLUMNS → value, ready for `Measurement(**columns)`.
+    """
+    category = data.get("stenosis_category") or ""
+    ratio = data.get("ica_cca_ratio")
+    return {
+        "derived_ica_cca_ratio": None if ratio is None else float(ratio),
+        "derived_stenosis_category": category[:_CATEGORY_MAX_LENGTH],
+        "stenosis_grade": stenosis_grade(category),
+        "vertebral_flow": data.get("vertebral_flow") or "",
+    }
@@ -0,0 +1,144 @@
+"""
+Calculation Result Cache
+
+Calculator output is a pure function of (segment inputs, criteria, calculator
+code). This module fingerprints that triple and keeps recent results in two tiers:
+
+  1. An in-process LRU (no I/O, per worker process).
+  2. A shared Django cache (settings.CALCULATION_RESULT_CACHE names the alias;
+     point it at Redis/Memcached so every web and job worker shares results).
+
+The fingerprint is also stored on the exam (`Exam.calculation_fingerprint`), so a
+calculate call on an unchanged exam can return without recomputing or writing.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Entries kept by the in-process tier
+DEFAULT_LRU_SIZE = 256
+
+# Seconds results live in the shared tier
+DEFAULT_TIMEOUT = 24 * 60 * 60
+
+KEY_PREFIX = "calc-result"
+
+
+def _canonical_json(data) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def criteria_fingerprint(criteria: Mapping) -> str:
+    """
+    Identify a criteria document: the file hash for loaded SiteCriteria,
+    otherwise a hash of its canonical JSON.
+    """
+    fingerprint = getattr(criteria, "fingerprint", None)
+    if fingerprint:
+        return fingerprint
+    return hashlib.sha256(_canonical_json(criteria).encode()).hexdigest()
+
+
+def calculation_fingerprint(segments: Mapping[str, Mapping], criteria: Mapping, calculator_version: str) -> str:
+    """
+    Hash normalized calculator inputs.
+
+    Args:
+        segments (Mapping): Segment name → input dictionary (after cross-segment joins).
+        criteria (Mapping): Site criteria applied by the calculator.
+        calculator_version (str): Bumped whenever calculator logic changes.
+
+    Returns:
+        str: Hex SHA-256 digest (64 characters).
+    """
+    digest = hashlib.sha256()
+    digest.update(calculator_version.encode())
+    digest.update(b"\0")
+    digest.update(criteria_fingerprint(criteria).encode())
+    digest.update(b"\0")
+    digest.update(_canonical_json(segments).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier (in-process LRU + shared Django cache) store of calculator results.
+
+    Values are kept as canonical JSON, so every `get()` returns a fresh dict
+    that callers may mutate freely.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_LRU_SIZE, timeout: int = DEFAULT_TIMEOUT):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._local: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """
+        The shared cache backend, or None when disabled (CALCULATION_RESULT_CACHE = None/"").
+        """
+        alias = getattr(settings, "CALCULATION_RESULT_CACHE", "default")
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _key(fingerprint: str) -> str:
+        return f"{KEY_PREFIX}:{fingerprint}"
+
+    def _remember(self, fingerprint: str, payload: str) -> None:
+        with self._lock:
+            self._local[fingerprint] = payload
+            self._local.move_to_end(fingerprint)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        """
+        Returns:
+            Optional[dict]: Cached results for the fingerprint, or None on a miss.
+        """
+        with self._lock:
+            payload = self._local.get(fingerprint)
+            if payload is not None:
+                self._local.move_to_end(fingerprint)
+
+        if payload is None and self.shared is not None:
+            payload = self.shared.get(self._key(fingerprint))
+            if payload is not None:
+                self._remember(fingerprint, payload)
+
+        if payload is None:
+            return None
+        logger.debug(f"Calculation result cache hit: {fingerprint[:12]}")
+        return json.loads(payload)
+
+    def set(self, fingerprint: str, results: Mapping) -> None:
+        """
+        Store results in both tiers.
+        """
+        payload = _canonical_json(results)
+        self._remember(fingerprint, payload)
+        if self.shared is not None:
+            self.shared.set(self._key(fingerprint), payload, self.timeout)
+
+    def clear(self) -> None:
+        """
+        Empty the in-process tier (shared entries expire on their own).
+        """
+        with self._lock:
+            self._local.clear()
+
+
+# Process-wide cache used by run_carotid_calculator()
+result_cache = ResultCache()
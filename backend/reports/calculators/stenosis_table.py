@@ -0,0 +1,199 @@
+"""
+Stenosis Decision Table
+
+Compiles the `stenosis_thresholds` block of a site's criteria JSON into a sorted
+breakpoint table. Each PSV band is found with a `bisect` lookup, then refined with
+the band's optional EDV limits and the site's ICA/CCA upgrade ratio.
+
+Bands are read from whatever keys the site defines ("0_19", "20_39", ...), so sites
+with a different number of bands need no code changes. Display text can be set per
+band ("label", "unconfirmed_label"); otherwise it is derived from the band's bounds. Compiled tables are cached
+and shared by every calculator using the same thresholds.
+"""
+
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from math import inf
+from typing import Optional
+
+# Category and note text shared by the scalar and batch calculators
+HIGH_EDV_CATEGORY = "Uncertain (missing or high EDV)"
+UNCONFIRMED_NOTE = "PSV suggests high-grade, but EDV does not confirm."
+UPGRADE_CATEGORY = "≥70%"
+
+
+@dataclass(frozen=True)
+class StenosisBand:
+    """
+    One PSV band of the decision table plus its EDV refinement.
+
+    Attributes:
+        label (str): Category shown when the band is confirmed (e.g., "60–79%").
+        psv_min (float): Inclusive lower PSV bound (-inf when open).
+        psv_max (float): Inclusive upper PSV bound (inf when open).
+        edv_max (float, optional): EDV must be <= this to confirm the band.
+        edv_min (float, optional): EDV must be >= this to confirm the band.
+        unconfirmed_label (str, optional): Category shown when `edv_min` is not
+            met; defaults to one stating the band's actual bounds.
+    """
+    label: str
+    psv_min: float
+    psv_max: float
+    edv_max: Optional[float] = None
+    edv_min: Optional[float] = None
+    unconfirmed_label: Optional[str] = None
+
+    @property
+    def high_edv_note(self) -> str:
+        return f"Unable to confirm {self.label} due to missing or high EDV."
+
+    @property
+    def unconfirmed_category(self) -> str:
+        if self.unconfirmed_label:
+            return self.unconfirmed_label
+        return f"Uncertain (PSV ≥{self.psv_min:g}, EDV <{self.edv_min:g})"
+
+
+@dataclass(frozen=True)
+class StenosisTable:
+    """
+    Sorted, immutable PSV breakpoint table compiled from site criteria.
+
+    Attributes:
+        bands (tuple[StenosisBand]): Bands sorted by `psv_min`.
+        lower_bounds (tuple[float]): `psv_min` of each band, for bisect.
+        upgrade_if_ratio_gt (float, optional): ICA/CCA ratio that upgrades an
+            EDV-confirmed band to UPGRADE_CATEGORY.
+    """
+    bands: tuple
+    lower_bounds: tuple
+    upgrade_if_ratio_gt: Optional[float] = None
+
+    @property
+    def upgrade_category(self) -> str:
+        return f"{UPGRADE_CATEGORY} (ICA/CCA > {self.upgrade_if_ratio_gt:g})"
+
+    @property
+    def upgrade_note(self) -> str:
+        return f"Ratio > {float(self.upgrade_if_ratio_gt)} suggests upgrade to {UPGRADE_CATEGORY} stenosis."
+
+    def lookup(self, psv: float) -> Optional[StenosisBand]:
+        """
+        Find the band containing `psv` in O(log n).
+
+        Returns:
+            Optional[StenosisBand]: The matching band, or None if PSV falls in a gap.
+        """
+        index = bisect_right(self.lower_bounds, psv) - 1
+        if index < 0:
+            return None
+        band = self.bands[index]
+        return band if psv <= band.psv_max else None
+
+    def classify(
+        self, psv: float, edv: Optional[float], ica_cca_ratio: Optional[float]
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Classify a segment from its PSV, EDV and ICA/CCA ratio.
+
+        Args:
+            psv (float): Peak systolic velocity.
+            edv (float, optional): End diastolic velocity.
+            ica_cca_ratio (float, optional): Rounded ICA/CCA ratio.
+
+        Returns:
+            tuple: (stenosis category, note); either may be None.
+        """
+        band = self.lookup(psv)
+        if band is None:
+            return None, None
+
+        if band.edv_max is not None:
+            if edv is None or edv > band.edv_max:
+                return HIGH_EDV_CATEGORY, band.high_edv_note
+            if (
+                self.upgrade_if_ratio_gt is not None
+                and ica_cca_ratio is not None
+                and ica_cca_ratio > self.upgrade_if_ratio_gt
+            ):
+                return self.upgrade_category, self.upgrade_note
+            return band.label, None
+
+        if band.edv_min is not None and (edv is None or edv < band.edv_min):
+            return band.unconfirmed_category, UNCONFIRMED_NOTE
+
+        return band.label, None
+
+
+def _band_label(key: str, band: dict) -> str:
+    """
+    Build a display label from a band key (e.g., "60_79" -> "60–79%").
+    """
+    if "label" in band:
+        return band["label"]
+    return "–".join(key.split("_")) + "%"
+
+
+def compile_stenosis_table(thresholds: dict) -> StenosisTable:
+    """
+    Compile a `stenosis_thresholds` dictionary into a StenosisTable.
+
+    Every dict-valued entry is treated as a band; `upgrade_if_ratio_gt` is the
+    only scalar setting.
+
+    Args:
+        thresholds (dict): The site's `stenosis_thresholds` block.
+
+    Returns:
+        StenosisTable: Table with bands sorted by lower PSV bound.
+
+    Raises:
+        ValueError: If two bands overlap.
+    """
+    bands = sorted(
+        (
+            StenosisBand(
+                label=_band_label(key, band),
+                psv_min=band.get("psv_min", -inf),
+                psv_max=band.get("psv_max", inf),
+                edv_max=band.get("edv_max"),
+                edv_min=band.get("edv_min"),
+                unconfirmed_label=band.get("unconfirmed_label"),
+            )
+            for key, band in thresholds.items()
+            if isinstance(band, dict)
+        ),
+        key=lambda band: band.psv_min,
+    )
+
+    for previous, current in zip(bands, bands[1:]):
+        if current.psv_min <= previous.psv_max:
+            raise ValueError(f"Overlapping stenosis bands: {previous.label} and {current.label}")
+
+    return StenosisTable(
+        bands=tuple(bands),
+        lower_bounds=tuple(band.psv_min for band in bands),
+        upgrade_if_ratio_gt=thresholds.get("upgrade_if_ratio_gt"),
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(thresholds_json: str) -> StenosisTable:
+    return compile_stenosis_table(json.loads(thresholds_json))
+
+
+def get_stenosis_table(criteria: dict) -> StenosisTable:
+    """
+    Return the shared compiled table for a site's criteria.
+
+    Identical thresholds always map to the same StenosisTable instance.
+
+    Args:
+        criteria (dict): Site-specific criteria containing `stenosis_thresholds`.
+
+    Returns:
+        StenosisTable: Cached compiled decision table.
+    """
+    return _compile_cached(json.dumps(criteria["stenosis_thresholds"], sort_keys=True))
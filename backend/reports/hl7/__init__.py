@@ -0,0 +1 @@
+# reports/hl7/__init__.py
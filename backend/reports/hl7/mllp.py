@@ -0,0 +1,500 @@
+# reports/hl7/mllp.py
+
+"""
+Pooled MLLP Sender
+
+Delivers HL7 messages to the interface engine over MLLP (Minimal Lower Layer
+Protocol: <VT> message <FS><CR> frames over TCP) without opening a connection
+per message:
+
+  - MllpConnection keeps one TCP connection open and pipelines sends: several
+    messages may be written before their ACKs arrive. A reader task matches each
+    ACK to its message by control ID (MSH-10 ↔ MSA-2), so out-of-order ACKs are fine.
+  - MllpConnectionPool holds persistent connections per destination and sends on
+    the least-loaded one. A per-connection in-flight limit provides backpressure:
+    once every connection is full, `send()` waits for an ACK to free a slot.
+    `MllpSender.deliver_many()` runs one worker per slot, so a backlog never
+    turns into one task per message.
+  - MllpSender retries transport failures with exponential backoff and, when a
+    message still cannot be delivered, writes it to a local disk spool.
+    `drain_spool()` re-sends spooled messages once the destination is back.
+
+Negative acknowledgements (AE/AR) are not retried: the engine received the
+message and refused it, so sending it again would not help.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+START_BLOCK = b"\x0b"
+END_BLOCK = b"\x1c\x0d"
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_TIMEOUT = 30.0  # seconds to wait for an ACK
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds, doubled per retry
+
+ACCEPT_CODES = frozenset({"AA", "CA"})
+
+
+class MllpError(Exception):
+    """Raised when a message could not be delivered over MLLP."""
+
+
+class MllpNack(MllpError):
+    """Raised when the receiver answered with a negative acknowledgement (AE/AR/CE/CR)."""
+
+    def __init__(self, ack: "Ack"):
+        super().__init__(f"Message {ack.control_id} rejected with {ack.code}: {ack.text}")
+        self.ack = ack
+
+
+# ========================
+# Framing
+# ========================
+
+def frame(message: str) -> bytes:
+    """
+    Wrap an HL7 message in an MLLP frame.
+    """
+    return START_BLOCK + message.encode("utf-8") + END_BLOCK
+
+
+async def read_frame(reader: asyncio.StreamReader) -> str:
+    """
+    Read one MLLP frame and return the HL7 message it carries.
+
+    Raises:
+        asyncio.IncompleteReadError: If the connection closed mid-frame (or before one started).
+    """
+    data = await reader.readuntil(END_BLOCK)
+    start = data.find(START_BLOCK)
+    return data[start + 1 if start >= 0 else 0:-len(END_BLOCK)].decode("utf-8")
+
+
+def message_control_id(message: str) -> str:
+    """
+    Return MSH-10 (message control ID) of an HL7 message.
+    """
+    msh = message.split("\r", 1)[0]
+    fields = msh.split(msh[3:4] or "|")
+    if not msh.startswith("MSH") or len(fields) <= 9 or not fields[9]:
+        raise ValueError("Message has no MSH-10 control ID")
+    return fields[9]
+
+
+@dataclass(frozen=True)
+class Ack:
+    """
+    Parsed MSA segment of an acknowledgement.
+
+    Attributes:
+        code (str): MSA-1 acknowledgement code (AA, AE, AR, CA, CE, CR).
+        control_id (str): MSA-2, the control ID of the acknowledged message.
+        text (str): MSA-3 text message, if any.
+    """
+    code: str
+    control_id: str
+    text: str = ""
+
+    @property
+    def accepted(self) -> bool:
+        return self.code in ACCEPT_CODES
+
+
+def parse_ack(message: str) -> Ack:
+    """
+    Parse the MSA segment of an ACK message.
+
+    Raises:
+        ValueError: If the message has no MSA segment.
+    """
+    separator = message[3:4] or "|"
+    for segment in message.split("\r"):
+        if segment.startswith("MSA"):
+            fields = segment.split(separator)
+            fields += [""] * (4 - len(fields))
+            return Ack(code=fields[1], control_id=fields[2], text=fields[3])
+    raise ValueError("ACK has no MSA segment")
+
+
+def build_ack(message: str, code: str = "AA", text: str = "") -> str:
+    """
+    Build the ACK for a received message (used by the local stand-in receiver and tests).
+    """
+    msh = message.split("\r", 1)[0].split("|")
+    msh += [""] * (12 - len(msh))
+    control_id = msh[9]
+    header = "|".join(["MSH", msh[1], msh[4], msh[5], msh[2], msh[3], msh[6], "", "ACK", f"ACK{control_id}", msh[10], msh[11]])
+    return f"{header}\rMSA|{code}|{control_id}|{text}\r"
+
+
+# ========================
+# Connection
+# ========================
+
+class MllpConnection:
+    """
+    One persistent, pipelined MLLP connection.
+
+    Args:
+        host (str): Receiver host.
+        port (int): Receiver port.
+        max_in_flight (int): Messages that may await their ACK at once.
+        timeout (float): Seconds to wait for each ACK.
+    """
+
+    def __init__(self, host: str, port: int, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        async with self._connect_lock:
+            if self.is_open:
+                return
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            self._reader_task = asyncio.create_task(self._read_acks())
+            logger.debug(f"MLLP connection opened to {self.host}:{self.port}")
+
+    async def _read_acks(self) -> None:
+        """
+        Resolve pending sends as their ACKs arrive; fail them all if the connection drops.
+        """
+        error: BaseException = ConnectionError(f"MLLP connection to {self.host}:{self.port} closed")
+        try:
+            while True:
+                ack_message = await read_frame(self._reader)
+                try:
+                    ack = parse_ack(ack_message)
+                except ValueError:
+                    logger.warning(f"Ignoring MLLP reply without MSA from {self.host}:{self.port}")
+                    continue
+                future = self._pending.pop(ack.control_id, None)
+                if future is None:
+                    logger.warning(f"Unexpected ACK for control ID {ack.control_id} from {self.host}:{self.port}")
+                elif not future.done():
+                    future.set_result(ack)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            error = ConnectionError(f"MLLP connection to {self.host}:{self.port} lost: {e}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._fail_pending(error)
+            if self._writer is not None:
+                self._writer.close()
+
+    def _fail_pending(self, error: BaseException) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def send(self, message: str) -> Ack:
+        """
+        Send one message and wait for its ACK (other sends may be in flight meanwhile).
+
+        Returns:
+            Ack: The receiver's acknowledgement (accepted or not).
+
+        Raises:
+            ConnectionError / OSError: If the connection failed.
+            asyncio.TimeoutError: If no ACK arrived within `timeout`.
+        """
+        control_id = message_control_id(message)
+        async with self._slots:
+            await self.connect()
+            if control_id in self._pending:
+                raise MllpError(f"Control ID {control_id} is already in flight")
+
+            future = asyncio.get_running_loop().create_future()
+            self._pending[control_id] = future
+            try:
+                async with self._write_lock:
+                    self._writer.write(frame(message))
+                    await self._writer.drain()
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except BaseException:
+                self._pending.pop(control_id, None)
+                raise
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+
+
+class MllpConnectionPool:
+    """
+    Persistent connections to one destination; each send uses the least-loaded one.
+
+    Args:
+        host (str): Receiver host.
+        port (int): Receiver port.
+        size (int): Number of connections.
+        max_in_flight (int): Unacknowledged messages allowed per connection.
+        timeout (float): Seconds to wait for each ACK.
+    """
+
+    def __init__(self, host: str, port: int, size: int = DEFAULT_POOL_SIZE,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, timeout: float = DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.connections = [
+            MllpConnection(host, port, max_in_flight=max_in_flight, timeout=timeout)
+            for _ in range(max(1, size))
+        ]
+        self._round_robin = itertools.cycle(range(len(self.connections)))
+
+    @property
+    def capacity(self) -> int:
+        """
+        Messages the pool can have in flight at once (connections × per-connection limit).
+        """
+        return sum(connection.max_in_flight for connection in self.connections)
+
+    def _pick(self) -> MllpConnection:
+        start = next(self._round_robin)
+        ordered = self.connections[start:] + self.connections[:start]
+        return min(ordered, key=lambda connection: connection.in_flight)
+
+    async def send(self, message: str) -> Ack:
+        """
+        Send a message on the least-loaded connection (waits when all are full).
+        """
+        return await self._pick().send(message)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self.connections))
+
+    async def __aenter__(self) -> "MllpConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+# ========================
+# Disk Spool
+# ========================
+
+class DiskSpool:
+    """
+    Directory of undelivered messages, one file per message, written atomically.
+
+    Files are named "<epoch ns>-<control id>.hl7" so `pending()` returns them in spool order.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def put(self, message: str) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        safe_id = "".join(c if c.isalnum() else "_" for c in message_control_id(message))
+        path = self.root / f"{time.time_ns()}-{safe_id}.hl7"
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as tmp:
+                tmp.write(message)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return path
+
+    def pending(self) -> list[Path]:
+        if not self.root.is_dir():
+            return []
+        return sorted(self.root.glob("*.hl7"))
+
+    @staticmethod
+    def read(path: Path) -> str:
+        return path.read_bytes().decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.pending())
+
+
+# ========================
+# Sender
+# ========================
+
+@dataclass
+class DeliveryResult:
+    """
+    Outcome of one message.
+
+    Attributes:
+        control_id (str): MSH-10 of the message.
+        ack (Ack, optional): The receiver's ACK, if one arrived.
+        spooled (Path, optional): Spool file, when delivery failed and the message was spooled.
+        error (str): Failure description ("" on success).
+    """
+    control_id: str
+    ack: Optional[Ack] = None
+    spooled: Optional[Path] = None
+    error: str = ""
+
+    @property
+    def delivered(self) -> bool:
+        return self.ack is not None and self.ack.accepted
+
+
+class MllpSender:
+    """
+    Pool + retry + spool.
+
+    Args:
+        pool (MllpConnectionPool): Destination pool.
+        spool (DiskSpool, optional): Where undeliverable messages go; without one they are dropped (logged).
+        retries (int): Extra attempts after a transport failure or ACK timeout.
+        backoff (float): Delay before the first retry, doubled each time.
+    """
+
+    def __init__(self, pool: MllpConnectionPool, spool: Optional[DiskSpool] = None,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF):
+        self.pool = pool
+        self.spool = spool
+        self.retries = max(0, retries)
+        self.backoff = backoff
+
+    async def _send_with_retry(self, message: str) -> Ack:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.pool.send(message)
+            except (ConnectionError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if attempt == self.retries:
+                    raise MllpError(f"Delivery failed after {attempt + 1} attempts: {e or e.__class__.__name__}") from e
+                logger.warning(f"MLLP send failed ({e or e.__class__.__name__}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def deliver(self, message: str, spool_on_failure: bool = True) -> DeliveryResult:
+        """
+        Send one message, retrying transport failures and spooling it if they persist.
+
+        Returns:
+            DeliveryResult: ACK, spool location or error.
+        """
+        control_id = message_control_id(message)
+        try:
+            ack = await self._send_with_retry(message)
+        except MllpError as e:
+            result = DeliveryResult(control_id, error=str(e))
+            if spool_on_failure and self.spool is not None:
+                result.spooled = self.spool.put(message)
+                logger.error(f"HL7 message {control_id} spooled to {result.spooled.name}: {e}")
+            else:
+                logger.error(f"HL7 message {control_id} not delivered: {e}")
+            return result
+
+        if not ack.accepted:
+            logger.error(f"HL7 message {control_id} rejected ({ack.code}): {ack.text}")
+            return DeliveryResult(control_id, ack=ack, error=str(MllpNack(ack)))
+        return DeliveryResult(control_id, ack=ack)
+
+    async def deliver_many(self, messages: Iterable[str], concurrency: Optional[int] = None) -> list[DeliveryResult]:
+        """
+        Deliver messages with a fixed number of workers (at most one send in flight each).
+
+        Workers pull from `messages` as they free up, so a generator is consumed
+        lazily and only `concurrency` messages and tasks exist at any time.
+
+        Args:
+            messages (Iterable[str]): Messages to send.
+            concurrency (int, optional): Worker count; defaults to the pool's capacity.
+
+        Returns:
+            list[DeliveryResult]: One result per message, in input order.
+        """
+        source = enumerate(messages)
+        results: dict[int, DeliveryResult] = {}
+
+        async def worker() -> None:
+            for index, message in source:
+                results[index] = await self.deliver(message)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency or self.pool.capacity))))
+        return [results[index] for index in range(len(results))]
+
+    async def drain_spool(self) -> list[DeliveryResult]:
+        """
+        Re-send spooled messages in order; files are removed once the receiver answered.
+
+        Messages that still cannot be delivered stay in the spool.
+        """
+        if self.spool is None:
+            return []
+
+        results = []
+        for path in self.spool.pending():
+            result = await self.deliver(self.spool.read(path), spool_on_failure=False)
+            if result.ack is not None:
+                path.unlink(missing_ok=True)
+            results.append(result)
+        return results
+
+
+def sender_from_settings() -> MllpSender:
+    """
+    Build a sender for settings.HL7_MLLP_HOST / HL7_MLLP_PORT (pool size, in-flight limit,
+    timeout, retries and spool directory from the other HL7_MLLP_* settings).
+
+    Must be called inside a running event loop.
+    """
+    from django.conf import settings
+
+    host = getattr(settings, "HL7_MLLP_HOST", "")
+    if not host:
+        raise MllpError("HL7_MLLP_HOST is not configured")
+    pool = MllpConnectionPool(
+        host,
+        getattr(settings, "HL7_MLLP_PORT", 2575),
+        size=getattr(settings, "HL7_MLLP_POOL_SIZE", DEFAULT_POOL_SIZE),
+        max_in_flight=getattr(settings, "HL7_MLLP_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT),
+        timeout=getattr(settings, "HL7_MLLP_TIMEOUT", DEFAULT_TIMEOUT),
+    )
+    spool_dir = getattr(settings, "HL7_SPOOL_DIR", None) or Path(settings.MEDIA_ROOT) / "hl7_spool"
+    return MllpSender(pool, DiskSpool(spool_dir), retries=getattr(settings, "HL7_MLLP_RETRIES", DEFAULT_RETRIES))
@@ -0,0 +1,427 @@
+# reports/hl7/oru_payload_builder.py
+
+"""
+HL7 v2.5.1 ORU^R01 Builder
+
+Turns carotid exams into ORU^R01 result messages for the interface engine
+(Mirth → EMR), one message per exam or FHS/BHS-wrapped batch files for many
+exams at once.
+
+Performance notes:
+  - The segment → OBX mapping is compiled once per (exam type, site, template
+    version): each OBX line's constant text (value type, observation identifier,
+    units, result status placeholder) is pre-formatted, so building a message only
+    streams the exam's values between precomputed fragments and joins one list.
+  - Escaping uses a single precompiled `str.translate` table.
+  - Batch export and MLLP delivery (reports/hl7/mllp.py) load segments and
+    conclusions for a whole chunk of exams in two queries and emit messages as
+    they are produced.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from django.conf import settings
+from django.utils import timezone
+
+from report_template.registry.template_registry import get_template
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.models import Exam
+from reports.services.exam_snapshot import ExamSnapshot, load_exam_snapshots
+from reports.services.preliminary_reports import resolve_conclusion
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+HL7_VERSION = "2.5.1"
+SEGMENT_TERMINATOR = "\r"
+ENCODING_CHARACTERS = "^~\\&"
+
+# Default number of exams loaded per batch round trip
+DEFAULT_BATCH_CHUNK_SIZE = 500
+
+# HL7 escape sequences for the delimiter characters (escape character first)
+_ESCAPE_TABLE = str.maketrans({
+    "\\": "\\E\\",
+    "|": "\\F\\",
+    "^": "\\S\\",
+    "&": "\\T\\",
+    "~": "\\R\\",
+    "\r": "\\X0D\\",
+    "\n": "\\X0A\\",
+})
+
+_SEX_CODES = {"male": "M", "female": "F", "nonbinary": "N", "other": "O", "unknown": "U"}
+
+# Fields reported per segment: (field, value type, label, where to read the value)
+# Value sources are tried in order: ("column", attr), ("calculated", key), ("additional", key)
+_FIELD_SOURCES = {
+    "psv": ("NM", "PSV", (("column", "psv"),)),
+    "edv": ("NM", "EDV", (("column", "edv"),)),
+    "ica_cca_ratio": ("NM", "ICA/CCA Ratio", (("calculated", "ica_cca_ratio"), ("column", "ica_cca_ratio"))),
+    "artery_diameter": ("NM", "Diameter", (("additional", "artery_diameter"),)),
+    "ap_tr": ("NM", "AP/TR", (("additional", "ap_tr"),)),
+    "longitudinal": ("NM", "Longitudinal", (("additional", "longitudinal"),)),
+}
+_STENOSIS_FIELD = ("ST", "Stenosis", (("calculated", "stenosis_category"), ("column", "stenosis_category")))
+_VERTEBRAL_FIELD = ("ST", "Flow Interpretation", (("calculated", "vertebral_comment"),))
+
+
+def escape(value: Any) -> str:
+    """
+    Escape HL7 delimiter characters in a field value.
+    """
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+def _format_number(value) -> str:
+    """
+    NM value in fixed-point notation (6 significant digits, no trailing zeros):
+    1000.0 → "1000", 1.5e-07 → "0.00000015". Never exponent notation.
+    """
+    if isinstance(value, float):
+        text = format(Decimal(f"{value:.6g}"), "f")
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    return escape(value)
+
+
+def _format_date(value: Optional[date]) -> str:
+    return value.strftime("%Y%m%d") if value else ""
+
+
+def _format_timestamp(value: datetime) -> str:
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.strftime("%Y%m%d%H%M%S")
+
+
+def _person_name(name: str, separator: str = "^") -> str:
+    """
+    XPN for a free-text name: "Doe, John" or "John Doe" → "Doe^John".
+
+    Pass separator="&" for a name nested as subcomponents (e.g., in OBR-32).
+    """
+    name = (name or "").strip()
+    if "," in name:
+        family, given = (part.strip() for part in name.split(",", 1))
+    elif " " in name:
+        given, family = name.rsplit(" ", 1)
+    else:
+        family, given = name, ""
+    return f"{escape(family)}{separator}{escape(given)}" if given else escape(family)
+
+
+def _interpreter(name: str) -> str:
+    """
+    OBR-32 Principal Result Interpreter (NDL) for a free-text name: the name is
+    component 1 (CNN: ID number&family name&given name), without an ID number.
+    """
+    return f"&{_person_name(name, '&')}" if (name or "").strip() else ""
+
+
+@dataclass(frozen=True)
+class ObxSpec:
+    """
+    One precompiled OBX line.
+
+    Attributes:
+        segment_id (str): Template segment (e.g., "ica_prox_right").
+        sources (tuple): Ordered (kind, key) pairs to read the value from.
+        numeric (bool): Format as NM (True) or ST.
+        head (str): Pre-formatted "|<type>|<identifier>||" between Set ID and value.
+        tail (str): Pre-formatted "|<units>|||||" between value and result status.
+    """
+    segment_id: str
+    sources: tuple
+    numeric: bool
+    head: str
+    tail: str
+
+
+@dataclass(frozen=True)
+class CompiledOruTemplate:
+    """
+    OBX mapping for one template version.
+
+    Attributes:
+        exam_type (str): Exam type (e.g., "carotid").
+        version (str): Template version the mapping was compiled from.
+        title (str): Report title used in OBR-4.
+        specs (tuple[ObxSpec]): OBX lines in template order.
+    """
+    exam_type: str
+    version: str
+    title: str
+    specs: tuple
+
+
+def compile_oru_template(template, exam_type: str) -> CompiledOruTemplate:
+    """
+    Compile a template into OBX line specs.
+
+    Args:
+        template (Mapping): Exam template (see get_template()).
+        exam_type (str): Exam type.
+
+    Returns:
+        CompiledOruTemplate: Immutable mapping.
+    """
+    units_map = template.get("units", {})
+    specs: list[ObxSpec] = []
+
+    for seg in template["segments"]:
+        segment_id = seg["id"]
+        label = seg.get("label", segment_id)
+        fields = []
+        for m in seg.get("measurements", []):
+            name = m if isinstance(m, str) else m.get("name")
+            if name in _FIELD_SOURCES:
+                unit = m.get("unit") if isinstance(m, dict) else None
+                fields.append((name, _FIELD_SOURCES[name], unit or units_map.get(name, "")))
+        if seg.get("supportsStenosis"):
+            fields.append(("stenosis_category", _STENOSIS_FIELD, ""))
+        if seg.get("vessel", "").lower() == "vertebral":
+            fields.append(("vertebral_comment", _VERTEBRAL_FIELD, ""))
+
+        for name, (value_type, field_label, sources), unit in fields:
+            identifier = f"{escape(segment_id)}.{escape(name)}^{escape(label)} {escape(field_label)}^L"
+            specs.append(ObxSpec(
+                segment_id=segment_id,
+                sources=sources,
+                numeric=value_type == "NM",
+                head=f"|{value_type}|{identifier}||",
+                tail=f"|{escape(unit)}|||||",
+            ))
+
+    return CompiledOruTemplate(
+        exam_type=exam_type,
+        version=str(template.get("version", "")),
+        title=template.get("title", exam_type.title()),
+        specs=tuple(specs),
+    )
+
+
+@lru_cache(maxsize=16)
+def _compiled(exam_type: str, site: str, version: str) -> CompiledOruTemplate:
+    return compile_oru_template(get_template(exam_type, site), exam_type)
+
+
+def get_oru_template(exam_type: str = "carotid", site: str = DEFAULT_TEMPLATE_SITE) -> CompiledOruTemplate:
+    """
+    Return the compiled OBX mapping for the current template version (compiled once per version).
+    """
+    version = str(get_template(exam_type, site).get("version", ""))
+    return _compiled(exam_type, site, version)
+
+
+def _read_value(spec: ObxSpec, measurement):
+    for kind, key in spec.sources:
+        if kind == "column":
+            value = getattr(measurement, key)
+        elif kind == "calculated":
+            value = measurement.calculated_fields.get(key)
+        else:
+            value = measurement.additional_data.get(key)
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _header_fields() -> dict:
+    return {
+        "sending_application": escape(getattr(settings, "HL7_SENDING_APPLICATION", "LUMEN")),
+        "sending_facility": escape(getattr(settings, "HL7_SENDING_FACILITY", "")),
+        "receiving_application": escape(getattr(settings, "HL7_RECEIVING_APPLICATION", "")),
+        "receiving_facility": escape(getattr(settings, "HL7_RECEIVING_FACILITY", "")),
+        "processing_id": escape(getattr(settings, "HL7_PROCESSING_ID", "P")),
+    }
+
+
+def _write_message(
+    out: list[str],
+    exam: Exam,
+    snapshot: ExamSnapshot,
+    conclusion: str,
+    compiled: CompiledOruTemplate,
+    header: dict,
+    timestamp: str,
+    control_id: Optional[str] = None,
+) -> None:
+    """
+    Append the segments of one ORU^R01 message to `out` (fragments, not yet joined).
+    """
+    status = "F" if exam.status == "finalized" else "P"
+    accession = escape(exam.accession or exam.id)
+    control_id = escape(control_id) if control_id else f"{exam.id}{timestamp}"
+
+    out.append(
+        f"MSH|{ENCODING_CHARACTERS}|{header['sending_application']}|{header['sending_facility']}|"
+        f"{header['receiving_application']}|{header['receiving_facility']}|{timestamp}||ORU^R01^ORU_R01|"
+        f"{control_id}|{header['processing_id']}|{HL7_VERSION}{SEGMENT_TERMINATOR}"
+    )
+    out.append(
+        f"PID|1||{escape(exam.mrn)}^^^MRN||{_person_name(exam.patient_name)}||{_format_date(exam.dob)}|"
+        f"{_SEX_CODES.get(exam.gender, 'U')}{SEGMENT_TERMINATOR}"
+    )
+    out.append(
+        f"OBR|1|{accession}|{accession}|{escape(exam.cpt_code)}^{escape(compiled.title)}^CPT|||"
+        f"{_format_date(exam.exam_date)}|||||||||||||||{timestamp}|||{status}|||||||"
+        f"{_interpreter(exam.reading_physician)}{SEGMENT_TERMINATOR}"
+    )
+
+    # Stream measurement values into the precompiled OBX lines
+    measurements = {segment.name: segment.measurement for segment in snapshot.segments}
+    set_id = 0
+    for spec in compiled.specs:
+        measurement = measurements.get(spec.segment_id)
+        if measurement is None:
+            continue
+        value = _read_value(spec, measurement)
+        if value is None:
+            continue
+        set_id += 1
+        formatted = _format_number(value) if spec.numeric and isinstance(value, (int, float)) else escape(value)
+        out.append(f"OBX|{set_id}{spec.head}{formatted}{spec.tail}{status}{SEGMENT_TERMINATOR}")
+
+    for line in conclusion.splitlines():
+        if line.strip():
+            set_id += 1
+            out.append(f"OBX|{set_id}|TX|IMPRESSION^Impression^L||{escape(line)}||||||{status}{SEGMENT_TERMINATOR}")
+
+
+def build_oru_message(
+    exam: Exam,
+    snapshot: Optional[ExamSnapshot] = None,
+    conclusion: Optional[str] = None,
+    now: Optional[datetime] = None,
+    control_id: Optional[str] = None,
+) -> str:
+    """
+    Build the ORU^R01 message for one exam.
+
+    Args:
+        exam (Exam): Exam to report (load with select_related("preliminary")).
+        snapshot (ExamSnapshot, optional): Pre-loaded segment data.
+        conclusion (str, optional): Impression text; defaults to the materialized conclusion.
+        now (datetime, optional): Message timestamp (defaults to the current time).
+        control_id (str, optional): MSH-10; defaults to "<exam id><timestamp>". Pass a
+            unique ID when the same exam may be sent more than once per second.
+
+    Returns:
+        str: HL7 message with "\\r" segment terminators.
+    """
+    if snapshot is None:
+        snapshot = load_exam_snapshots([exam.id])[exam.id]
+    if conclusion is None:
+        conclusion = resolve_conclusion(exam, snapshot)
+
+    out: list[str] = []
+    _write_message(
+        out, exam, snapshot, conclusion,
+        get_oru_template(exam.exam_type),
+        _header_fields(),
+        _format_timestamp(now or timezone.now()),
+        control_id,
+    )
+    return "".join(out)
+
+
+def iter_oru_messages(
+    exams: Iterable[Exam],
+    now: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yield one ORU^R01 message per exam, loading segments a chunk of exams at a time.
+
+    Args:
+        exams (Iterable[Exam]): Exams to export; pass a queryset with
+            select_related("preliminary") so conclusions need no extra queries.
+        now (datetime, optional): Message timestamp.
+        chunk_size (int): Exams whose segments are loaded per query.
+
+    Yields:
+        str: Complete messages.
+    """
+    header = _header_fields()
+    timestamp = _format_timestamp(now or timezone.now())
+    compiled_by_type: dict[str, CompiledOruTemplate] = {}
+    chunk: list[Exam] = []
+
+    def flush() -> Iterator[str]:
+        snapshots = load_exam_snapshots(exam.id for exam in chunk)
+        for exam in chunk:
+            compiled = compiled_by_type.get(exam.exam_type)
+            if compiled is None:
+                compiled = compiled_by_type[exam.exam_type] = get_oru_template(exam.exam_type)
+            snapshot = snapshots[exam.id]
+            out: list[str] = []
+            _write_message(out, exam, snapshot, resolve_conclusion(exam, snapshot), compiled, header, timestamp)
+            yield "".join(out)
+        chunk.clear()
+
+    for exam in exams:
+        chunk.append(exam)
+        if len(chunk) >= chunk_size:
+            yield from flush()
+    if chunk:
+        yield from flush()
+
+
+def iter_oru_batch(
+    exams: Iterable[Exam],
+    now: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yield an FHS/BHS-wrapped HL7 batch file in pieces (header, one message at a time, trailer).
+
+    Args:
+        exams (Iterable[Exam]): Exams to export (see iter_oru_messages()).
+        now (datetime, optional): Batch/message timestamp.
+        chunk_size (int): Exams whose segments are loaded per query.
+
+    Yields:
+        str: Consecutive pieces of the batch file.
+    """
+    header = _header_fields()
+    now = now or timezone.now()
+    timestamp = _format_timestamp(now)
+
+    yield (
+        f"FHS|{ENCODING_CHARACTERS}|{header['sending_application']}|{header['sending_facility']}|"
+        f"{header['receiving_application']}|{header['receiving_facility']}|{timestamp}||||F{timestamp}"
+        f"{SEGMENT_TERMINATOR}"
+        f"BHS|{ENCODING_CHARACTERS}|{header['sending_application']}|{header['sending_facility']}|"
+        f"{header['receiving_application']}|{header['receiving_facility']}|{timestamp}||||B{timestamp}"
+        f"{SEGMENT_TERMINATOR}"
+    )
+
+    count = 0
+    for message in iter_oru_messages(exams, now=now, chunk_size=chunk_size):
+        count += 1
+        yield message
+
+    yield f"BTS|{count}{SEGMENT_TERMINATOR}FTS|1{SEGMENT_TERMINATOR}"
+    logger.info(f"HL7 batch built with {count} ORU messages")
+
+
+def build_oru_batch(exams: Iterable[Exam], now: Optional[datetime] = None) -> str:
+    """
+    Build a complete FHS/BHS batch file in memory (see iter_oru_batch()).
+    """
+    return "".join(iter_oru_batch(exams, now=now))
+
+
+def write_oru_batch(exams: Iterable[Exam], stream: TextIO, now: Optional[datetime] = None,
+                    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> None:
+    """
+    Write a batch file to an open text stream without holding it in memory.
+    """
+    for piece in iter_oru_batch(exams, now=now, chunk_size=chunk_size):
+        stream.write(piece)
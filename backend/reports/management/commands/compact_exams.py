@@ -0,0 +1,56 @@
+# reports/management/commands/compact_exams.py
+
+"""
+Move exams between row storage and compact measurement storage.
+
+Usage:
+    python manage.py compact_exams 12 13 14                 # specific exams
+    python manage.py compact_exams --status finalized       # every finalized exam still in rows
+    python manage.py compact_exams 12 --unpack              # back to Segment + Measurement rows
+
+Each exam is converted in its own transaction; exams that cannot be converted
+(e.g. several measurements on one segment) are reported and skipped.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import Exam
+from reports.services.compact_store import COMPACT, ROWS, CompactStoreError, pack_exam, unpack_exam
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Pack exams into compact measurement blocks (or unpack them back into rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="*", type=int, help="Exam IDs to convert.")
+        parser.add_argument("--status", help="Convert every exam with this status (e.g. finalized).")
+        parser.add_argument("--unpack", action="store_true", help="Convert compact exams back to rows.")
+
+    def handle(self, *args, **options):
+        unpack = options["unpack"]
+        exams = Exam.objects.filter(storage_mode=COMPACT if unpack else ROWS).order_by("id")
+        if options["exam_ids"]:
+            exams = exams.filter(id__in=options["exam_ids"])
+        elif options["status"]:
+            exams = exams.filter(status=options["status"])
+        else:
+            raise CommandError("Pass exam IDs or --status.")
+
+        converted = skipped = 0
+        for exam in exams.iterator():
+            try:
+                if unpack:
+                    unpack_exam(exam)
+                else:
+                    pack_exam(exam)
+                converted += 1
+            except CompactStoreError as e:
+                skipped += 1
+                self.stderr.write(str(e))
+
+        message = f"{'Unpacked' if unpack else 'Packed'} {converted} exams; {skipped} skipped."
+        self.stdout.write(self.style.WARNING(message) if skipped else self.style.SUCCESS(message))
@@ -0,0 +1,63 @@
+# reports/management/commands/export_oru_batch.py
+
+"""
+Export finalized exams as one FHS/BHS-wrapped HL7 ORU^R01 batch file.
+
+Usage:
+    python manage.py export_oru_batch --output results.hl7
+    python manage.py export_oru_batch --since 2025-01-01 --output -     # write to stdout
+    python manage.py export_oru_batch --status tech_signed --exam-type carotid
+
+Exams are streamed in chunks: each chunk's segments are loaded with one query
+and its messages are written before the next chunk is read.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reports.hl7.oru_payload_builder import DEFAULT_BATCH_CHUNK_SIZE, write_oru_batch
+from reports.models import Exam
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Write an HL7 ORU^R01 batch file (FHS/BHS/BTS/FTS) for many exams in one pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default="-", help="Output file path ('-' for stdout).")
+        parser.add_argument("--exam-type", default="carotid", help="Exam type to export.")
+        parser.add_argument("--status", default="finalized", help="Exam status to export.")
+        parser.add_argument("--since", help="Only exams with exam_date on or after this date (YYYY-MM-DD).")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_BATCH_CHUNK_SIZE,
+            help="Exams loaded per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        exams = (
+            Exam.objects.select_related("preliminary")
+            .filter(exam_type=options["exam_type"], status=options["status"])
+            .order_by("id")
+        )
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid --since date: {options['since']}")
+            exams = exams.filter(exam_date__gte=since)
+
+        chunk_size = max(1, options["chunk_size"])
+        exams = exams.iterator(chunk_size=chunk_size)
+
+        if options["output"] == "-":
+            self.stdout.ending = ""
+            write_oru_batch(exams, self.stdout, chunk_size=chunk_size)
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as stream:
+            write_oru_batch(exams, stream, chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"HL7 batch written to {options['output']}"))
@@ -0,0 +1,54 @@
+# reports/management/commands/generate_synthetic_exams.py
+
+"""
+Seed the database with deterministic synthetic exams (load tests, benchmarks, demos).
+
+Usage:
+    python manage.py generate_synthetic_exams 10000
+    python manage.py generate_synthetic_exams 500 --seed 7 --storage compact
+    python manage.py generate_synthetic_exams 100 --start 10000   # extend a previous run
+
+The same --seed always produces the same exams (see reports/services/synthetic_exams.py).
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.services.bulk_import import DEFAULT_CHUNK_SIZE
+from reports.services.synthetic_exams import create_synthetic_exams
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Insert deterministic synthetic exams generated from a template."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of exams to create.")
+        parser.add_argument("--seed", type=int, default=0, help="Generator seed.")
+        parser.add_argument("--start", type=int, default=0, help="Index of the first exam.")
+        parser.add_argument("--exam-type", default="carotid", help="Template exam type.")
+        parser.add_argument("--site", default=DEFAULT_TEMPLATE_SITE, help="Template site.")
+        parser.add_argument("--storage", choices=["rows", "compact"], default="rows", help="Measurement storage mode.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Exams inserted per transaction.")
+
+    def handle(self, *args, **options):
+        if options["count"] < 1:
+            raise CommandError("count must be positive.")
+        try:
+            summary = create_synthetic_exams(
+                options["count"],
+                seed=options["seed"],
+                exam_type=options["exam_type"],
+                site=options["site"],
+                start=options["start"],
+                storage=options["storage"],
+                chunk_size=options["chunk_size"],
+            )
+        except FileNotFoundError as e:
+            raise CommandError(str(e)) from e
+
+        message = f"Created {summary.created} synthetic exams; {summary.failed} rejected."
+        self.stdout.write(self.style.WARNING(message) if summary.failed else self.style.SUCCESS(message))
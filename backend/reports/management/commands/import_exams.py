@@ -0,0 +1,85 @@
+# reports/management/commands/import_exams.py
+
+"""
+Import exams with their measurements from NDJSON or CSV files.
+
+Usage:
+    python manage.py import_exams archive.ndjson
+    python manage.py import_exams archive.csv --chunk-size 1000 --errors rejected.ndjson
+    cat archive.ndjson | python manage.py import_exams - --format ndjson
+    python manage.py import_exams archive.ndjson --storage compact
+
+Files are streamed and inserted in chunks (one bulk_create per table per chunk).
+Rejected rows are written as NDJSON ({"line": n, "errors": {...}}) to --errors
+or stderr; the import continues past them.
+"""
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.services.bulk_import import (
+    DEFAULT_CHUNK_SIZE,
+    IMPORT_SOURCE,
+    import_exams,
+    iter_import_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+
+class Command(BaseCommand):
+    help = "Stream exams (with measurements) from NDJSON/CSV into the database in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file ('-' for stdin).")
+        parser.add_argument("--format", choices=["ndjson", "csv"], help="Input format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows inserted per transaction.")
+        parser.add_argument("--created-by", default=IMPORT_SOURCE, help="created_by for rows that do not set it.")
+        parser.add_argument("--errors", help="Write rejected rows (NDJSON) to this file instead of stderr.")
+        parser.add_argument("--storage", choices=["rows", "compact"], default="rows",
+                            help="Write segment rows or one compact measurement block per exam.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or _EXTENSION_FORMATS.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise CommandError("Cannot infer the format from the file name; pass --format ndjson|csv.")
+
+        error_stream = open(options["errors"], "w", encoding="utf-8") if options["errors"] else self.stderr
+
+        def report(error):
+            error_stream.write(json.dumps(error.as_dict()) + "\n")
+
+        try:
+            if path == "-":
+                summary = self._import(sys.stdin, fmt, options, report)
+            else:
+                try:
+                    source = open(path, "r", encoding="utf-8-sig", newline="")
+                except OSError as e:
+                    raise CommandError(f"Cannot open {path}: {e}") from e
+                with source:
+                    summary = self._import(source, fmt, options, report)
+        finally:
+            if options["errors"]:
+                error_stream.close()
+
+        message = f"Imported {summary.created} exams; {summary.failed} rows rejected."
+        self.stdout.write(self.style.WARNING(message) if summary.failed else self.style.SUCCESS(message))
+
+    @staticmethod
+    def _import(stream, fmt, options, report):
+        return import_exams(
+            iter_import_rows(stream, fmt),
+            created_by=options["created_by"],
+            chunk_size=options["chunk_size"],
+            on_error=report,
+            max_errors=0,
+            storage=options["storage"],
+        )
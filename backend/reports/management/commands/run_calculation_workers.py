@@ -0,0 +1,139 @@
+# reports/management/commands/run_calculation_workers.py
+
+"""
+Run a pool of local worker processes that drain the calculation job queue.
+
+Usage:
+    python manage.py run_calculation_workers              # settings.CALCULATION_WORKERS processes
+    python manage.py run_calculation_workers --workers 4
+    python manage.py run_calculation_workers --burst      # drain the queue in-process, then exit
+
+Workers are started with the "spawn" method so each gets a fresh interpreter
+and its own database connection. The supervisor restarts workers that exit
+unexpectedly and periodically re-queues jobs abandoned by crashed workers.
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+def worker_loop(index: int, poll_interval: float) -> None:
+    """
+    Entry point of a worker process: claim and run jobs until terminated.
+
+    Django (and everything touching models) is imported inside the function,
+    because spawned children start from a bare interpreter.
+    """
+    import django
+    django.setup()
+
+    from reports.services.calculation_jobs import default_worker_id, process_next_job
+
+    worker_id = default_worker_id(index)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor handles Ctrl+C
+    logger.info(f"Calculation worker {worker_id} started")
+
+    while True:
+        try:
+            job = process_next_job(worker_id)
+        except Exception:
+            logger.exception(f"Calculation worker {worker_id} failed to process a job")
+            job = None
+        if job is None:
+            time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Run local worker processes that execute queued exam calculation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "CALCULATION_WORKERS", 2),
+            help="Number of worker processes (default: settings.CALCULATION_WORKERS).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=getattr(settings, "CALCULATION_POLL_INTERVAL", 1.0),
+            help="Seconds an idle worker waits before polling the queue again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Process every queued job in this process, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        from reports.services.calculation_jobs import (
+            default_worker_id,
+            process_next_job,
+            requeue_stale_jobs,
+        )
+
+        requeue_stale_jobs()
+
+        if options["burst"]:
+            worker_id = default_worker_id()
+            processed = 0
+            while process_next_job(worker_id) is not None:
+                processed += 1
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} calculation job(s)."))
+            return
+
+        workers = max(1, options["workers"])
+        poll_interval = options["poll_interval"]
+        context = multiprocessing.get_context("spawn")
+
+        def start(index: int):
+            process = context.Process(
+                target=worker_loop,
+                args=(index, poll_interval),
+                name=f"calculation-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            return process
+
+        pool = [start(i) for i in range(workers)]
+        self.stdout.write(f"Started {workers} calculation worker(s). Press Ctrl+C to stop.")
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        stale_check_every = max(poll_interval, getattr(settings, "CALCULATION_JOB_TIMEOUT", 300) / 2)
+        last_stale_check = time.monotonic()
+
+        while not stopping:
+            time.sleep(poll_interval)
+
+            # Step 1: Replace workers that died (their jobs are recovered below)
+            for i, process in enumerate(pool):
+                if not process.is_alive():
+                    logger.warning(f"Calculation worker {i} exited with code {process.exitcode}; restarting")
+                    pool[i] = start(i)
+
+            # Step 2: Re-queue jobs abandoned by dead workers
+            if time.monotonic() - last_stale_check >= stale_check_every:
+                requeue_stale_jobs()
+                last_stale_check = time.monotonic()
+
+        for process in pool:
+            process.terminate()
+        for process in pool:
+            process.join()
+        self.stdout.write("Calculation workers stopped.")
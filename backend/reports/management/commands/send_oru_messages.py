@@ -0,0 +1,119 @@
+# reports/management/commands/send_oru_messages.py
+
+"""
+Deliver ORU^R01 messages to the interface engine over pooled MLLP connections.
+
+Usage:
+    python manage.py send_oru_messages 12 13 14             # specific exams
+    python manage.py send_oru_messages --since 2025-01-01   # finalized exams from a date
+    python manage.py send_oru_messages --drain-spool        # re-send spooled messages only
+
+Only finalized exams of --exam-type (carotid by default) are sent; other exam IDs
+are skipped with a warning. Exams are streamed in chunks of --chunk-size: each
+chunk's messages are built, then sent over settings.HL7_MLLP_POOL_SIZE persistent
+connections with at most the pool's in-flight capacity outstanding, before the
+next chunk is read. Transport failures are retried; messages that still cannot
+be delivered are written to settings.HL7_SPOOL_DIR and re-sent by the next run.
+"""
+
+import asyncio
+import itertools
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from reports.hl7.mllp import MllpError, sender_from_settings
+from reports.hl7.oru_payload_builder import DEFAULT_BATCH_CHUNK_SIZE, iter_oru_messages
+from reports.models import Exam
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send HL7 ORU^R01 messages over MLLP (pooled, pipelined, with disk spool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="*", type=int, help="Exam IDs to send.")
+        parser.add_argument("--since", help="Send finalized exams with exam_date on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--exam-type", default="carotid", help="Exam type to send.")
+        parser.add_argument("--drain-spool", action="store_true", help="Only re-send spooled messages.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_BATCH_CHUNK_SIZE,
+            help="Exams built and sent per round.",
+        )
+
+    def handle(self, *args, **options):
+        exams = None
+        if not options["drain_spool"]:
+            exams = self._select_exams(options)
+
+        # One event loop for the whole run: the pool's connections stay open between
+        # chunks, and the ORM only runs while the loop is idle (never inside it).
+        loop = asyncio.new_event_loop()
+        try:
+            spooled, delivered, failed = self._run(loop, exams, max(1, options["chunk_size"]))
+        except MllpError as e:
+            raise CommandError(str(e)) from e
+        finally:
+            loop.close()
+
+        self.stdout.write(
+            f"Spool: {sum(r.delivered for r in spooled)}/{len(spooled)} re-sent. "
+            f"Messages: {delivered} delivered, {failed} not delivered."
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING("Undelivered messages were spooled or rejected; see the log."))
+
+    def _select_exams(self, options):
+        """
+        Finalized exams of the requested type, in ID order.
+        """
+        exams = Exam.objects.filter(status="finalized", exam_type=options["exam_type"])
+        if options["exam_ids"]:
+            exams = exams.filter(id__in=options["exam_ids"])
+            skipped = sorted(set(options["exam_ids"]) - set(exams.values_list("id", flat=True)))
+            if skipped:
+                logger.warning(f"Skipping exams that are not finalized {options['exam_type']} exams: {skipped}")
+                self.stdout.write(self.style.WARNING(
+                    f"Skipped {len(skipped)} exams that are not finalized {options['exam_type']} exams: {skipped}"
+                ))
+        elif options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid --since date: {options['since']}")
+            exams = exams.filter(exam_date__gte=since)
+        else:
+            raise CommandError("Pass exam IDs, --since or --drain-spool.")
+        return exams.select_related("preliminary").order_by("id")
+
+    @staticmethod
+    def _run(loop, exams, chunk_size: int):
+        """
+        Drain the spool, then build and send the exams' messages one chunk at a time.
+
+        Returns:
+            tuple: (spool results, delivered count, not-delivered count).
+        """
+        sender = loop.run_until_complete(_open_sender())
+        delivered = failed = 0
+        try:
+            spooled = loop.run_until_complete(sender.drain_spool())
+            if exams is not None:
+                messages = iter_oru_messages(exams.iterator(chunk_size=chunk_size), now=timezone.now(),
+                                             chunk_size=chunk_size)
+                while chunk := list(itertools.islice(messages, chunk_size)):
+                    results = loop.run_until_complete(sender.deliver_many(chunk))
+                    sent = sum(result.delivered for result in results)
+                    delivered += sent
+                    failed += len(results) - sent
+        finally:
+            loop.run_until_complete(sender.pool.close())
+        return spooled, delivered, failed
+
+
+async def _open_sender():
+    return sender_from_settings()
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:29
+
+from django.db import migrations, models
+
+
+def seed_placeholder_counter(apps, schema_editor):
+    """
+    Start placeholder numbering where the old Exam.objects.count() scheme left off.
+    """
+    Exam = apps.get_model("reports", "Exam")
+    SequenceCounter = apps.get_model("reports", "SequenceCounter")
+    SequenceCounter.objects.get_or_create(
+        name="placeholder_patient",
+        defaults={"value": Exam.objects.count()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0003_exam_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SequenceCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Counter identifier, e.g. 'placeholder_patient'.",
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "value",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Last value handed out by this counter.",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(seed_placeholder_counter, migrations.RunPython.noop),
+    ]
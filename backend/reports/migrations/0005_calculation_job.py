@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_sequence_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalculationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', help_text='Current queue state of the job.', max_length=16)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Completion percentage (0–100) reported by the worker.')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Summary written by the worker on success (e.g., segments saved).')),
+                ('error', models.TextField(blank=True, help_text='Error message of the last failed attempt.')),
+                ('worker', models.CharField(blank=True, help_text='Identifier of the worker that claimed the job.', max_length=128)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Number of times a worker has claimed this job.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('exam', models.ForeignKey(help_text='Exam whose calculator this job runs.', on_delete=django.db.models.deletion.CASCADE, related_name='calculation_jobs', to='reports.exam')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='calcjob_status_created_idx')],
+            },
+        ),
+    ]
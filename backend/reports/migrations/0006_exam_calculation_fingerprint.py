@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_calculation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='calculation_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the segment inputs, criteria and calculator version behind the stored calculated_fields. Blank when results may be stale.', max_length=64),
+        ),
+    ]
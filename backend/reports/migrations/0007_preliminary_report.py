@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_exam_calculation_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreliminaryReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('fingerprint', models.CharField(blank=True, help_text='Exam.calculation_fingerprint the text was generated from (blank if unknown).', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='preliminary', to='reports.exam')),
+            ],
+        ),
+    ]
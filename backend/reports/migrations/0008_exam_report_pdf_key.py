@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_preliminary_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='report_pdf_key',
+            field=models.CharField(blank=True, editable=False, help_text='Artifact-store key of the rendered report PDF, pinned once the exam is finalized so downloads skip rebuilding it. Cleared when measurements change.', max_length=64),
+        ),
+    ]
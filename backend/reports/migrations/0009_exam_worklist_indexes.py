@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_exam_report_pdf_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['-created_at', '-id'], name='exam_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='exam_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['exam_type', 'status', '-created_at', '-id'], name='exam_type_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['reading_physician', 'status', '-created_at', '-id'], name='exam_physician_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['exam_date'], name='exam_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['mrn'], name='exam_mrn_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['accession'], name='exam_accession_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:50
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def coalesce_measurements(measurements):
+    """
+    Merge measurements into the first one: each field takes the last non-empty
+    value in order, JSON fields are merged with later keys winning.
+
+    Returns:
+        tuple: (merged measurement, measurements to delete).
+    """
+    keep, *extra = measurements
+    for field in keep._meta.concrete_fields:
+        if field.primary_key or field.name == "segment":
+            continue
+        values = [getattr(m, field.attname) for m in measurements]
+        if isinstance(values[0], dict):
+            merged = {}
+            for value in values:
+                merged.update(value or {})
+            setattr(keep, field.attname, merged)
+            continue
+        for value in reversed(values):
+            if value not in (None, ""):
+                setattr(keep, field.attname, value)
+                break
+    return keep, extra
+
+
+def merge_duplicate_segments(apps, schema_editor):
+    """
+    Collapse segments sharing (exam, name) into the oldest one before the unique
+    constraint is added.
+
+    Readers use the first measurement of a segment, so the group's measurements are
+    coalesced into a single row on the kept segment (see coalesce_measurements());
+    the other measurements and the duplicate segments are deleted and the exam's
+    stored results are marked stale.
+    """
+    Segment = apps.get_model("reports", "Segment")
+    Measurement = apps.get_model("reports", "Measurement")
+    Exam = apps.get_model("reports", "Exam")
+
+    groups = (
+        Segment.objects.values("exam_id", "name")
+        .annotate(copies=Count("id"), keep_id=Min("id"))
+        .filter(copies__gt=1)
+    )
+
+    affected_exams = set()
+    for group in groups.iterator():
+        segment_ids = list(
+            Segment.objects.filter(exam_id=group["exam_id"], name=group["name"]).values_list("id", flat=True)
+        )
+        # Kept segment's measurements first (readers saw those), then the duplicates' by age
+        measurements = sorted(
+            Measurement.objects.filter(segment_id__in=segment_ids),
+            key=lambda m: (m.segment_id != group["keep_id"], m.id),
+        )
+        if measurements:
+            keep, extra = coalesce_measurements(measurements)
+            keep.segment_id = group["keep_id"]
+            Measurement.objects.filter(id__in=[m.id for m in extra]).delete()
+            keep.save()
+        Segment.objects.filter(id__in=segment_ids).exclude(id=group["keep_id"]).delete()
+        affected_exams.add(group["exam_id"])
+
+    if affected_exams:
+        Exam.objects.filter(id__in=affected_exams).update(calculation_fingerprint="", report_pdf_key="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0009_exam_worklist_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_segments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_merge_duplicate_segments'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='segment',
+            constraint=models.UniqueConstraint(fields=('exam', 'name'), name='segment_exam_name_uniq'),
+        ),
+        migrations.AlterField(
+            model_name='segment',
+            name='exam',
+            field=models.ForeignKey(db_index=False, help_text='Parent exam this segment belongs to.', on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='reports.exam'),
+        ),
+    ]
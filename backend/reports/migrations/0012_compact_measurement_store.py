@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_segment_exam_name_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text='SHA-256 of the canonical `segments` JSON (layouts are deduplicated on it).', max_length=64, unique=True)),
+                ('segments', models.JSONField(help_text='Ordered [name, artery, side, default additional_data] entries.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='storage_mode',
+            field=models.CharField(choices=[('rows', 'Segment + Measurement rows'), ('compact', 'Compact measurement block')], default='rows', help_text='Where measurements live: Segment/Measurement rows (editable default) or one compact MeasurementBlock (archived/imported exams).', max_length=8),
+        ),
+        migrations.CreateModel(
+            name='MeasurementBlock',
+            fields=[
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='measurement_block', serialize=False, to='reports.exam')),
+                ('numeric', models.BinaryField(help_text='Packed float64 columns (see NUMERIC_COLUMNS).')),
+                ('text', models.JSONField(blank=True, default=dict)),
+                ('extras', models.JSONField(blank=True, default=dict)),
+                ('calculated', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='blocks', to='reports.segmentlayout')),
+            ],
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:58
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Same rules as reports.calculators.derived_columns, frozen for this migration
+_GRADE_PATTERN = re.compile(r"^\s*[≥>]?\s*(\d+)\s*(?:%|[–-])")
+
+
+def _vertebral_flow(comment):
+    comment = (comment or "").lower()
+    if not comment:
+        return ""
+    if "subclavian steal" in comment:
+        return "steal"
+    if "pre-steal" in comment:
+        return "pre_steal"
+    return "normal"
+
+
+def backfill_derived_findings(apps, schema_editor):
+    """
+    Copy stored calculator output (calculated_fields JSON) into the typed columns.
+
+    The entered `ica_cca_ratio` / `stenosis_category` inputs are left untouched.
+    """
+    Measurement = apps.get_model("reports", "Measurement")
+    fields = ["derived_ica_cca_ratio", "derived_stenosis_category", "stenosis_grade", "vertebral_flow"]
+
+    batch = []
+    rows = Measurement.objects.exclude(calculated_fields={}).only("id", "calculated_fields")
+    for measurement in rows.iterator(chunk_size=BATCH_SIZE):
+        data = measurement.calculated_fields or {}
+        category = (data.get("stenosis_category") or "")[:64]
+        match = _GRADE_PATTERN.match(category)
+        ratio = data.get("ica_cca_ratio")
+        measurement.derived_ica_cca_ratio = None if ratio is None else float(ratio)
+        measurement.derived_stenosis_category = category
+        measurement.stenosis_grade = int(match.group(1)) if match else None
+        measurement.vertebral_flow = _vertebral_flow(data.get("vertebral_comment"))
+        batch.append(measurement)
+        if len(batch) >= BATCH_SIZE:
+            Measurement.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Measurement.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0012_compact_measurement_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='measurement',
+            name='derived_ica_cca_ratio',
+            field=models.FloatField(blank=True, help_text='ICA/CCA PSV ratio computed by the calculator.', null=True),
+        ),
+        migrations.AddField(
+            model_name='measurement',
+            name='derived_stenosis_category',
+            field=models.CharField(blank=True, help_text="Stenosis category assigned by the calculator (e.g. '60–79%').", max_length=64),
+        ),
+        migrations.AddField(
+            model_name='measurement',
+            name='stenosis_grade',
+            field=models.PositiveSmallIntegerField(blank=True, help_text="Lower bound (%) of the stenosis category, e.g. 70 for '≥70%'; null when uncertain or not graded.", null=True),
+        ),
+        migrations.AddField(
+            model_name='measurement',
+            name='vertebral_flow',
+            field=models.CharField(blank=True, choices=[('normal', 'Normal'), ('pre_steal', 'Pre-steal'), ('steal', 'Subclavian steal')], help_text='Vertebral flow interpretation (blank for non-vertebral segments).', max_length=16),
+        ),
+        migrations.RunPython(backfill_derived_findings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='measurement',
+            index=models.Index(condition=models.Q(('stenosis_grade__isnull', False)), fields=['stenosis_grade'], name='measurement_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='measurement',
+            index=models.Index(condition=models.Q(('derived_ica_cca_ratio__isnull', False)), fields=['derived_ica_cca_ratio'], name='measurement_ratio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='measurement',
+            index=models.Index(fields=['derived_stenosis_category'], name='measurement_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='measurement',
+            index=models.Index(fields=['vertebral_flow'], name='measurement_vertebral_idx'),
+        ),
+    ]
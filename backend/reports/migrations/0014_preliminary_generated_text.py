@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:22
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_text_to_generated(apps, schema_editor):
+    """
+    Existing reports cannot tell edits from generated text; treat them as unedited.
+    """
+    PreliminaryReport = apps.get_model("reports", "PreliminaryReport")
+    PreliminaryReport.objects.update(generated_text=F("text"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0013_measurement_derived_findings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preliminaryreport',
+            name='generated_text',
+            field=models.TextField(blank=True, help_text='Last generated conclusion; `text` differs from it once edited by the technologist.'),
+        ),
+        migrations.RunPython(copy_text_to_generated, migrations.RunPython.noop),
+    ]
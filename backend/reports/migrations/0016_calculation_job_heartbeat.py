@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:29
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    """
+    Jobs running before the upgrade count as last seen when they were claimed.
+    """
+    CalculationJob = apps.get_model("reports", "CalculationJob")
+    CalculationJob.objects.filter(status="running").update(heartbeat_at=F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0015_exam_report_pdf_key_help'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calculationjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the claiming worker reported it is still running the job.', null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
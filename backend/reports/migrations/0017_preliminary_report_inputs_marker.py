@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0016_calculation_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='preliminaryreport',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='Exam.inputs_marker the text was generated from (blank if unknown).', max_length=64),
+        ),
+    ]
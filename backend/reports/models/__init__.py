@@ -1,3 +1,7 @@
 from .exam import Exam
 from .segment import Segment
 from .measurements import Measurement
+from .counter import SequenceCounter
+from .calculation_job import CalculationJob
+from .preliminary_report import PreliminaryReport
+from .measurement_block import MeasurementBlock, SegmentLayout
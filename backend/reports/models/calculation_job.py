@@ -0,0 +1,99 @@
+from django.db import models
+from .exam import Exam
+
+
+class CalculationJob(models.Model):
+    """
+    A queued run of an exam's calculator, drained by local worker processes.
+
+    Jobs are created by `calculate_carotid_exam?async=true` and claimed by the
+    workers started with `python manage.py run_calculation_workers`. The web
+    request returns immediately with the job ID; clients poll the job status
+    endpoint for progress and results.
+
+    Lifecycle:
+        queued → running → succeeded | failed
+        (a running job whose worker stopped sending heartbeats is re-queued)
+
+    ✅ Example Use Case:
+        exam = Exam #42
+        status = "running"
+        progress = 50
+        worker = "host-1234-0"
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="calculation_jobs",
+        help_text="Exam whose calculator this job runs."
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        help_text="Current queue state of the job."
+    )
+
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Completion percentage (0–100) reported by the worker."
+    )
+
+    result = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Summary written by the worker on success (e.g., segments saved)."
+    )
+
+    error = models.TextField(
+        blank=True,
+        help_text="Error message of the last failed attempt."
+    )
+
+    worker = models.CharField(
+        max_length=128,
+        blank=True,
+        help_text="Identifier of the worker that claimed the job."
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of times a worker has claimed this job."
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last time the claiming worker reported it is still running the job."
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Workers poll for the oldest queued job
+            models.Index(fields=["status", "created_at"], name="calcjob_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"CalculationJob #{self.id} (exam {self.exam_id}, {self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
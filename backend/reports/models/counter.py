@@ -0,0 +1,58 @@
+from django.db import models, transaction
+from django.db.models import F
+
+
+class SequenceCounter(models.Model):
+    """
+    Named, monotonically increasing counter stored as a single row.
+
+    Used where the app needs unique sequential numbers without scanning a large
+    table, e.g. placeholder patient names ("Patient #042") for unnamed exams.
+
+    Each increment is one `UPDATE ... SET value = value + 1` on the primary key,
+    so concurrent callers are serialized by the row lock and never receive the
+    same number.
+
+    ✅ Example Use Case:
+        name = "placeholder_patient"
+        value = 1042   (last number handed out)
+    """
+
+    name = models.CharField(
+        max_length=64,
+        primary_key=True,
+        help_text="Counter identifier, e.g. 'placeholder_patient'."
+    )
+
+    value = models.BigIntegerField(
+        default=0,
+        help_text="Last value handed out by this counter."
+    )
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    @classmethod
+    def next_value(cls, name: str) -> int:
+        """
+        Atomically increment the named counter and return the new value.
+
+        The counter row is created on first use (starting at 1).
+
+        Args:
+            name (str): Counter identifier.
+
+        Returns:
+            int: The value reserved for this caller; unique across concurrent calls.
+        """
+        with transaction.atomic():
+            updated = cls.objects.filter(name=name).update(value=F("value") + 1)
+            if not updated:
+                # First use: a concurrent creator makes get_or_create fall back to the existing row
+                _, created = cls.objects.get_or_create(name=name, defaults={"value": 1})
+                if created:
+                    return 1
+                cls.objects.filter(name=name).update(value=F("value") + 1)
+
+            # The row stays locked by our UPDATE until commit, so this read is our value
+            return cls.objects.filter(name=name).values_list("value", flat=True).get()
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class Exam(models.Model):
@@ -53,6 +54,11 @@ class Exam(models.Model):
         ("import", "Batch Import"),
     ]
 
+    STORAGE_MODES = [
+        ("rows", "Segment + Measurement rows"),
+        ("compact", "Compact measurement block"),
+    ]
+
     GENDER_CHOICES = [
         ("male", "Male"),
         ("female", "Female"),
@@ -154,6 +160,39 @@ class Exam(models.Model):
         help_text="Origin of exam data (manual, EPIC, DICOM, etc.)"
     )
 
+    # -------------------------------
+    # Calculation state
+    # -------------------------------
+    calculation_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text=(
+            "SHA-256 of the segment inputs, criteria and calculator version behind "
+            "the stored calculated_fields. Blank when results may be stale."
+        ),
+    )
+    report_pdf_key = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text=(
+            "Artifact-store key of the rendered report PDF, pinned once the exam is "
+            "finalized so downloads skip rebuilding it. Cleared whenever the exam, its "
+            "measurements or its preliminary conclusion change."
+        ),
+    )
+
+    storage_mode = models.CharField(
+        max_length=8,
+        choices=STORAGE_MODES,
+        default="rows",
+        help_text=(
+            "Where measurements live: Segment/Measurement rows (editable default) or one "
+            "compact MeasurementBlock (archived/imported exams)."
+        ),
+    )
+
     # -------------------------------
     # Audit trail
     # -------------------------------
@@ -165,8 +204,66 @@ class Exam(models.Model):
     def __str__(self):
         return f"{self.exam_type.title()} Exam for {self.patient_name} ({self.mrn})"
 
+    def save(self, *args, **kwargs):
+        """
+        Save the exam; any edit of an existing exam (patient info, physician,
+        status, ...) unpins the report PDF, which is rebuilt on the next download.
+        """
+        if self.pk is not None:
+            self.report_pdf_key = ""
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "report_pdf_key"}
+        super().save(*args, **kwargs)
+
+    def invalidate_outputs(self, results: bool = False) -> None:
+        """
+        Unpin the report PDF (and optionally mark calculation results stale).
+
+        Used by every update path that bypasses `save()` (bulk measurement
+        updates, conclusion edits). Issues one UPDATE, matched against the stored
+        row rather than this instance, which may predate the pin.
+
+        When inputs changed, `updated_at` is stamped as well (bulk updates skip
+        auto_now), so `inputs_marker` moves on even if results were already stale.
+
+        Args:
+            results (bool): Also clear `calculation_fingerprint` (inputs changed).
+        """
+        fields = {"report_pdf_key": ""}
+        rows = Exam.objects.filter(id=self.id)
+        if results:
+            fields.update(calculation_fingerprint="", updated_at=timezone.now())
+        else:
+            rows = rows.exclude(**fields)
+        rows.update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @property
+    def inputs_marker(self) -> str:
+        """
+        Marker of the exam's current input state, stored with generated conclusions.
+
+        The calculation fingerprint when results are current; otherwise (never
+        calculated, or PATCHed with `?recalculate=false`) the time the exam last
+        changed, so repeated reads of a stale exam still match without a reload.
+        """
+        return self.calculation_fingerprint or f"inputs:{self.updated_at.isoformat()}"
+
     class Meta:
         verbose_name = "Exam"
         verbose_name_plural = "Exams"
         ordering = ["-created_at"]
+        indexes = [
+            # Worklist keyset order (created_at, id), unfiltered and per filter
+            models.Index(fields=["-created_at", "-id"], name="exam_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="exam_status_created_idx"),
+            models.Index(fields=["exam_type", "status", "-created_at", "-id"], name="exam_type_status_created_idx"),
+            models.Index(fields=["reading_physician", "status", "-created_at", "-id"], name="exam_physician_created_idx"),
+            models.Index(fields=["exam_date"], name="exam_date_idx"),
+            # Patient / order lookups
+            models.Index(fields=["mrn"], name="exam_mrn_idx"),
+            models.Index(fields=["accession"], name="exam_accession_idx"),
+        ]
 
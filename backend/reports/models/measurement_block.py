@@ -0,0 +1,101 @@
+import math
+import sys
+from array import array
+
+from django.db import models
+from .exam import Exam
+
+# Measurement columns stored as packed float64 arrays (NaN = null), in this order
+NUMERIC_COLUMNS = ("psv", "edv", "ica_cca_ratio")
+
+# Measurement columns stored sparsely (only non-blank values)
+TEXT_COLUMNS = ("plaque_type", "direction", "waveform", "stenosis_category")
+
+
+class SegmentLayout(models.Model):
+    """
+    Ordered segment list shared by every compact exam built from the same template.
+
+    Each entry is [name, artery, side, default additional_data]; compact exams
+    store their column arrays aligned to this order and reference the layout by
+    ID instead of repeating it per exam.
+    """
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 of the canonical `segments` JSON (layouts are deduplicated on it)."
+    )
+    segments = models.JSONField(
+        help_text="Ordered [name, artery, side, default additional_data] entries."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"SegmentLayout #{self.id} ({len(self.segments)} segments)"
+
+    @property
+    def names(self) -> list[str]:
+        return [entry[0] for entry in self.segments]
+
+
+class MeasurementBlock(models.Model):
+    """
+    Compact storage of all measurements of one exam (Exam.storage_mode = "compact").
+
+    Replaces the exam's Segment + Measurement rows (~80 rows and 80 JSON
+    documents for a carotid exam) with a single record:
+
+        - `numeric`: NUMERIC_COLUMNS as packed little-endian float64 arrays,
+          column after column, aligned to the layout's segment order (NaN = null).
+        - `text`: sparse {column: {segment: value}} for TEXT_COLUMNS.
+        - `extras`: sparse {segment: {key: value}} additional_data entries that
+          differ from the layout defaults.
+        - `calculated`: sparse {segment: calculated_fields}.
+
+    Read through `load_exam_snapshots()`, so calculators, serializers and report
+    builders see the same segment interface as for row storage.
+    """
+    exam = models.OneToOneField(
+        Exam,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="measurement_block",
+    )
+    layout = models.ForeignKey(SegmentLayout, on_delete=models.PROTECT, related_name="blocks")
+    numeric = models.BinaryField(help_text="Packed float64 columns (see NUMERIC_COLUMNS).")
+    text = models.JSONField(default=dict, blank=True)
+    extras = models.JSONField(default=dict, blank=True)
+    calculated = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"MeasurementBlock for exam {self.exam_id}"
+
+    # -------------------------------
+    # Numeric column codec
+    # -------------------------------
+    @staticmethod
+    def pack_columns(columns: dict[str, list]) -> bytes:
+        """
+        Pack {column: values} (None = null) into the `numeric` byte layout.
+        """
+        packed = array("d")
+        for column in NUMERIC_COLUMNS:
+            packed.extend(math.nan if value is None else float(value) for value in columns[column])
+        if sys.byteorder == "big":
+            packed.byteswap()  # stored little-endian
+        return packed.tobytes()
+
+    def unpack_columns(self) -> dict[str, list]:
+        """
+        Decode `numeric` into {column: [float | None, ...]} aligned to the layout.
+        """
+        values = array("d")
+        values.frombytes(bytes(self.numeric))
+        if sys.byteorder == "big":
+            values.byteswap()
+        count = len(values) // len(NUMERIC_COLUMNS)
+        return {
+            column: [None if math.isnan(v) else v for v in values[index * count:(index + 1) * count]]
+            for index, column in enumerate(NUMERIC_COLUMNS)
+        }
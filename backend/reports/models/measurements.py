@@ -77,6 +77,39 @@ class Measurement(models.Model):
         blank=True,
         help_text="Optional derived field showing interpreted stenosis severity (e.g. '60–79%')."
     )
+
+    # -------------------------------
+    # Derived findings (written by the calculator, indexed for cohort queries)
+    # Kept apart from the entered `ica_cca_ratio` / `stenosis_category` inputs.
+    # -------------------------------
+    derived_ica_cca_ratio = models.FloatField(
+        null=True, blank=True,
+        help_text="ICA/CCA PSV ratio computed by the calculator."
+    )
+
+    derived_stenosis_category = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Stenosis category assigned by the calculator (e.g. '60–79%')."
+    )
+
+    stenosis_grade = models.PositiveSmallIntegerField(
+        null=True, blank=True,
+        help_text="Lower bound (%) of the stenosis category, e.g. 70 for '≥70%'; null when uncertain or not graded."
+    )
+
+    VERTEBRAL_FLOWS = [
+        ("normal", "Normal"),
+        ("pre_steal", "Pre-steal"),
+        ("steal", "Subclavian steal"),
+    ]
+    vertebral_flow = models.CharField(
+        max_length=16,
+        choices=VERTEBRAL_FLOWS,
+        blank=True,
+        help_text="Vertebral flow interpretation (blank for non-vertebral segments)."
+    )
+
     additional_data = models.JSONField(
         default=dict,
         blank=True,
@@ -88,5 +121,20 @@ class Measurement(models.Model):
         help_text="Derived metrics like ICA/CCA ratio, stenosis category, etc.")
 
 
+    class Meta:
+        indexes = [
+            # Cohort queries on derived findings; partial, as most segments have no grade or ratio
+            models.Index(
+                fields=["stenosis_grade"], name="measurement_grade_idx",
+                condition=models.Q(stenosis_grade__isnull=False),
+            ),
+            models.Index(
+                fields=["derived_ica_cca_ratio"], name="measurement_ratio_idx",
+                condition=models.Q(derived_ica_cca_ratio__isnull=False),
+            ),
+            models.Index(fields=["derived_stenosis_category"], name="measurement_category_idx"),
+            models.Index(fields=["vertebral_flow"], name="measurement_vertebral_idx"),
+        ]
+
     def __str__(self):
         return f"{self.segment.name} – PSV: {self.psv or 'N/A'}"
@@ -7,11 +7,51 @@ class PreliminaryReport(models.Model):
 
     This is seeded automatically by the calculator and manually edited by the technologist.
     It represents the preliminary interpretation prior to physician sign-off.
+
+    The calculator materializes the generated conclusion here together with the
+    exam's calculation fingerprint; the conclusion endpoint serves the stored
+    text while that marker still matches `Exam.inputs_marker` (the fingerprint,
+    or an input timestamp while results are stale).
+
+    `generated_text` is the last generated conclusion and `text` the one shown.
+    They differ once the technologist edited `text`; from then on regeneration
+    only refreshes `generated_text` and never overwrites the edit.
+
+    Saving a report unpins the exam's report PDF (see Exam.invalidate_outputs).
     """
     exam = models.OneToOneField(Exam, on_delete=models.CASCADE, related_name="preliminary")
     text = models.TextField()
+    generated_text = models.TextField(
+        blank=True,
+        help_text="Last generated conclusion; `text` differs from it once edited by the technologist."
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Exam.inputs_marker the text was generated from (blank if unknown)."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Preliminary for {self.exam}"
+
+    def save(self, *args, **kwargs):
+        """
+        Save the report; the exam's pinned PDF shows the old conclusion, so it is unpinned.
+        """
+        super().save(*args, **kwargs)
+        self.exam.invalidate_outputs()
+
+    @property
+    def is_edited(self) -> bool:
+        """
+        True when the technologist changed the text away from the generated conclusion.
+        """
+        return self.text != self.generated_text
+
+    def is_current(self, exam: Exam) -> bool:
+        """
+        True when the text was generated from the exam's current inputs and results.
+        """
+        return bool(self.fingerprint) and self.fingerprint == exam.inputs_marker
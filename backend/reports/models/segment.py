@@ -53,6 +53,7 @@ class Segment(models.Model):
         Exam,
         on_delete=models.CASCADE,
         related_name="segments",
+        db_index=False,  # covered by the (exam, name) unique index below
         help_text="Parent exam this segment belongs to."
     )
 
@@ -74,6 +75,12 @@ class Segment(models.Model):
         help_text="Side of the body this segment belongs to (right/left/n/a)."
     )
 
+    class Meta:
+        constraints = [
+            # One segment per name within an exam; its index serves every per-exam lookup
+            models.UniqueConstraint(fields=["exam", "name"], name="segment_exam_name_uniq"),
+        ]
+
     def __str__(self):
         return f"{self.exam.exam_type} – {self.name}"
 
@@ -0,0 +1,4 @@
+# reports/pdf_templates/__init__.py
+#
+# Kept free of Django imports: render worker processes import
+# reports.pdf_templates.renderer before Django is configured.
@@ -0,0 +1,212 @@
+# reports/pdf_templates/artifact_store.py
+
+"""
+Content-Addressed PDF Artifact Store
+
+Rendered report PDFs are stored on the local filesystem under a key derived from
+everything that determines their content: the report HTML (exam data +
+conclusion), the report stylesheets and PDF_TEMPLATE_VERSION. Identical renders
+therefore share one file, and a download whose key already exists is served
+straight from disk without touching the render pool.
+
+Files live at <PDF_ARTIFACT_ROOT>/<key[:2]>/<key>.pdf and are written atomically
+(temp file + rename), so concurrent renders of the same key are harmless.
+
+`serve_artifact()` returns a FileResponse with a strong ETag (the key), answers
+If-None-Match with 304 and supports single-range `Range: bytes=` requests (206).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from reports.pdf_templates.renderer import DEFAULT_STYLESHEETS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout or renderer changes in a way the HTML/CSS hash cannot see
+PDF_TEMPLATE_VERSION = "1"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@lru_cache(maxsize=1)
+def _stylesheet_digest() -> str:
+    digest = hashlib.sha256()
+    for path in DEFAULT_STYLESHEETS:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def artifact_key(html: str, template_version: str = PDF_TEMPLATE_VERSION) -> str:
+    """
+    Content key of the PDF rendered from `html`.
+
+    Args:
+        html (str): Report HTML passed to the renderer.
+        template_version (str): Layout/renderer version.
+
+    Returns:
+        str: Hex SHA-256 digest (64 characters).
+    """
+    digest = hashlib.sha256()
+    digest.update(template_version.encode())
+    digest.update(b"\0")
+    digest.update(_stylesheet_digest().encode())
+    digest.update(b"\0")
+    digest.update(html.encode())
+    return digest.hexdigest()
+
+
+class PdfArtifactStore:
+    """
+    Filesystem store of PDFs addressed by content key.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        if not re.fullmatch(r"[0-9a-f]{64}", key):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def exists(self, key: str) -> bool:
+        return self.path_for(key).is_file()
+
+    def put(self, key: str, data: bytes) -> Path:
+        """
+        Store PDF bytes under `key` (no-op if the artifact already exists).
+
+        Returns:
+            Path: Location of the stored file.
+        """
+        path = self.path_for(key)
+        if path.is_file():
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        logger.debug(f"Stored PDF artifact {key[:12]} ({len(data)} bytes)")
+        return path
+
+
+def get_artifact_store() -> PdfArtifactStore:
+    """
+    Store rooted at settings.PDF_ARTIFACT_ROOT (defaults to MEDIA_ROOT/pdf_artifacts).
+    """
+    root = getattr(settings, "PDF_ARTIFACT_ROOT", None) or Path(settings.MEDIA_ROOT) / "pdf_artifacts"
+    return PdfArtifactStore(root)
+
+
+class _RangeReader:
+    """
+    File wrapper exposing only bytes [start, start + length) to FileResponse.
+    """
+
+    def __init__(self, file: BinaryIO, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into (start, end) inclusive; None if unsatisfiable.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = size - 1 if last == "" else min(int(last), size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def serve_artifact(request, store: PdfArtifactStore, key: str, filename: str) -> HttpResponse:
+    """
+    Serve a stored PDF with ETag / If-None-Match and HTTP Range support.
+
+    Args:
+        request: Incoming request (Django or DRF).
+        store (PdfArtifactStore): Store holding the artifact.
+        key (str): Artifact key (also the ETag).
+        filename (str): Download filename for Content-Disposition.
+
+    Returns:
+        HttpResponse: 200 FileResponse, 206 partial content, 304 or 416.
+    """
+    etag = quote_etag(key)
+    path = store.path_for(key)
+    stat = path.stat()
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    file = path.open("rb")
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    use_range = range_header and (not if_range or if_range.strip() == etag)
+
+    if use_range:
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        start, end = byte_range
+        response = FileResponse(_RangeReader(file, start, end - start + 1), status=206, content_type="application/pdf")
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    else:
+        response = FileResponse(file, content_type="application/pdf")
+
+    response["Content-Disposition"] = f'inline; filename="{filename}"'
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
@@ -0,0 +1,86 @@
+# reports/pdf_templates/carotid_report.py
+
+"""
+Builds the HTML document for a carotid report PDF.
+
+Measurements come from the exam snapshot (one query) and the conclusion from the
+materialized PreliminaryReport, so building the HTML stays cheap; the expensive
+HTML → PDF step runs in the render pool (see renderer.py).
+"""
+
+from functools import lru_cache
+
+from django.template import Context, Engine
+
+from report_template.registry.template_registry import get_template
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.models import Exam
+from reports.pdf_templates.renderer import PDF_TEMPLATE_DIR
+from reports.services.exam_snapshot import load_exam_snapshot
+from reports.services.preliminary_reports import get_current_conclusion
+
+REPORT_TEMPLATE = "carotid_report.html"
+
+
+@lru_cache(maxsize=1)
+def _engine() -> Engine:
+    """
+    Template engine scoped to reports/pdf_templates (templates compiled once).
+    """
+    return Engine(
+        dirs=[str(PDF_TEMPLATE_DIR)],
+        builtins=[],
+        loaders=[("django.template.loaders.cached.Loader", ["django.template.loaders.filesystem.Loader"])],
+    )
+
+
+def build_carotid_report_rows(exam: Exam) -> list[dict]:
+    """
+    One table row per segment that has a measurement, labelled from the exam template.
+
+    Args:
+        exam (Exam): Carotid exam.
+
+    Returns:
+        list[dict]: Row dictionaries (label, psv, edv, ratio, stenosis, direction, waveform).
+    """
+    template = get_template("carotid", DEFAULT_TEMPLATE_SITE)
+    labels = {seg["id"]: seg.get("label", seg["id"]) for seg in template["segments"]}
+
+    rows = []
+    for segment in load_exam_snapshot(exam.id).segments:
+        m = segment.measurement
+        if m is None:
+            continue
+        calculated = m.calculated_fields
+        rows.append({
+            "label": labels.get(segment.name, segment.name),
+            "psv": m.psv,
+            "edv": m.edv,
+            "ica_cca_ratio": calculated.get("ica_cca_ratio", m.ica_cca_ratio),
+            "stenosis_category": calculated.get("stenosis_category") or m.stenosis_category,
+            "direction": m.direction,
+            "waveform": m.waveform,
+        })
+    return rows
+
+
+def build_carotid_report_html(exam: Exam) -> str:
+    """
+    Render the full HTML document for a carotid exam's PDF.
+
+    Args:
+        exam (Exam): Carotid exam (load with select_related("preliminary") to reuse
+            the materialized conclusion without an extra query).
+
+    Returns:
+        str: HTML ready for the PDF render pool.
+    """
+    template = get_template("carotid", DEFAULT_TEMPLATE_SITE)
+    context = {
+        "title": template.get("title", "Carotid Duplex Report"),
+        "exam": exam,
+        "rows": build_carotid_report_rows(exam),
+        "conclusion": get_current_conclusion(exam),
+    }
+    return _engine().get_template(REPORT_TEMPLATE).render(Context(context))
@@ -0,0 +1,344 @@
+# reports/pdf_templates/renderer.py
+
+"""
+PDF Rendering Pool
+
+WeasyPrint is CPU-heavy and single-threaded, so report PDFs are rendered in a
+warm pool of worker processes instead of on the Django request thread:
+
+  - Workers are spawned once and preload the report stylesheets and font
+    configuration in their initializer, so each job only lays out the HTML.
+  - Concurrency is bounded: at most `max_pending` jobs may be queued or running;
+    beyond that `render_pdf()` raises PdfRenderBusy (the view answers 503).
+  - Each job has a timeout, counted from the moment an idle worker takes the
+    job (time spent queued behind other renders does not count). A worker stuck
+    past it is killed and replaced on its own; the other workers and their jobs
+    are not affected.
+
+Each worker is a spawned process talking to the pool over its own pipe; idle
+workers wait in a queue, and a request thread checks one out for the duration
+of its job.
+
+This module imports only the standard library at top level: WeasyPrint is
+loaded inside the worker processes.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PDF_TEMPLATE_DIR = Path(__file__).resolve().parent
+
+# Stylesheets preloaded by every worker
+DEFAULT_STYLESHEETS = (str(PDF_TEMPLATE_DIR / "styles" / "report.css"),)
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_TIMEOUT = 30.0  # seconds per job, from the moment a worker takes it
+DEFAULT_STARTUP_TIMEOUT = 60.0  # seconds for a new worker to import WeasyPrint and preload
+
+
+class PdfRenderError(RuntimeError):
+    """Raised when a PDF could not be rendered."""
+
+
+class PdfRenderBusy(PdfRenderError):
+    """Raised when the pool already holds `max_pending` jobs."""
+
+
+class PdfRenderTimeout(PdfRenderError):
+    """Raised when a job exceeds its timeout (its worker is killed)."""
+
+
+# ========================
+# Worker Process Side
+# ========================
+
+# Per-process state filled in by _init_worker()
+_worker_state: dict = {}
+
+
+def _init_worker(stylesheet_paths: Sequence[str]) -> None:
+    """
+    Worker initializer: import WeasyPrint and parse stylesheets/fonts once.
+    """
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    _worker_state["font_config"] = font_config
+    _worker_state["stylesheets"] = [
+        CSS(filename=path, font_config=font_config) for path in stylesheet_paths
+    ]
+
+
+def render_html_in_worker(html: str, base_url: Optional[str] = None) -> bytes:
+    """
+    Render HTML to PDF bytes with the worker's preloaded stylesheets and fonts.
+    """
+    from weasyprint import HTML
+
+    return HTML(string=html, base_url=base_url).write_pdf(
+        stylesheets=_worker_state.get("stylesheets", []),
+        font_config=_worker_state.get("font_config"),
+    )
+
+
+def _worker_main(conn, render_fn: Callable[..., bytes], initializer: Optional[Callable], initargs: tuple) -> None:
+    """
+    Worker process loop: initialize, report ready, then answer (html, base_url) jobs
+    with ("ok", pdf bytes) or ("error", message) until the pipe closes.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        html, base_url = job
+        try:
+            conn.send(("ok", render_fn(html, base_url)))
+        except Exception as e:
+            conn.send(("error", str(e) or e.__class__.__name__))
+
+
+# ========================
+# Pool
+# ========================
+
+class _RenderWorker:
+    """
+    One spawned worker process and the pool's end of its pipe.
+
+    Used by one request thread at a time (checked out of the pool's idle queue).
+    """
+
+    def __init__(self, render_fn: Callable, initializer: Optional[Callable], initargs: tuple, startup_timeout: float):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, render_fn, initializer, initargs),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        try:
+            if not self.conn.poll(startup_timeout):
+                raise PdfRenderError(f"PDF render worker did not start within {startup_timeout}s")
+            self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.stop()
+            raise PdfRenderError("PDF render worker failed to start") from e
+        except PdfRenderError:
+            self.stop()
+            raise
+
+    def run(self, html: str, base_url: Optional[str], timeout: float) -> bytes:
+        """
+        Send one job to this (idle) worker and wait at most `timeout` for its answer.
+
+        Raises:
+            PdfRenderTimeout: If no answer arrived in time (the caller must stop this worker).
+            PdfRenderError: If the job raised in the worker.
+            EOFError / OSError: If the worker process died.
+        """
+        self.conn.send((html, base_url))
+        if not self.conn.poll(timeout):
+            raise PdfRenderTimeout(f"PDF rendering timed out after {timeout}s")
+        status, payload = self.conn.recv()
+        if status != "ok":
+            raise PdfRenderError(payload)
+        return payload
+
+    def stop(self) -> None:
+        """
+        Kill the worker process (used for stuck, crashed or shut-down workers).
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.conn.close()
+
+
+class PdfRenderPool:
+    """
+    Bounded, warm process pool that turns report HTML into PDF bytes.
+
+    Args:
+        workers (int): Number of worker processes.
+        max_pending (int): Jobs allowed in flight (queued + running) before PdfRenderBusy.
+        timeout (float): Seconds a single job may run once a worker has taken it.
+        stylesheets (Sequence[str]): CSS files preloaded by each worker.
+        render_fn (Callable): Picklable top-level function run in the worker as
+            `render_fn(html, base_url)`; defaults to WeasyPrint.
+        initializer (Callable, optional): Worker initializer called with `stylesheets`.
+        startup_timeout (float): Seconds a new worker may take to initialize.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        timeout: float = DEFAULT_TIMEOUT,
+        stylesheets: Sequence[str] = DEFAULT_STYLESHEETS,
+        render_fn: Callable[..., bytes] = render_html_in_worker,
+        initializer: Optional[Callable] = _init_worker,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.timeout = timeout
+        self.stylesheets = tuple(stylesheets)
+        self.render_fn = render_fn
+        self.initializer = initializer
+        self.startup_timeout = startup_timeout
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._live: set[_RenderWorker] = set()
+        # Idle workers; None is a slot whose worker is started by the thread that takes it
+        self._idle: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(self.workers):
+            self._idle.put(None)
+
+    def _start_worker(self) -> _RenderWorker:
+        worker = _RenderWorker(
+            self.render_fn,
+            self.initializer,
+            (self.stylesheets,) if self.initializer else (),
+            self.startup_timeout,
+        )
+        with self._lock:
+            self._live.add(worker)
+        return worker
+
+    def _retire(self, worker: _RenderWorker) -> None:
+        """
+        Kill one stuck or crashed worker; its slot restarts a fresh worker on next use.
+        """
+        with self._lock:
+            self._live.discard(worker)
+        worker.stop()
+
+    def warm_up(self) -> None:
+        """
+        Start every worker now (and run its initializer) instead of on first request.
+        """
+        taken = [self._idle.get() for _ in range(self.workers)]
+        try:
+            taken = [worker or self._start_worker() for worker in taken]
+        finally:
+            for worker in taken:
+                self._idle.put(worker)
+
+    def render(self, html: str, base_url: Optional[str] = None) -> bytes:
+        """
+        Render HTML to PDF in a worker process.
+
+        Waits for an idle worker if all are busy; the timeout only starts once a
+        worker has taken the job.
+
+        Args:
+            html (str): Complete HTML document.
+            base_url (str, optional): Base for resolving relative URLs (images, fonts).
+
+        Returns:
+            bytes: The PDF document.
+
+        Raises:
+            PdfRenderBusy: If `max_pending` jobs are already in flight.
+            PdfRenderTimeout: If the job ran longer than `timeout`.
+            PdfRenderError: If the worker failed.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PdfRenderBusy(f"PDF renderer busy ({self.max_pending} jobs in flight)")
+
+        try:
+            worker = self._idle.get()
+            try:
+                if worker is None:
+                    worker = self._start_worker()
+                return worker.run(html, base_url, self.timeout)
+            except PdfRenderTimeout:
+                logger.error(f"PDF render exceeded {self.timeout}s; restarting its worker")
+                self._retire(worker)
+                worker = None
+                raise
+            except (EOFError, OSError) as e:
+                logger.error("PDF render worker died; restarting it")
+                self._retire(worker)
+                worker = None
+                raise PdfRenderError("PDF render worker crashed") from e
+            finally:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes; jobs still running fail with PdfRenderError.
+        """
+        with self._lock:
+            workers, self._live = list(self._live), set()
+        for worker in workers:
+            worker.stop()
+
+        # Idle slots restart their worker on next use; busy slots are retired by their thread
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for _ in idle:
+            self._idle.put(None)
+
+
+# ========================
+# Process-wide Pool
+# ========================
+
+_pool: Optional[PdfRenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> PdfRenderPool:
+    """
+    Return the process-wide render pool, configured from settings on first use:
+    PDF_RENDER_WORKERS, PDF_RENDER_MAX_PENDING, PDF_RENDER_TIMEOUT.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from django.conf import settings
+
+                _pool = PdfRenderPool(
+                    workers=getattr(settings, "PDF_RENDER_WORKERS", DEFAULT_WORKERS),
+                    max_pending=getattr(settings, "PDF_RENDER_MAX_PENDING", DEFAULT_MAX_PENDING),
+                    timeout=getattr(settings, "PDF_RENDER_TIMEOUT", DEFAULT_TIMEOUT),
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def render_pdf(html: str, base_url: Optional[str] = None) -> bytes:
+    """
+    Render HTML to PDF bytes using the process-wide pool.
+    """
+    return get_render_pool().render(html, base_url)
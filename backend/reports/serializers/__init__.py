@@ -2,6 +2,7 @@
 
 from .exam_base_serializer import ExamBaseSerializer
 from .base_arterial_serializer import ArterialMeasurementSerializer
+from .calculation_job_serializer import CalculationJobSerializer
 
 
 # Re-export carotid serializers (so imports still work at package level)
@@ -10,6 +11,7 @@ from .carotid import CarotidExamSerializer, CarotidMeasurementSerializer
 __all__ = [
     "ExamBaseSerializer",
     "ArterialMeasurementSerializer",
+    "CalculationJobSerializer",
     "CarotidExamSerializer",
     "CarotidMeasurementSerializer",
 ]
@@ -0,0 +1,28 @@
+# reports/serializers/calculation_job_serializer.py
+
+from rest_framework import serializers
+from reports.models import CalculationJob
+
+
+class CalculationJobSerializer(serializers.ModelSerializer):
+    """
+    Read-only status payload for a background calculation job.
+    """
+
+    exam_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CalculationJob
+        fields = [
+            "id",
+            "exam_id",
+            "status",
+            "progress",
+            "result",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
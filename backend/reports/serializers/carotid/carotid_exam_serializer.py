@@ -1,16 +1,80 @@
 # reports/serializers/carotid/exam_serializer.py
 
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 from rest_framework import serializers
-from reports.models import Exam
+from reports.models import Exam, Segment, Measurement
 from reports.serializers.exam_base_serializer import ExamBaseSerializer
+from reports.services.exam_snapshot import ExamSnapshot, MeasurementSnapshot, load_exam_snapshot
 from .carotid_measurement_serializer import CarotidMeasurementSerializer
 
+# Prefetch used by views (and as a fallback) so segments + measurements load in 2 queries total
+SEGMENTS_PREFETCH = Prefetch(
+    "segments",
+    queryset=Segment.objects.order_by("id").prefetch_related(
+        Prefetch("measurements", queryset=Measurement.objects.order_by("id"))
+    ),
+)
+
+
+def _float_or_none(value):
+    return None if value is None else float(value)
+
+
+def _str_or_none(value):
+    return None if value is None else str(value)
+
+
+def measurement_snapshot_data(m: MeasurementSnapshot) -> dict:
+    """
+    Build the CarotidMeasurementSerializer payload directly from a snapshot row.
+
+    Produces the same output as `CarotidMeasurementSerializer(measurement).data`
+    without DRF's per-field machinery.
+    """
+    additional_data = dict(m.additional_data)
+    return {
+        "psv": _float_or_none(m.psv),
+        "edv": _float_or_none(m.edv),
+        "plaqueMorphology": _str_or_none(m.plaque_type),
+        "arteryDiameter": _float_or_none(additional_data.get("artery_diameter")),
+        "apTr": _float_or_none(additional_data.get("ap_tr")),
+        "longitudinal": _float_or_none(additional_data.get("longitudinal")),
+        "waveform": _str_or_none(m.waveform),
+        "stenosis_category": _str_or_none(m.stenosis_category),
+        "additional_data": additional_data,
+        "calculated_fields": dict(m.calculated_fields),
+        "icaCcaRatio": _float_or_none(m.ica_cca_ratio),
+        "direction": _str_or_none(m.direction),
+    }
+
+
+def segment_snapshot_data(snapshot: ExamSnapshot) -> list[dict]:
+    """
+    Build the nested `segments` payload for an exam from its snapshot.
+    """
+    return [
+        {
+            "name": seg.name,
+            "artery": seg.artery,
+            "side": seg.side,
+            "measurements": [measurement_snapshot_data(m) for m in seg.measurements],
+        }
+        for seg in snapshot.segments
+    ]
+
 
 class CarotidExamSerializer(ExamBaseSerializer):
     """
     Carotid exam serializer.
     Inherits universal exam fields from ExamBaseSerializer
     and nests carotid-specific measurements by segment.
+
+    Segment data comes from one of two paths:
+      - Fast path: pass `context={"segment_snapshots": load_exam_snapshots(ids)}`
+        and the payload is built from the snapshot rows (no DRF field machinery).
+      - ORM path: segments/measurements are read from the prefetch cache; use
+        `CarotidExamSerializer.prefetch_segments(queryset)` in list views so
+        the whole page costs a constant number of queries.
     """
 
     segments = serializers.SerializerMethodField()
@@ -19,19 +83,40 @@ class CarotidExamSerializer(ExamBaseSerializer):
         model = Exam
         fields = ExamBaseSerializer.Meta.fields + ["segments"]
 
+    @staticmethod
+    def prefetch_segments(queryset: QuerySet) -> QuerySet:
+        """
+        Attach the segment + measurement prefetch to an Exam queryset.
+        """
+        return queryset.prefetch_related(SEGMENTS_PREFETCH)
+
     def get_segments(self, obj):
         """
         Return each segment with nested CarotidMeasurementSerializer data.
         """
-        segments = obj.segments.all().prefetch_related("measurements")
+        snapshots = self.context.get("segment_snapshots")
+        if snapshots is not None and obj.id in snapshots:
+            return segment_snapshot_data(snapshots[obj.id])
+
+        # Compact exams have no segment rows to prefetch
+        if obj.storage_mode == "compact":
+            return segment_snapshot_data(load_exam_snapshot(obj.id))
+
+        # Prefetch only when the view did not already do so
+        if "segments" not in getattr(obj, "_prefetched_objects_cache", {}):
+            prefetch_related_objects([obj], SEGMENTS_PREFETCH)
+
+        # One bound child serializer reused for every measurement
+        measurement_serializer = CarotidMeasurementSerializer(context=self.context)
         return [
             {
                 "name": seg.name,
                 "artery": seg.artery,
                 "side": seg.side,
-                "measurements": CarotidMeasurementSerializer(
-                    seg.measurements.all(), many=True
-                ).data,
+                "measurements": [
+                    measurement_serializer.to_representation(m)
+                    for m in seg.measurements.all()
+                ],
             }
-            for seg in segments
+            for seg in obj.segments.all()
         ]
@@ -0,0 +1,430 @@
+# reports/services/bulk_import.py
+
+"""
+Bulk Exam Import
+
+Streams exams with their measurements from NDJSON or CSV into the database for
+the "import" source (historical archives, other reporting systems).
+
+Row formats:
+  - NDJSON: one JSON object per line with Exam fields plus
+    `"segments": {"ica_prox_right": {"psv": 250, "edv": 80}, ...}`.
+  - CSV: one row per exam; Exam fields as plain columns and measurements as
+    "<segment>.<field>" columns (e.g. "ica_prox_right.psv"). Empty cells are null.
+
+Optional per-row keys: `site` (template site, defaults to DEFAULT_TEMPLATE_SITE)
+and `name` as an alias of `patient_name`.
+
+Rows are read lazily and processed in chunks: each chunk is validated with the
+model fields' own `clean()` and written with one `bulk_create` per table
+(Exam, Segment, Measurement) inside a transaction, so memory stays bounded by
+the chunk size. Invalid rows are reported individually and never abort the import.
+
+With `storage="compact"` each exam is written as one MeasurementBlock instead
+of Segment + Measurement rows (see reports/services/compact_store.py).
+"""
+
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from report_template.registry.template_registry import get_template
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.models import Exam, Measurement, MeasurementBlock, Segment
+from reports.services.compact_store import COMPACT, build_block
+from reports.services.exam_factory import generate_placeholder_name
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+DEFAULT_CHUNK_SIZE = 500
+
+IMPORT_SOURCE = "import"
+
+# Exam columns accepted from import rows (everything a client could set on create)
+IMPORT_EXAM_FIELDS = (
+    "patient_name", "gender", "mrn", "dob", "accession", "exam_date",
+    "exam_type", "exam_scope", "exam_extent", "cpt_code",
+    "technique", "operative_history", "indication_code", "history",
+    "created_by", "reading_physician", "status",
+)
+
+# Measurement columns accepted from import rows (derived fields are left to the calculator)
+IMPORT_MEASUREMENT_FIELDS = ("psv", "edv", "plaque_type", "direction", "waveform")
+
+_EXAM_FIELDS = {name: Exam._meta.get_field(name) for name in IMPORT_EXAM_FIELDS}
+_MEASUREMENT_FIELDS = {name: Measurement._meta.get_field(name) for name in IMPORT_MEASUREMENT_FIELDS}
+
+# Keys of a row that are not Exam columns
+_META_KEYS = frozenset({"site", "name", "segments", "source"})
+
+
+@dataclass(frozen=True)
+class ImportRow:
+    """
+    One parsed input row.
+
+    Attributes:
+        line (int): Line (NDJSON) or record (CSV) number, starting at 1.
+        data (dict): Parsed row, or None when the row could not be parsed.
+        error (str): Parse error ("" when `data` is set).
+    """
+    line: int
+    data: Optional[dict]
+    error: str = ""
+
+
+@dataclass(frozen=True)
+class RowError:
+    """
+    A rejected row and why.
+
+    Attributes:
+        line (int): Row number in the input.
+        errors (dict): Field (or "row") → list of messages.
+    """
+    line: int
+    errors: dict
+
+    def as_dict(self) -> dict:
+        return {"line": self.line, "errors": self.errors}
+
+
+@dataclass
+class ImportSummary:
+    """
+    Outcome of an import.
+
+    Attributes:
+        created (int): Exams created.
+        failed (int): Rows rejected.
+        errors (list[RowError]): The first `max_errors` rejected rows.
+    """
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+
+# ========================
+# Readers
+# ========================
+
+def _decode_lines(lines: Iterable[Any]) -> Iterator[str]:
+    """
+    Decode a byte or text line iterator (e.g. an uploaded file or request body) to str lines.
+    """
+    first = True
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8-sig" if first else "utf-8")
+        elif first:
+            line = line.lstrip("﻿")
+        first = False
+        yield line
+
+
+def iter_ndjson_rows(lines: Iterable[Any]) -> Iterator[ImportRow]:
+    """
+    Parse NDJSON lines lazily; blank lines are skipped.
+    """
+    for number, line in enumerate(_decode_lines(lines), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield ImportRow(number, None, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield ImportRow(number, None, "Each line must be a JSON object.")
+            continue
+        yield ImportRow(number, data)
+
+
+def iter_csv_rows(lines: Iterable[Any]) -> Iterator[ImportRow]:
+    """
+    Parse CSV lazily: plain columns are Exam fields, "<segment>.<field>" columns are measurements.
+    """
+    reader = csv.DictReader(_decode_lines(lines))
+    for number, record in enumerate(reader, start=1):
+        data: dict = {}
+        segments: dict[str, dict] = {}
+        for column, value in record.items():
+            if column is None:
+                yield ImportRow(number, None, "Row has more values than the header.")
+                break
+            value = None if value is None or value == "" else value
+            if "." in column:
+                segment_name, field_name = column.split(".", 1)
+                segments.setdefault(segment_name, {})[field_name] = value
+            else:
+                data[column] = value
+        else:
+            if "history" in data and data["history"] is not None:
+                try:
+                    data["history"] = json.loads(data["history"])
+                except ValueError:
+                    yield ImportRow(number, None, "history must be a JSON array.")
+                    continue
+            data["segments"] = segments
+            yield ImportRow(number, data)
+
+
+def iter_import_rows(lines: Iterable[Any], fmt: str) -> Iterator[ImportRow]:
+    """
+    Dispatch to the reader for `fmt` ("ndjson" or "csv").
+
+    Raises:
+        ValueError: On an unknown format.
+    """
+    if fmt == "ndjson":
+        return iter_ndjson_rows(lines)
+    if fmt == "csv":
+        return iter_csv_rows(lines)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+# ========================
+# Validation
+# ========================
+
+def _blueprints(exam_type: str, site: str) -> dict:
+    """
+    Segment name → SegmentBlueprint for a template (template loading is cached).
+    """
+    return {blueprint.segment_id: blueprint for blueprint in get_template(exam_type, site).blueprints}
+
+
+def _clean_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"'{value}' value must be a float.")
+
+
+def build_import_objects(data: dict, created_by: str, blueprint_cache: dict) -> tuple[Exam, list, list]:
+    """
+    Validate one row and build its unsaved Exam, Segment and Measurement objects.
+
+    Args:
+        data (dict): Parsed row.
+        created_by (str): Default for rows without `created_by`.
+        blueprint_cache (dict): (exam_type, site) → blueprints, shared across rows.
+
+    Returns:
+        tuple: (exam, segments, measurements) with segments/measurements aligned by index.
+
+    Raises:
+        ValidationError: With a field → messages dict.
+    """
+    errors: dict[str, list] = {}
+    values: dict[str, Any] = {}
+
+    row = dict(data)
+    if row.get("patient_name") is None and row.get("name") is not None:
+        row["patient_name"] = row["name"]
+    row.setdefault("exam_type", "carotid")
+    if not row.get("created_by"):
+        row["created_by"] = created_by
+
+    unknown = sorted(set(row) - set(_EXAM_FIELDS) - _META_KEYS)
+    if unknown:
+        errors["row"] = [f"Unknown field(s): {', '.join(unknown)}"]
+
+    # Step 1: Exam columns, validated by the model fields themselves
+    for name, model_field in _EXAM_FIELDS.items():
+        if name not in row or (name == "patient_name" and row[name] in (None, "")):
+            continue
+        value = row[name]
+        if value is None and not model_field.null:
+            value = model_field.get_default()
+        try:
+            values[name] = model_field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+
+    # Step 2: Resolve the template for segment names
+    exam_type = values.get("exam_type") or "carotid"
+    site = row.get("site") or DEFAULT_TEMPLATE_SITE
+    key = (exam_type, site)
+    if key not in blueprint_cache:
+        try:
+            blueprint_cache[key] = _blueprints(exam_type, site)
+        except (FileNotFoundError, ValueError) as e:
+            blueprint_cache[key] = e
+    blueprints = blueprint_cache[key]
+    if isinstance(blueprints, Exception):
+        errors["site"] = [f"No {exam_type} template for site '{site}'."]
+        raise ValidationError(errors)
+
+    # Step 3: Measurement values per segment
+    segment_values = row.get("segments") or {}
+    if not isinstance(segment_values, dict):
+        errors["segments"] = ["Must be an object of segment name → measurements."]
+        segment_values = {}
+
+    cleaned_segments: dict[str, dict] = {}
+    for segment_name, fields in segment_values.items():
+        blueprint = blueprints.get(segment_name)
+        if blueprint is None:
+            errors[f"segments.{segment_name}"] = ["Unknown segment."]
+            continue
+        if not isinstance(fields, dict):
+            errors[f"segments.{segment_name}"] = ["Must be an object of field → value."]
+            continue
+        cleaned: dict[str, Any] = {}
+        for field_name, value in fields.items():
+            try:
+                if field_name in _MEASUREMENT_FIELDS:
+                    model_field = _MEASUREMENT_FIELDS[field_name]
+                    if value is None and not model_field.null:
+                        value = ""
+                    cleaned[field_name] = model_field.clean(value, None)
+                elif field_name in blueprint.additional_data and not field_name.endswith("_unit"):
+                    cleaned[field_name] = _clean_float(value)
+                else:
+                    raise ValidationError("Unknown measurement field.")
+            except ValidationError as e:
+                errors[f"segments.{segment_name}.{field_name}"] = e.messages
+        cleaned_segments[segment_name] = cleaned
+
+    if errors:
+        raise ValidationError(errors)
+
+    # Step 4: Build unsaved rows (every template segment, as the exam factory does)
+    if not values.get("patient_name"):
+        values["patient_name"] = generate_placeholder_name(values.get("gender") or "unspecified")
+    exam = Exam(source=IMPORT_SOURCE, **values)
+
+    segments: list[Segment] = []
+    measurements: list[Measurement] = []
+    for blueprint in blueprints.values():
+        segments.append(Segment(name=blueprint.segment_id, artery=blueprint.artery, side=blueprint.side))
+        additional_data = blueprint.new_additional_data()
+        columns = dict.fromkeys(blueprint.core_fields)
+        for field_name, value in cleaned_segments.get(blueprint.segment_id, {}).items():
+            if field_name in _MEASUREMENT_FIELDS:
+                columns[field_name] = value
+            else:
+                additional_data[field_name] = value
+        measurements.append(Measurement(additional_data=additional_data, **columns))
+
+    return exam, segments, measurements
+
+
+# ========================
+# Import
+# ========================
+
+def _insert_chunk(built: list[tuple[Exam, list, list]], layout_cache: Optional[dict] = None) -> None:
+    """
+    Insert a validated chunk with one bulk_create per table.
+
+    When `layout_cache` is given the chunk is written in compact storage
+    (Exam + MeasurementBlock) and the cache memoizes the shared layouts.
+    """
+    with transaction.atomic():
+        if layout_cache is not None:
+            for exam, _, _ in built:
+                exam.storage_mode = COMPACT
+        exams = Exam.objects.bulk_create([exam for exam, _, _ in built])
+
+        if layout_cache is not None:
+            MeasurementBlock.objects.bulk_create([
+                build_block(exam, (
+                    (segment.name, segment.artery, segment.side, measurement)
+                    for segment, measurement in zip(exam_segments, exam_measurements)
+                ), layout_cache)
+                for exam, (_, exam_segments, exam_measurements) in zip(exams, built)
+            ])
+            return
+
+        segments: list[Segment] = []
+        measurements: list[Measurement] = []
+        for exam, (_, exam_segments, exam_measurements) in zip(exams, built):
+            for segment in exam_segments:
+                segment.exam = exam
+            segments.extend(exam_segments)
+            measurements.extend(exam_measurements)
+
+        Segment.objects.bulk_create(segments)
+        for segment, measurement in zip(segments, measurements):
+            measurement.segment = segment
+        Measurement.objects.bulk_create(measurements)
+
+
+def import_exams(
+    rows: Iterable[ImportRow],
+    created_by: str = IMPORT_SOURCE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Optional[Callable[[RowError], None]] = None,
+    max_errors: int = 100,
+    storage: str = "rows",
+) -> ImportSummary:
+    """
+    Validate and insert exams chunk by chunk.
+
+    Args:
+        rows (Iterable[ImportRow]): Parsed rows (see iter_import_rows()).
+        created_by (str): `created_by` for rows that do not set it.
+        chunk_size (int): Rows validated and inserted per transaction.
+        on_error (Callable, optional): Called with every rejected row.
+        max_errors (int): Rejected rows kept on the summary.
+        storage (str): "rows" (Segment + Measurement rows) or "compact" (one
+            MeasurementBlock per exam).
+
+    Returns:
+        ImportSummary: Created/failed counts and the first errors.
+    """
+    summary = ImportSummary()
+    blueprint_cache: dict = {}
+    layout_cache: Optional[dict] = {} if storage == COMPACT else None
+    chunk_size = max(1, chunk_size)
+
+    def reject(error: RowError) -> None:
+        summary.failed += 1
+        if len(summary.errors) < max_errors:
+            summary.errors.append(error)
+        if on_error is not None:
+            on_error(error)
+
+    def flush(chunk: list[ImportRow]) -> None:
+        built: list[tuple[Exam, list, list]] = []
+        lines: list[int] = []
+        for row in chunk:
+            try:
+                built.append(build_import_objects(row.data, created_by, blueprint_cache))
+                lines.append(row.line)
+            except ValidationError as e:
+                reject(RowError(row.line, e.message_dict))
+        if not built:
+            return
+        try:
+            _insert_chunk(built, layout_cache)
+        except DatabaseError as e:
+            logger.exception(f"Import chunk starting at line {lines[0]} failed")
+            for line in lines:
+                reject(RowError(line, {"row": [f"Database error: {e}"]}))
+            return
+        summary.created += len(built)
+
+    chunk: list[ImportRow] = []
+    for row in rows:
+        if row.data is None:
+            reject(RowError(row.line, {"row": [row.error]}))
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    logger.info(f"Bulk import finished: {summary.created} exams created, {summary.failed} rows rejected")
+    return summary
@@ -0,0 +1,265 @@
+# reports/services/calculation_jobs.py
+
+"""
+Calculation Job Queue
+
+A small database-backed queue for running exam calculators outside the web
+request. Views enqueue a `CalculationJob` and return its ID immediately; worker
+processes (`python manage.py run_calculation_workers`) claim and run jobs.
+
+Claiming is a conditional `UPDATE ... WHERE status = 'queued'`, so several
+workers can poll the same table without a broker and never run a job twice.
+While a job runs, its worker refreshes `heartbeat_at` (a background thread, and
+every progress report). A worker that dies mid-job stops doing so, and
+`requeue_stale_jobs()` puts its job back in the queue (up to a maximum number of
+attempts) once the heartbeat is older than the timeout; long-running jobs with a
+live worker are never requeued. Heartbeats and the final status write are
+conditional on the job still being "running" under the same worker, so a worker
+that lost its job cannot overwrite the new owner's state.
+"""
+
+import logging
+import socket
+import os
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reports.models import CalculationJob, Exam
+from reports.calculators.carotid_calculator import run_carotid_calculator
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+# Exam type → calculator entry point: runner(exam, on_progress) -> saved row count
+JOB_RUNNERS: dict[str, Callable[..., int]] = {
+    "carotid": run_carotid_calculator,
+}
+
+# Queued jobs inspected per claim attempt (others may be taken by competing workers)
+CLAIM_CANDIDATES = 10
+
+
+def default_worker_id(index: int = 0) -> str:
+    """
+    Build a worker identifier unique to this host and process, e.g. "host-1234-0".
+    """
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+def enqueue_calculation(exam: Exam) -> CalculationJob:
+    """
+    Queue a calculation for an exam.
+
+    If the exam already has a queued (not yet claimed) job, that job is returned
+    instead of adding a duplicate: it will read the latest measurements anyway.
+
+    Args:
+        exam (Exam): Exam to calculate.
+
+    Returns:
+        CalculationJob: The queued job.
+
+    Raises:
+        ValueError: If no calculator is registered for the exam type.
+    """
+    if exam.exam_type not in JOB_RUNNERS:
+        raise ValueError(f"No calculator registered for exam type '{exam.exam_type}'")
+
+    with transaction.atomic():
+        job = (
+            CalculationJob.objects
+            .filter(exam=exam, status=CalculationJob.STATUS_QUEUED)
+            .first()
+        )
+        if job is None:
+            job = CalculationJob.objects.create(exam=exam)
+            logger.info(f"Queued calculation job #{job.id} for exam ID {exam.id}")
+    return job
+
+
+def claim_next_job(worker_id: str) -> Optional[CalculationJob]:
+    """
+    Claim the oldest queued job for a worker.
+
+    Each candidate is taken with a conditional UPDATE; if another worker got
+    there first the UPDATE matches no row and the next candidate is tried.
+
+    Args:
+        worker_id (str): Identifier stored on the claimed job.
+
+    Returns:
+        Optional[CalculationJob]: The claimed job (status "running"), or None if the queue is empty.
+    """
+    candidates = list(
+        CalculationJob.objects
+        .filter(status=CalculationJob.STATUS_QUEUED)
+        .order_by("created_at", "id")
+        .values_list("id", "attempts")[:CLAIM_CANDIDATES]
+    )
+    for job_id, attempts in candidates:
+        now = timezone.now()
+        claimed = (
+            CalculationJob.objects
+            .filter(id=job_id, status=CalculationJob.STATUS_QUEUED)
+            .update(
+                status=CalculationJob.STATUS_RUNNING,
+                worker=worker_id,
+                attempts=attempts + 1,
+                progress=0,
+                error="",
+                started_at=now,
+                heartbeat_at=now,
+                finished_at=None,
+            )
+        )
+        if claimed:
+            logger.debug(f"Worker {worker_id} claimed calculation job #{job_id}")
+            return CalculationJob.objects.select_related("exam").get(id=job_id)
+    return None
+
+
+def _owned(job: CalculationJob):
+    """
+    The job's row, as long as it is still running under the worker that claimed it.
+    """
+    return CalculationJob.objects.filter(id=job.id, status=CalculationJob.STATUS_RUNNING, worker=job.worker)
+
+
+@contextmanager
+def _heartbeat(job: CalculationJob, interval: float):
+    """
+    Refresh the job's heartbeat every `interval` seconds from a background thread.
+    """
+    stop = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stop.wait(interval):
+                if not _owned(job).update(heartbeat_at=timezone.now()):
+                    logger.warning(f"Calculation job #{job.id} is no longer owned by worker {job.worker}")
+                    return
+        except Exception:
+            logger.exception(f"Heartbeat failed for calculation job #{job.id}")
+        finally:
+            connection.close()  # the thread's own connection
+
+    thread = threading.Thread(target=beat, name=f"calculation-job-{job.id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: CalculationJob, heartbeat: Optional[float] = None) -> CalculationJob:
+    """
+    Run a claimed job and record its outcome.
+
+    Progress reported by the calculator is written to the job row as it happens,
+    so the status endpoint can show it while the job runs. Progress reports and a
+    background thread keep the job's heartbeat fresh, so `requeue_stale_jobs()`
+    leaves it alone however long it runs.
+
+    Args:
+        job (CalculationJob): A job in the "running" state.
+        heartbeat (float, optional): Seconds between heartbeats. Defaults to
+            settings.CALCULATION_JOB_HEARTBEAT.
+
+    Returns:
+        CalculationJob: The job, refreshed with its final status.
+    """
+    if heartbeat is None:
+        heartbeat = getattr(settings, "CALCULATION_JOB_HEARTBEAT", 30.0)
+
+    def report_progress(percent: int) -> None:
+        _owned(job).update(progress=percent, heartbeat_at=timezone.now())
+
+    try:
+        with _heartbeat(job, heartbeat):
+            runner = JOB_RUNNERS[job.exam.exam_type]
+            saved = runner(job.exam, on_progress=report_progress)
+    except Exception as e:
+        logger.exception(f"Calculation job #{job.id} failed for exam ID {job.exam_id}")
+        finished = _owned(job).update(
+            status=CalculationJob.STATUS_FAILED,
+            error=str(e) or e.__class__.__name__,
+            finished_at=timezone.now(),
+        )
+    else:
+        logger.info(f"Calculation job #{job.id} succeeded for exam ID {job.exam_id}")
+        finished = _owned(job).update(
+            status=CalculationJob.STATUS_SUCCEEDED,
+            progress=100,
+            result={"segments_saved": saved},
+            finished_at=timezone.now(),
+        )
+
+    if not finished:
+        logger.warning(f"Calculation job #{job.id} was taken from worker {job.worker}; outcome not recorded")
+    job.refresh_from_db()
+    return job
+
+
+def process_next_job(worker_id: str) -> Optional[CalculationJob]:
+    """
+    Claim and run one job.
+
+    Args:
+        worker_id (str): Identifier of the calling worker.
+
+    Returns:
+        Optional[CalculationJob]: The finished job, or None if nothing was queued.
+    """
+    job = claim_next_job(worker_id)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+def requeue_stale_jobs(timeout: Optional[float] = None, max_attempts: Optional[int] = None) -> int:
+    """
+    Recover jobs left "running" by a worker that crashed or was killed.
+
+    A running job is stale once its heartbeat is older than `timeout`; jobs
+    whose worker is alive keep refreshing it and are never touched. Each
+    recovery is a conditional UPDATE on the status and the heartbeat, so a
+    heartbeat or completion that lands first wins. Jobs that still have
+    attempts left go back to "queued"; the rest are marked failed.
+
+    Args:
+        timeout (float, optional): Seconds without a heartbeat after which a
+            running job counts as stale. Defaults to settings.CALCULATION_JOB_TIMEOUT.
+        max_attempts (int, optional): Claims allowed per job. Defaults to
+            settings.CALCULATION_JOB_MAX_ATTEMPTS.
+
+    Returns:
+        int: Number of jobs re-queued or failed.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "CALCULATION_JOB_TIMEOUT", 300)
+    if max_attempts is None:
+        max_attempts = getattr(settings, "CALCULATION_JOB_MAX_ATTEMPTS", 3)
+
+    stale = CalculationJob.objects.filter(
+        status=CalculationJob.STATUS_RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=CalculationJob.STATUS_QUEUED,
+        worker="",
+    )
+    failed = stale.update(
+        status=CalculationJob.STATUS_FAILED,
+        error="Worker timed out",
+        finished_at=timezone.now(),
+    )
+
+    if requeued or failed:
+        logger.warning(f"Recovered stale calculation jobs: {requeued} re-queued, {failed} failed")
+    return requeued + failed
@@ -0,0 +1,129 @@
+# reports/services/cohort.py
+
+"""
+Cohort Queries
+
+Finds exams by derived findings, e.g. "right ICA stenosis ≥70% in 2025" or
+"any subclavian steal", for quality review.
+
+Findings are matched on the typed, indexed Measurement columns the calculator
+fills (stenosis_grade, derived_stenosis_category, derived_ica_cca_ratio,
+vertebral_flow; see reports/calculators/derived_columns.py), never on the
+calculated_fields JSON nor on the values the technologist entered:
+
+    exam.id IN (SELECT segment.exam_id FROM measurement JOIN segment
+                WHERE stenosis_grade >= 70 AND segment.side = 'right')
+
+Exam-level filters (status, exam_type, dates, ...) and keyset pagination are
+the worklist's (reports/services/worklist.py).
+
+Only exams in row storage are searched. Compact exams (reports/services/compact_store.py)
+keep their findings inside the packed MeasurementBlock, which has no indexed finding
+columns; they are excluded explicitly and must be unpacked (`compact_exams --unpack`)
+to appear in cohorts.
+"""
+
+import logging
+from typing import Iterable, Mapping
+
+from django.db.models import Q, QuerySet
+
+from reports.models import Exam, Measurement
+from reports.services.compact_store import ROWS
+from reports.services.worklist import filter_worklist
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+# Finding filters (query parameter → Measurement lookup)
+FINDING_FILTERS = {
+    "stenosis_min": ("stenosis_grade__gte", int),
+    "stenosis_max": ("stenosis_grade__lte", int),
+    "stenosis_category": ("derived_stenosis_category", str),
+    "ratio_min": ("derived_ica_cca_ratio__gte", float),
+    "ratio_max": ("derived_ica_cca_ratio__lte", float),
+    "vertebral_flow": ("vertebral_flow", str),
+}
+
+# Segment filters narrowing where a finding must occur
+SEGMENT_FILTERS = {
+    "artery": "segment__artery",
+    "side": "segment__side",
+    "segment": "segment__name",
+}
+
+# Columns returned for each matched segment (response key → Measurement column)
+FINDING_COLUMNS = {
+    "stenosis_category": "derived_stenosis_category",
+    "stenosis_grade": "stenosis_grade",
+    "ica_cca_ratio": "derived_ica_cca_ratio",
+    "vertebral_flow": "vertebral_flow",
+}
+
+
+def finding_filter(params: Mapping) -> Q:
+    """
+    Build the Measurement filter for the finding and segment parameters.
+
+    Raises:
+        ValueError: On a malformed number, an unknown vertebral flow, or when
+            no finding filter is given.
+    """
+    lookups = {}
+    for name, (lookup, cast) in FINDING_FILTERS.items():
+        value = params.get(name)
+        if value in (None, ""):
+            continue
+        try:
+            lookups[lookup] = cast(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid {name}: {value}") from e
+
+    if not lookups:
+        raise ValueError(f"At least one finding filter is required: {', '.join(FINDING_FILTERS)}")
+
+    flows = {value for value, _ in Measurement.VERTEBRAL_FLOWS}
+    if "vertebral_flow" in lookups and lookups["vertebral_flow"] not in flows:
+        raise ValueError(f"Invalid vertebral_flow: {lookups['vertebral_flow']} (expected one of {sorted(flows)})")
+
+    lookups.update({lookup: params[name] for name, lookup in SEGMENT_FILTERS.items() if params.get(name)})
+    return Q(**lookups)
+
+
+def filter_cohort(params: Mapping) -> QuerySet:
+    """
+    Exams in row storage with at least one segment matching the finding filters.
+
+    Compact exams are never returned (see the module notes).
+
+    Args:
+        params (Mapping): Finding filters (FINDING_FILTERS), segment filters
+            (artery, side, segment) and any worklist filter (status, exam_type,
+            date_from / date_to, ...).
+
+    Returns:
+        QuerySet: Matching exams (unordered; see paginate_worklist()).
+
+    Raises:
+        ValueError: On invalid parameters.
+    """
+    matches = Measurement.objects.filter(finding_filter(params)).values("segment__exam_id")
+    return filter_worklist(params, Exam.objects.filter(storage_mode=ROWS, id__in=matches))
+
+
+def cohort_findings(exam_ids: Iterable[int], params: Mapping) -> dict[int, list[dict]]:
+    """
+    The segments that matched the cohort filters, for a page of exams (one query).
+
+    Returns:
+        dict: Exam ID → [{"segment", "side", <FINDING_COLUMNS>}, ...] in segment order.
+    """
+    rows = (
+        Measurement.objects
+        .filter(finding_filter(params), segment__exam_id__in=list(exam_ids))
+        .order_by("segment__exam_id", "segment_id")
+        .values_list("segment__exam_id", "segment__name", "segment__side", *FINDING_COLUMNS.values())
+    )
+    findings: dict[int, list[dict]] = {}
+    for exam_id, name, side, *values in rows:
+        findings.setdefault(exam_id, []).append({"segment": name, "side": side, **dict(zip(FINDING_COLUMNS, values))})
+    return findings
@@ -0,0 +1,324 @@
+# reports/services/compact_store.py
+
+"""
+Compact Measurement Store
+
+Moves exams between row storage (one Segment + one Measurement row per segment)
+and compact storage (one MeasurementBlock per exam, see
+reports/models/measurement_block.py), and applies writes to compact exams.
+
+Reads need nothing from this module: `load_exam_snapshots()` decodes blocks
+into the usual snapshots, so calculators, serializers and report builders work
+unchanged. Writes that target Measurement rows branch here when
+`exam.storage_mode == "compact"`:
+
+  - segment PATCH          → update_block_measurements()
+  - calculator results     → save_block_calculated()
+  - bulk import (compact)  → build_block()
+
+Layouts (ordered segment list + default additional_data) are shared: every
+exam created from the same template version points at the same SegmentLayout.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Iterable, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from reports.calculators.derived_columns import derived_columns
+from reports.models import Exam, Measurement, MeasurementBlock, Segment, SegmentLayout
+from reports.models.measurement_block import NUMERIC_COLUMNS, TEXT_COLUMNS
+from reports.services.exam_snapshot import load_exam_snapshot, snapshot_from_block
+from reports.services.segment_updates import SegmentUpdateResult, clean_segment_updates
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+ROWS = "rows"
+COMPACT = "compact"
+
+
+class CompactStoreError(ValueError):
+    """Raised when an exam cannot be moved between storage modes."""
+
+
+# ========================
+# Layouts
+# ========================
+
+def _canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def layout_defaults(additional_data: dict) -> dict:
+    """
+    Default additional_data of a segment: unit entries keep their value, all
+    other keys start as None (the shape `SegmentBlueprint.new_additional_data()` creates).
+    """
+    return {key: value if key.endswith("_unit") else None for key, value in additional_data.items()}
+
+
+def get_layout(entries: list, cache: Optional[dict] = None) -> SegmentLayout:
+    """
+    Return the shared layout for these [name, artery, side, defaults] entries.
+
+    Args:
+        entries (list): Ordered layout entries.
+        cache (dict, optional): Fingerprint → SegmentLayout memo for one import or batch.
+
+    Returns:
+        SegmentLayout: Existing layout with the same fingerprint, or a new one.
+    """
+    fingerprint = hashlib.sha256(_canonical_json(entries).encode()).hexdigest()
+    if cache is not None and fingerprint in cache:
+        return cache[fingerprint]
+
+    layout, _ = SegmentLayout.objects.get_or_create(fingerprint=fingerprint, defaults={"segments": entries})
+    if cache is not None:
+        cache[fingerprint] = layout
+    return layout
+
+
+# ========================
+# Encoding
+# ========================
+
+def build_block(exam: Exam, segments: Iterable[tuple], layout_cache: Optional[dict] = None) -> MeasurementBlock:
+    """
+    Build an unsaved MeasurementBlock for `exam`.
+
+    Args:
+        exam (Exam): Owning exam (must have an id before the block is saved).
+        segments (Iterable[tuple]): (name, artery, side, measurement) in layout
+            order; `measurement` is a Measurement or a MeasurementSnapshot.
+        layout_cache (dict, optional): See get_layout().
+
+    Returns:
+        MeasurementBlock: The encoded block.
+    """
+    entries = []
+    columns: dict[str, list] = {column: [] for column in NUMERIC_COLUMNS}
+    text: dict[str, dict] = {}
+    extras: dict[str, dict] = {}
+    calculated: dict[str, dict] = {}
+
+    for name, artery, side, measurement in segments:
+        additional_data = dict(measurement.additional_data or {})
+        defaults = layout_defaults(additional_data)
+        entries.append([name, artery, side, defaults])
+
+        for column in NUMERIC_COLUMNS:
+            columns[column].append(getattr(measurement, column))
+        for column in TEXT_COLUMNS:
+            value = getattr(measurement, column)
+            if value:
+                text.setdefault(column, {})[name] = value
+        changed = {key: value for key, value in additional_data.items() if defaults[key] != value}
+        if changed:
+            extras[name] = changed
+        if measurement.calculated_fields:
+            calculated[name] = dict(measurement.calculated_fields)
+
+    return MeasurementBlock(
+        exam=exam,
+        layout=get_layout(entries, layout_cache),
+        numeric=MeasurementBlock.pack_columns(columns),
+        text=text,
+        extras=extras,
+        calculated=calculated,
+    )
+
+
+# ========================
+# Storage Mode Changes
+# ========================
+
+def pack_exam(exam: Exam) -> MeasurementBlock:
+    """
+    Move an exam from row storage to compact storage.
+
+    The block is built from the exam's snapshot, then the Segment and Measurement
+    rows are deleted, all in one transaction.
+
+    Raises:
+        CompactStoreError: If the exam is already compact or a segment has more
+            than one measurement (compact storage keeps exactly one).
+    """
+    if exam.storage_mode == COMPACT:
+        raise CompactStoreError(f"Exam {exam.id} is already in compact storage")
+
+    with transaction.atomic():
+        snapshot = load_exam_snapshot(exam.id)
+        crowded = [segment.name for segment in snapshot.segments if len(segment.measurements) > 1]
+        if crowded:
+            raise CompactStoreError(f"Exam {exam.id} has several measurements for: {', '.join(crowded)}")
+
+        block = build_block(exam, (
+            (segment.name, segment.artery, segment.side, segment.measurement)
+            for segment in snapshot.segments
+            if segment.measurement is not None
+        ))
+        block.save()
+        Segment.objects.filter(exam=exam).delete()  # cascades to measurements
+        Exam.objects.filter(id=exam.id).update(storage_mode=COMPACT)
+        exam.storage_mode = COMPACT
+
+    logger.info(f"Packed exam ID {exam.id} into compact storage ({len(snapshot.segments)} segments)")
+    return block
+
+
+def unpack_exam(exam: Exam) -> int:
+    """
+    Move an exam from compact storage back to Segment + Measurement rows.
+
+    Returns:
+        int: Number of segments recreated.
+
+    Raises:
+        CompactStoreError: If the exam is not in compact storage.
+    """
+    if exam.storage_mode != COMPACT:
+        raise CompactStoreError(f"Exam {exam.id} is not in compact storage")
+
+    with transaction.atomic():
+        block = MeasurementBlock.objects.select_related("layout").select_for_update().get(exam_id=exam.id)
+        snapshot = snapshot_from_block(block)
+
+        segments = Segment.objects.bulk_create([
+            Segment(exam=exam, name=segment.name, artery=segment.artery, side=segment.side)
+            for segment in snapshot.segments
+        ])
+        Measurement.objects.bulk_create([
+            Measurement(
+                segment=row,
+                **derived_columns(segment.measurement.calculated_fields),
+                **{column: getattr(segment.measurement, column) for column in NUMERIC_COLUMNS + TEXT_COLUMNS},
+                additional_data=dict(segment.measurement.additional_data),
+                calculated_fields=dict(segment.measurement.calculated_fields),
+            )
+            for row, segment in zip(segments, snapshot.segments)
+        ])
+        block.delete()
+        Exam.objects.filter(id=exam.id).update(storage_mode=ROWS)
+        exam.storage_mode = ROWS
+
+    logger.info(f"Unpacked exam ID {exam.id} into {len(segments)} segment rows")
+    return len(segments)
+
+
+# ========================
+# Writes
+# ========================
+
+def update_block_measurements(exam: Exam, payload: dict[str, dict]) -> SegmentUpdateResult:
+    """
+    Compact-storage counterpart of `apply_segment_updates()`.
+
+    Same payload, validation, result and side effects (invalid segments are
+    skipped and reported; fingerprint and pinned PDF are cleared on any change),
+    written as one UPDATE of the exam's block.
+    """
+    with transaction.atomic():
+        block = MeasurementBlock.objects.select_related("layout").select_for_update().get(exam_id=exam.id)
+        layout = {entry[0]: (index, entry[3]) for index, entry in enumerate(block.layout.segments)}
+        columns = block.unpack_columns()
+
+        changed_segments: dict[str, tuple] = {}
+        errors: dict[str, dict] = {}
+        updated_count = 0
+
+        for segment_name, updates in payload.items():
+            if segment_name not in layout:
+                logger.warning(f"No measurement found for segment '{segment_name}'")
+                continue
+            if not isinstance(updates, dict):
+                logger.warning(f"Ignoring non-object update for segment '{segment_name}'")
+                continue
+
+            try:
+                cleaned = clean_segment_updates(updates)
+            except ValidationError as e:
+                logger.warning(f"Skipping segment '{segment_name}' with invalid values: {e.message_dict}")
+                errors[segment_name] = e.message_dict
+                continue
+
+            index, defaults = layout[segment_name]
+            row_fields = []
+            for field, value in cleaned.items():
+                if field in NUMERIC_COLUMNS:
+                    if columns[field][index] != value:
+                        columns[field][index] = value
+                        row_fields.append(field)
+                elif field in TEXT_COLUMNS:
+                    current = block.text.get(field, {})
+                    if current.get(segment_name, "") != (value or ""):
+                        if value:
+                            block.text.setdefault(field, {})[segment_name] = value
+                        else:
+                            current.pop(segment_name, None)
+                        row_fields.append(field)
+                elif field == "additional_data":
+                    if {**defaults, **block.extras.get(segment_name, {})} != value:
+                        extras = {k: v for k, v in value.items() if k not in defaults or defaults[k] != v}
+                        if extras:
+                            block.extras[segment_name] = extras
+                        else:
+                            block.extras.pop(segment_name, None)
+                        row_fields.append(field)
+
+            if row_fields:
+                changed_segments[segment_name] = tuple(row_fields)
+            updated_count += 1
+            logger.debug(f"Updated segment '{segment_name}'")
+
+        if changed_segments:
+            block.numeric = MeasurementBlock.pack_columns(columns)
+            block.save(update_fields=["numeric", "text", "extras", "updated_at"])
+
+            # Stored results and the pinned report PDF no longer match these inputs
+            exam.invalidate_outputs(results=True)
+
+    return SegmentUpdateResult(updated=updated_count, changed=changed_segments, errors=errors)
+
+
+def save_block_calculated(exam_results: dict[int, dict[str, dict]]) -> int:
+    """
+    Write calculator output into the `calculated` map of compact exams.
+
+    Exams without a block are ignored; segments whose stored output is
+    byte-identical are not counted, and unchanged blocks are not rewritten.
+    Derived findings live only in `calculated`, the block's own field for
+    calculator output; the entered ratio and category columns are never touched.
+    `unpack_exam()` derives the typed finding columns from it.
+
+    Args:
+        exam_results (dict): Exam ID → segment name → calculated segment data.
+
+    Returns:
+        int: Number of segments whose results changed.
+    """
+    if not exam_results:
+        return 0
+
+    saved = 0
+    changed: list[MeasurementBlock] = []
+    for block in MeasurementBlock.objects.filter(exam_id__in=list(exam_results)).select_related("layout"):
+        names = set(block.layout.names)
+        block_saved = 0
+        for name, data in exam_results[block.exam_id].items():
+            if name not in names:
+                logger.warning(f"Measurement missing for segment '{name}' in exam ID {block.exam_id}")
+                continue
+            if _canonical_json(block.calculated.get(name, {})) == _canonical_json(data):
+                continue
+            block.calculated[name] = data
+            block_saved += 1
+        if block_saved:
+            changed.append(block)
+            saved += block_saved
+
+    if changed:
+        MeasurementBlock.objects.bulk_update(changed, ["calculated"])
+    return saved
@@ -1,16 +1,25 @@
 import logging
+from django.db import transaction
 from report_template.registry.template_registry import get_template
 from reports.models.exam import Exam
 from reports.models.segment import Segment
 from reports.models.measurements import Measurement
+from reports.models.counter import SequenceCounter
 
 logger = logging.getLogger(__name__)  # module-level logger
 
+# SequenceCounter row used to number placeholder patient names
+PLACEHOLDER_COUNTER = "placeholder_patient"
+
 
 def generate_placeholder_name(gender: str = "unspecified") -> str:
     """
     Generate a placeholder patient name when none is provided.
 
+    Numbers come from an atomically incremented counter row, so each call costs
+    one primary-key update (no table count) and concurrent check-ins never get
+    the same number.
+
     Example outputs:
         - "John Doe #001" (male)
         - "Jane Doe #002" (female)
@@ -22,7 +31,7 @@ def generate_placeholder_name(gender: str = "unspecified") -> str:
     Returns:
         str: Generated placeholder name.
     """
-    count = Exam.objects.count() + 1
+    count = SequenceCounter.next_value(PLACEHOLDER_COUNTER)
     if gender.lower() == "male":
         name = f"John Doe #{count:03}"
     elif gender.lower() == "female":
@@ -41,11 +50,18 @@ def create_exam_from_template(exam_type: str, site: str, patient_data: dict, cre
     Workflow:
         1. Load JSON template via registry.
         2. Create an Exam record with patient + study metadata.
-        3. Iterate through all template segments, creating Segment + Measurement rows.
+        3. Build Segment + Measurement rows in memory from the template's
+           precomputed segment blueprints.
         4. Initialize each measurement field (PSV, EDV, ICA/CCA ratio, etc.) to `None`.
         5. Store any declared unit overrides in `measurement.additional_data`.
         6. For non-core measurements (e.g. artery_diameter, ap_tr), initialize
            them in `measurement.additional_data` as well.
+        7. Insert segments and measurements with `bulk_create`.
+
+    Field placement and units are resolved once per template by the registry
+    (see `SegmentBlueprint`), not per exam.
+
+    All writes happen in a single transaction, so a failure leaves no partial exam.
 
     Args:
         exam_type (str): Exam type identifier (e.g., "carotid", "renal").
@@ -71,70 +87,55 @@ def create_exam_from_template(exam_type: str, site: str, patient_data: dict, cre
         gender = patient_data.get("gender", "unspecified")
         patient_name = patient_data.get("name") or generate_placeholder_name(gender)
 
-        # Step 3: Create base Exam
-        exam = Exam.objects.create(
-            patient_name=patient_name,
-            gender=gender,
-            mrn=patient_data.get("mrn", ""),
-            dob=patient_data.get("dob"),
-            accession=patient_data.get("accession", ""),
-            exam_type=exam_type,
-            exam_scope=patient_data.get("scope", ""),
-            exam_extent=patient_data.get("extent", ""),
-            cpt_code=patient_data.get("cpt_code", ""),
-            technique=patient_data.get("technique", ""),
-            operative_history=patient_data.get("operative_history", ""),
-            indication_code=patient_data.get("indication", ""),
-            created_by=created_by,
-            status="draft"
-        )
-        logger.info(
-            f"Exam created: id={exam.id}, type={exam_type}, "
-            f"patient={patient_name}, created_by={created_by}"
-        )
-
-        # Step 4: Create segments + measurements from template
-        for seg in template["segments"]:
-            segment = Segment.objects.create(
-                exam=exam,
-                name=seg["id"],
-                artery=seg["vessel"].lower(),
-                side=seg.get("side", "n/a")
+        with transaction.atomic():
+
+            # Step 3: Create base Exam
+            exam = Exam.objects.create(
+                patient_name=patient_name,
+                gender=gender,
+                mrn=patient_data.get("mrn", ""),
+                dob=patient_data.get("dob"),
+                accession=patient_data.get("accession", ""),
+                exam_type=exam_type,
+                exam_scope=patient_data.get("scope", ""),
+                exam_extent=patient_data.get("extent", ""),
+                cpt_code=patient_data.get("cpt_code", ""),
+                technique=patient_data.get("technique", ""),
+                operative_history=patient_data.get("operative_history", ""),
+                indication_code=patient_data.get("indication", ""),
+                created_by=created_by,
+                status="draft"
             )
-            logger.debug(f"Segment created: id={segment.id}, name={segment.name}")
-
-            measurement = Measurement.objects.create(segment=segment)
-
-            # Step 5: Initialize measurement fields
-            for m in seg.get("measurements", []):
-                # Handle both compact ["psv", "edv"] and verbose [{"name": "psv"}] styles
-                field_name = m if isinstance(m, str) else m.get("name")
-                if not field_name:
-                    continue
-
-                if hasattr(measurement, field_name):
-                    # Core fields: initialize on the model directly
-                    setattr(measurement, field_name, None)
-                else:
-                    # Non-core fields: initialize in additional_data
-                    measurement.additional_data[field_name] = None
-
-                # Step 6: Store units if available (from template or field-level)
-                units_map = template.get("units", {})  # global exam-level units override
-                field_unit = None
-
-                if isinstance(m, dict) and "unit" in m:
-                    # Verbose style provided its own unit
-                    field_unit = m["unit"]
-                elif field_name in units_map:
-                    # Compact style with units override block
-                    field_unit = units_map[field_name]
-
-                if field_unit:
-                    measurement.additional_data[f"{field_name}_unit"] = field_unit
-
-            measurement.save()
-            logger.debug(f"Measurement initialized for segment={segment.name}")
+            logger.info(
+                f"Exam created: id={exam.id}, type={exam_type}, "
+                f"patient={patient_name}, created_by={created_by}"
+            )
+
+            # Step 4: Build segments + measurements from precomputed template blueprints
+            segments: list[Segment] = []
+            measurements: list[Measurement] = []
+
+            for blueprint in template.blueprints:
+                segments.append(Segment(
+                    exam=exam,
+                    name=blueprint.segment_id,
+                    artery=blueprint.artery,
+                    side=blueprint.side
+                ))
+
+                # Steps 5–6: Core fields start as None; non-core fields + units live in additional_data
+                measurements.append(Measurement(
+                    additional_data=blueprint.new_additional_data(),
+                    **dict.fromkeys(blueprint.core_fields),
+                ))
+
+            # Step 7: Insert all rows with one query per table
+            Segment.objects.bulk_create(segments)
+            for segment, measurement in zip(segments, measurements):
+                measurement.segment = segment
+            Measurement.objects.bulk_create(measurements)
+
+            logger.debug(f"Created {len(segments)} segments + measurements for exam ID {exam.id}")
 
         return exam
 
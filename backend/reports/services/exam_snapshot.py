@@ -0,0 +1,247 @@
+# reports/services/exam_snapshot.py
+
+"""
+Exam Snapshot Loader
+
+Loads every segment of one or many exams, together with its measurement, in a
+single joined `values_list()` query and returns plain, read-only snapshots.
+
+The same snapshot feeds the calculator (`segment_dict()`), the conclusion
+generator (`segment_dict(include_calculated=True)`) and the serializers, so no
+caller has to walk `exam.segments` and probe measurements row by row.
+
+Exams in compact storage (Exam.storage_mode = "compact") have no Segment rows;
+their snapshots are decoded from the MeasurementBlock instead (one extra query,
+issued only when some requested exam returned no segment rows). Compact
+snapshots carry `id=None` for segments and measurements.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from reports.calculators.derived_columns import DERIVED_COLUMNS
+from reports.models import MeasurementBlock, Segment
+from reports.models.measurement_block import NUMERIC_COLUMNS, TEXT_COLUMNS
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+_EMPTY = MappingProxyType({})
+
+# Columns read by the snapshot query (segment columns, then MeasurementSnapshot field order)
+_SNAPSHOT_COLUMNS = (
+    "exam_id",
+    "id",
+    "name",
+    "artery",
+    "side",
+    "measurements__id",
+    "measurements__psv",
+    "measurements__edv",
+    "measurements__ica_cca_ratio",
+    "measurements__plaque_type",
+    "measurements__direction",
+    "measurements__waveform",
+    "measurements__stenosis_category",
+    "measurements__additional_data",
+    "measurements__calculated_fields",
+    *(f"measurements__{column}" for column in DERIVED_COLUMNS),
+)
+
+
+@dataclass(frozen=True)
+class MeasurementSnapshot:
+    """
+    Immutable view of one measurement row.
+    """
+    id: int
+    psv: Optional[float]
+    edv: Optional[float]
+    ica_cca_ratio: Optional[float]
+    plaque_type: str
+    direction: str
+    waveform: str
+    stenosis_category: str
+    additional_data: Mapping
+    calculated_fields: Mapping
+    derived: Mapping = field(default_factory=lambda: _EMPTY)  # stored DERIVED_COLUMNS values (row storage only)
+
+
+@dataclass(frozen=True)
+class SegmentSnapshot:
+    """
+    Immutable view of one segment and its measurements (ordered by ID).
+    """
+    exam_id: int
+    id: int
+    name: str
+    artery: str
+    side: str
+    measurements: tuple
+
+    @property
+    def measurement(self) -> Optional[MeasurementSnapshot]:
+        """
+        Returns:
+            Optional[MeasurementSnapshot]: The first measurement, or None if the segment has none.
+        """
+        return self.measurements[0] if self.measurements else None
+
+
+@dataclass(frozen=True)
+class ExamSnapshot:
+    """
+    Immutable view of an exam's segments, ordered as they were created.
+    """
+    exam_id: int
+    segments: tuple
+
+    def segment_dict(self, include_calculated: bool = False) -> dict[str, dict]:
+        """
+        Build the calculator input (same shape as `build_segment_dict()`).
+
+        A fresh mutable dict is returned on every call, so callers may annotate it freely.
+
+        Args:
+            include_calculated (bool): Merge stored `calculated_fields` into each
+                segment (used by the conclusion generator).
+
+        Returns:
+            dict[str, dict]: Segment name → measurement dictionary.
+        """
+        segment_data: dict[str, dict] = {}
+        for segment in self.segments:
+            m = segment.measurement
+            if m is None:
+                logger.warning(f"No measurement found for segment '{segment.name}' in exam {self.exam_id}")
+                continue
+            data = {
+                "psv": m.psv,
+                "edv": m.edv,
+                "direction": m.direction,
+                "waveform": m.waveform,
+                "cca_psv": None,
+                "morphology": None,
+                "plaque": None,
+            }
+            if include_calculated:
+                data.update(m.calculated_fields)
+            segment_data[segment.name] = data
+        return segment_data
+
+    def measurement_rows(self) -> list[tuple[int, str, Mapping, Mapping]]:
+        """
+        Returns:
+            list: (measurement_id, segment name, stored calculated_fields, stored
+                derived columns) for every segment with a measurement, as consumed
+                by `persist_calculated_fields()`.
+        """
+        return [
+            (segment.measurement.id, segment.name, dict(segment.measurement.calculated_fields),
+             segment.measurement.derived)
+            for segment in self.segments
+            if segment.measurement is not None
+        ]
+
+
+def load_exam_snapshots(
+    exam_ids: Iterable[int],
+    segment_names: Optional[Iterable[str]] = None,
+) -> dict[int, ExamSnapshot]:
+    """
+    Load snapshots for many exams with a single joined query.
+
+    Args:
+        exam_ids (Iterable[int]): Exam primary keys.
+        segment_names (Iterable[str], optional): Restrict the snapshot to these
+            segments (used by incremental recalculation); defaults to all.
+
+    Returns:
+        dict[int, ExamSnapshot]: Exam ID → snapshot (empty for exams without segments).
+    """
+    exam_ids = list(exam_ids)
+    segments_by_exam: dict[int, list[tuple]] = {exam_id: [] for exam_id in exam_ids}
+
+    rows = Segment.objects.filter(exam_id__in=exam_ids)
+    if segment_names is not None:
+        rows = rows.filter(name__in=list(segment_names))
+    rows = rows.order_by("exam_id", "id", "measurements__id").values_list(*_SNAPSHOT_COLUMNS)
+    for exam_id, segment_id, name, artery, side, measurement_id, *values in rows:
+        segments = segments_by_exam[exam_id]
+        if not segments or segments[-1][0] != segment_id:
+            segments.append((segment_id, name, artery, side, []))
+        if measurement_id is None:
+            continue  # segment without a measurement (LEFT JOIN row)
+
+        *scalars, additional_data, calculated_fields = values[:-len(DERIVED_COLUMNS)]
+        segments[-1][4].append(MeasurementSnapshot(
+            measurement_id,
+            *scalars,
+            additional_data=MappingProxyType(additional_data) if additional_data else _EMPTY,
+            calculated_fields=MappingProxyType(calculated_fields) if calculated_fields else _EMPTY,
+            derived=MappingProxyType(dict(zip(DERIVED_COLUMNS, values[-len(DERIVED_COLUMNS):]))),
+        ))
+
+    snapshots = {
+        exam_id: ExamSnapshot(
+            exam_id=exam_id,
+            segments=tuple(
+                SegmentSnapshot(exam_id, segment_id, name, artery, side, tuple(measurements))
+                for segment_id, name, artery, side, measurements in segments
+            ),
+        )
+        for exam_id, segments in segments_by_exam.items()
+    }
+
+    # Exams without segment rows may keep their measurements in a compact block
+    empty = [exam_id for exam_id, segments in segments_by_exam.items() if not segments]
+    if empty:
+        names = None if segment_names is None else set(segment_names)
+        for block in MeasurementBlock.objects.filter(exam_id__in=empty).select_related("layout"):
+            snapshots[block.exam_id] = snapshot_from_block(block, names)
+
+    return snapshots
+
+
+def snapshot_from_block(block: MeasurementBlock, segment_names: Optional[set] = None) -> ExamSnapshot:
+    """
+    Decode a compact MeasurementBlock into the same snapshot shape as row storage.
+
+    Args:
+        block (MeasurementBlock): Block with its layout loaded.
+        segment_names (set, optional): Restrict the snapshot to these segments.
+
+    Returns:
+        ExamSnapshot: One measurement per layout segment, in layout order.
+    """
+    columns = block.unpack_columns()
+    segments = []
+    for index, (name, artery, side, defaults) in enumerate(block.layout.segments):
+        if segment_names is not None and name not in segment_names:
+            continue
+        extras = block.extras.get(name)
+        calculated = block.calculated.get(name)
+        measurement = MeasurementSnapshot(
+            None,
+            *(columns[column][index] for column in NUMERIC_COLUMNS),
+            *(block.text.get(column, {}).get(name, "") for column in TEXT_COLUMNS),
+            additional_data=MappingProxyType({**defaults, **extras}) if extras else MappingProxyType(defaults),
+            calculated_fields=MappingProxyType(calculated) if calculated else _EMPTY,
+        )
+        segments.append(SegmentSnapshot(block.exam_id, None, name, artery, side, (measurement,)))
+    return ExamSnapshot(exam_id=block.exam_id, segments=tuple(segments))
+
+
+def load_exam_snapshot(exam_id: int, segment_names: Optional[Iterable[str]] = None) -> ExamSnapshot:
+    """
+    Load the snapshot for a single exam (one query; a second one for compact exams).
+
+    Args:
+        exam_id (int): Exam primary key.
+        segment_names (Iterable[str], optional): Restrict the snapshot to these segments.
+
+    Returns:
+        ExamSnapshot: Read-only segment data for the exam.
+    """
+    return load_exam_snapshots([exam_id], segment_names)[exam_id]
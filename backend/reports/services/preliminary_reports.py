@@ -0,0 +1,173 @@
+# reports/services/preliminary_reports.py
+
+"""
+Materialized Conclusions
+
+The generated conclusion is stored in `PreliminaryReport` when the calculator
+runs (a full calculation, or a segment PATCH on an exam whose results were
+current), tagged with the exam's calculation fingerprint. Readers (the report
+screen polls the conclusion endpoint) get the stored text as long as the
+fingerprint still matches; it is regenerated only after measurements changed.
+Exams without current results are tagged with an input timestamp instead
+(see Exam.inputs_marker).
+
+Technologist edits win: once `text` was edited (see PreliminaryReport.is_edited),
+regeneration only refreshes `generated_text` and the edited text is served.
+"""
+
+import logging
+from typing import Optional
+
+from django.utils import timezone
+
+from reports.models import Exam, PreliminaryReport
+from reports.services.conclusion_generator import generate_conclusion
+from reports.services.exam_snapshot import ExamSnapshot, load_exam_snapshot
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+
+_GENERATED_FIELDS = ["text", "generated_text", "fingerprint", "updated_at"]
+
+
+def _apply_generated(report: PreliminaryReport, text: str, fingerprint: str) -> bool:
+    """
+    Put a freshly generated conclusion on `report` (unsaved), keeping technologist
+    edits to `text`. Returns True when anything changed.
+    """
+    if report.generated_text == text and report.fingerprint == fingerprint:
+        return False
+    if not report.is_edited:
+        report.text = text
+    report.generated_text = text
+    report.fingerprint = fingerprint
+    return True
+
+
+def _store_generated(exam: Exam, report: Optional[PreliminaryReport], text: str, fingerprint: str) -> PreliminaryReport:
+    """
+    Save a freshly generated conclusion, keeping technologist edits to `text`.
+    """
+    if report is None:
+        report = PreliminaryReport.objects.create(exam=exam, text=text, generated_text=text, fingerprint=fingerprint)
+        logger.debug(f"Created preliminary report for exam ID {exam.id}")
+    elif _apply_generated(report, text, fingerprint):
+        report.save(update_fields=_GENERATED_FIELDS)
+        logger.debug(f"Updated preliminary report for exam ID {exam.id} (edited text kept: {report.is_edited})")
+    exam.preliminary = report
+    return report
+
+
+def _stored_report(exam: Exam) -> Optional[PreliminaryReport]:
+    try:
+        return exam.preliminary
+    except PreliminaryReport.DoesNotExist:
+        return None
+
+
+def materialize_conclusion(exam: Exam, segments: dict[str, dict], fingerprint: str) -> PreliminaryReport:
+    """
+    Generate the conclusion from calculated segment data and store it for the exam.
+
+    A technologist-edited text is kept; only `generated_text` is refreshed.
+
+    Args:
+        exam (Exam): Exam the conclusion belongs to.
+        segments (dict): Segment name → data including calculated fields.
+        fingerprint (str): Calculation fingerprint of `segments` ("" if unknown).
+
+    Returns:
+        PreliminaryReport: The created or updated report.
+    """
+    report = PreliminaryReport.objects.filter(exam=exam).first()
+    return _store_generated(exam, report, generate_conclusion(segments), fingerprint)
+
+
+def materialize_conclusions(exam_segments: dict[int, dict[str, dict]], fingerprints: dict[int, str]) -> int:
+    """
+    Batch counterpart of `materialize_conclusion()` for many exams (batch re-scoring).
+
+    Existing reports are loaded in one query; new ones are inserted and changed
+    ones updated with one bulk statement each. Technologist edits are kept.
+    Pinned report PDFs are not touched here: the caller clears them together
+    with the exams' fingerprints.
+
+    Args:
+        exam_segments (dict): Exam ID → segment name → calculated segment data.
+        fingerprints (dict): Exam ID → calculation fingerprint of those results.
+
+    Returns:
+        int: Number of reports created or updated.
+    """
+    reports = {report.exam_id: report for report in PreliminaryReport.objects.filter(exam_id__in=list(exam_segments))}
+    created: list[PreliminaryReport] = []
+    changed: list[PreliminaryReport] = []
+
+    for exam_id, segments in exam_segments.items():
+        text = generate_conclusion(segments)
+        fingerprint = fingerprints.get(exam_id, "")
+        report = reports.get(exam_id)
+        if report is None:
+            created.append(PreliminaryReport(exam_id=exam_id, text=text, generated_text=text, fingerprint=fingerprint))
+        elif _apply_generated(report, text, fingerprint):
+            changed.append(report)
+
+    if created:
+        PreliminaryReport.objects.bulk_create(created)
+    if changed:
+        # bulk_update() skips auto_now, so stamp updated_at by hand.
+        now = timezone.now()
+        for report in changed:
+            report.updated_at = now
+        PreliminaryReport.objects.bulk_update(changed, _GENERATED_FIELDS)
+    logger.debug(f"Materialized conclusions: {len(created)} created, {len(changed)} updated")
+    return len(created) + len(changed)
+
+
+def get_current_conclusion(exam: Exam) -> str:
+    """
+    Return the exam's conclusion, regenerating it only if results changed.
+
+    Fast path: the stored text was edited by the technologist, or its marker
+    matches `exam.inputs_marker` (no query if the view loaded the exam with
+    `select_related("preliminary")`). Exams without current results match on
+    their input timestamp, so polling them stays on the fast path too.
+
+    Otherwise the conclusion is rebuilt from the stored calculated fields (one
+    snapshot query) and written back tagged with the current marker.
+
+    Args:
+        exam (Exam): Exam to read the conclusion for.
+
+    Returns:
+        str: Conclusion text.
+    """
+    report = _stored_report(exam)
+    if report is not None and (report.is_edited or report.is_current(exam)):
+        return report.text
+
+    segments = load_exam_snapshot(exam.id).segment_dict(include_calculated=True)
+    report = _store_generated(exam, report, generate_conclusion(segments), exam.inputs_marker)
+
+    logger.debug(f"Regenerated conclusion for exam ID {exam.id}")
+    return report.text
+
+
+def resolve_conclusion(exam: Exam, snapshot: ExamSnapshot) -> str:
+    """
+    Read-only variant of `get_current_conclusion()` for bulk exports.
+
+    Uses the materialized text when it is current or edited, otherwise generates
+    it from an already-loaded snapshot without writing anything back.
+
+    Args:
+        exam (Exam): Exam (load with select_related("preliminary")).
+        snapshot (ExamSnapshot): The exam's snapshot.
+
+    Returns:
+        str: Conclusion text.
+    """
+    report = _stored_report(exam)
+    if report is not None and (report.is_edited or report.is_current(exam)):
+        return report.text
+    return generate_conclusion(snapshot.segment_dict(include_calculated=True))
@@ -0,0 +1,169 @@
+# reports/services/segment_updates.py
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from reports.models import Exam, Measurement
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+# Measurement input columns a client may write through the segment PATCH endpoint.
+# Calculator-owned columns (calculated_fields and the derived findings) are not writable.
+UPDATABLE_MEASUREMENT_FIELDS = (
+    "psv",
+    "edv",
+    "ica_cca_ratio",
+    "plaque_type",
+    "direction",
+    "waveform",
+    "stenosis_category",
+    "additional_data",
+)
+
+_UPDATABLE_FIELDS = {name: Measurement._meta.get_field(name) for name in UPDATABLE_MEASUREMENT_FIELDS}
+
+
+@dataclass(frozen=True)
+class SegmentUpdateResult:
+    """
+    Outcome of a segment PATCH.
+
+    Attributes:
+        updated (int): Segments matched and updated.
+        changed (dict[str, tuple[str]]): Segment name → fields whose values
+            actually changed (the dirty set for incremental recalculation).
+        errors (dict[str, dict]): Segment name → {field: messages} for segments
+            skipped because a value was invalid.
+    """
+    updated: int
+    changed: dict
+    errors: dict = field(default_factory=dict)
+
+
+def clean_segment_updates(updates: dict) -> dict[str, Any]:
+    """
+    Validate one segment's updates with the Measurement fields themselves.
+
+    Fields that are not client-writable are ignored.
+
+    Args:
+        updates (dict): Field → raw value from the request.
+
+    Returns:
+        dict: Field → cleaned value.
+
+    Raises:
+        ValidationError: With a field → messages dict.
+    """
+    cleaned: dict[str, Any] = {}
+    errors: dict[str, list] = {}
+    for name, value in updates.items():
+        model_field = _UPDATABLE_FIELDS.get(name)
+        if model_field is None:
+            logger.debug(f"Ignoring non-writable measurement field '{name}'")
+            continue
+        if value is None and not model_field.null:
+            value = {} if name == "additional_data" else ""
+        try:
+            if name == "additional_data" and not isinstance(value, dict):
+                raise ValidationError("Must be an object of key → value.")
+            cleaned[name] = model_field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def apply_segment_updates(exam: Exam, payload: dict[str, dict]) -> SegmentUpdateResult:
+    """
+    Apply raw measurement updates for many segments with a constant number of queries.
+
+    Workflow:
+        1. Fetch every targeted measurement in one query, keyed by segment name.
+        2. Apply the field changes in memory, tracking which columns actually changed.
+        3. Persist all changed rows with a single `bulk_update` limited to those columns.
+
+    Each segment's values are validated first (`clean_segment_updates()`); a
+    segment with an invalid value is skipped and reported in `errors`, the
+    other segments are still applied.
+
+    Steps 1–3 run in one transaction, so a failure never leaves half-applied updates.
+    Any change also clears the exam's calculation fingerprint and pinned report
+    PDF, so the next calculate call recomputes and the next download re-renders.
+
+    Exams in compact storage are updated through
+    `compact_store.update_block_measurements()` with the same semantics.
+
+    Args:
+        exam (Exam): Exam whose segments are being edited.
+        payload (dict): Segment name → {field: value} mapping, e.g.
+            { "ica_prox_right": { "psv": 300, "edv": 100 } }
+
+    Returns:
+        SegmentUpdateResult: Updated segment count and the changed fields per segment.
+    """
+    if exam.storage_mode == "compact":
+        from reports.services.compact_store import update_block_measurements  # imports this module
+        return update_block_measurements(exam, payload)
+
+    with transaction.atomic():
+        # Step 1: One query for all targeted measurements (first measurement per segment)
+        measurements: dict[str, Measurement] = {}
+        rows = (
+            Measurement.objects
+            .filter(segment__exam=exam, segment__name__in=list(payload))
+            .select_related("segment")
+            .order_by("segment_id", "id")
+            .select_for_update()
+        )
+        for measurement in rows:
+            measurements.setdefault(measurement.segment.name, measurement)
+
+        # Step 2: Apply changes in memory
+        changed_rows: list[Measurement] = []
+        changed_fields: set[str] = set()
+        changed_segments: dict[str, tuple] = {}
+        errors: dict[str, dict] = {}
+        updated_count = 0
+
+        for segment_name, updates in payload.items():
+            measurement = measurements.get(segment_name)
+            if measurement is None:
+                logger.warning(f"No measurement found for segment '{segment_name}'")
+                continue
+            if not isinstance(updates, dict):
+                logger.warning(f"Ignoring non-object update for segment '{segment_name}'")
+                continue
+            try:
+                cleaned = clean_segment_updates(updates)
+            except ValidationError as e:
+                logger.warning(f"Skipping segment '{segment_name}' with invalid values: {e.message_dict}")
+                errors[segment_name] = e.message_dict
+                continue
+
+            row_fields = []
+            for name, value in cleaned.items():
+                if getattr(measurement, name) != value:
+                    setattr(measurement, name, value)
+                    row_fields.append(name)
+
+            if row_fields:
+                changed_rows.append(measurement)
+                changed_fields.update(row_fields)
+                changed_segments[segment_name] = tuple(row_fields)
+            updated_count += 1
+            logger.debug(f"Updated segment '{segment_name}'")
+
+        # Step 3: Persist with one UPDATE limited to the changed columns
+        if changed_rows:
+            Measurement.objects.bulk_update(changed_rows, sorted(changed_fields))
+
+            # Stored results and the pinned report PDF no longer match these inputs
+            exam.invalidate_outputs(results=True)
+
+    return SegmentUpdateResult(updated=updated_count, changed=changed_segments, errors=errors)
@@ -0,0 +1,263 @@
+# reports/services/synthetic_exams.py
+
+"""
+Synthetic Exam Generator
+
+Deterministic, clinically plausible exams for load tests and benchmarks
+(reports/tests/benchmarks/). Works for any template: segments, measured fields and
+units come from the template blueprints; values are drawn per vessel from
+VESSEL_PROFILES, with realistic prevalences of ICA stenosis, plaque, subclavian
+steal and bypass grafts.
+
+Exam `index` of a given `seed` is always the same exam (each exam has its own
+random stream), so a run of 100 exams is a prefix of a run of 10,000.
+
+Exams are produced in the bulk import row shape (see bulk_import.py) and
+inserted through `import_exams()`, so they are validated and written exactly
+like imported archives (rows or compact storage).
+"""
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+from report_template.registry.template_registry import get_template
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.services.bulk_import import DEFAULT_CHUNK_SIZE, ImportRow, ImportSummary, import_exams
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+SYNTHETIC_SOURCE = "synthetic"
+
+
+@dataclass(frozen=True)
+class VelocityProfile:
+    """
+    Normal-range velocities of one vessel (cm/s) and how often it is measured.
+
+    Attributes:
+        psv (tuple[float, float]): PSV mean and standard deviation.
+        edv (tuple[float, float]): EDV mean and standard deviation.
+        coverage (float): Probability that a segment of this vessel is measured.
+    """
+    psv: tuple
+    edv: tuple
+    coverage: float = 0.95
+
+
+VESSEL_PROFILES = {
+    "innominate": VelocityProfile(psv=(100, 20), edv=(15, 5)),
+    "subclavian": VelocityProfile(psv=(110, 25), edv=(5, 4)),
+    "cca": VelocityProfile(psv=(85, 18), edv=(22, 6)),
+    "bifurcation": VelocityProfile(psv=(75, 16), edv=(20, 6)),
+    "ica": VelocityProfile(psv=(80, 18), edv=(27, 7)),
+    "eca": VelocityProfile(psv=(95, 22), edv=(14, 5)),
+    "vertebral": VelocityProfile(psv=(50, 12), edv=(15, 5)),
+    "temporal": VelocityProfile(psv=(55, 12), edv=(12, 4), coverage=0.2),
+    "bypass_graft": VelocityProfile(psv=(90, 25), edv=(20, 7)),
+}
+DEFAULT_PROFILE = VelocityProfile(psv=(70, 18), edv=(18, 6))
+
+# Share of exams with a bypass graft (all graft segments measured together)
+GRAFT_PREVALENCE = 0.05
+
+# ICA stenosis bands per segment: (probability, PSV range, EDV range)
+ICA_STENOSIS_BANDS = (
+    (0.10, (125, 230), (40, 100)),   # moderate (50–69%)
+    (0.04, (230, 450), (100, 180)),  # severe (≥70%)
+)
+
+PLAQUE_VESSELS = frozenset({"cca", "bifurcation", "ica"})
+PLAQUE_TYPES = (("", 0.55), ("calcified", 0.2), ("heterogeneous", 0.15), ("soft", 0.1))
+
+STEAL_PREVALENCE = 0.02
+PRE_STEAL_PREVALENCE = 0.04
+PRE_STEAL_WAVEFORMS = ("bidirectional", "early_systolic_deceleration")
+
+# Dimensions (unit "cm"): mean, standard deviation, probability of being measured
+DIMENSION = (0.6, 0.12, 0.3)
+
+GENDERS = ("female", "male", "unknown")
+STATUSES = (("draft", 0.2), ("tech_signed", 0.3), ("finalized", 0.5))
+
+
+def _weighted(rng: random.Random, choices: tuple) -> str:
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def _positive(rng: random.Random, mean: float, sd: float, floor: float = 0.0) -> float:
+    return round(max(floor, rng.gauss(mean, sd)), 1)
+
+
+class SyntheticExamGenerator:
+    """
+    Deterministic synthetic exams for one template.
+
+    Example:
+        generator = SyntheticExamGenerator(seed=7)
+        rows = list(generator.rows(100))           # bulk import rows
+        segments = generator.segment_dict(0)       # calculator input of exam 0
+    """
+
+    def __init__(
+        self,
+        exam_type: str = "carotid",
+        site: str = DEFAULT_TEMPLATE_SITE,
+        seed: int = 0,
+        start_date: date = date(2024, 1, 1),
+    ):
+        self.exam_type = exam_type
+        self.site = site
+        self.seed = seed
+        self.start_date = start_date
+        self.blueprints = get_template(exam_type, site).blueprints
+
+    # -------------------------------
+    # Measurements
+    # -------------------------------
+    def _rng(self, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{index}")  # str seeds are stable across processes
+
+    def _segment_values(self, rng: random.Random, blueprint, has_graft: bool) -> Optional[dict]:
+        """
+        Measured values of one segment, or None when it was not examined.
+        """
+        profile = VESSEL_PROFILES.get(blueprint.artery, DEFAULT_PROFILE)
+        if blueprint.artery == "bypass_graft":
+            if not has_graft:
+                return None
+        elif rng.random() > profile.coverage:
+            return None
+
+        psv = _positive(rng, *profile.psv, floor=10)
+        edv = _positive(rng, *profile.edv)
+        if blueprint.artery == "ica":
+            draw = rng.random()
+            for probability, psv_range, edv_range in ICA_STENOSIS_BANDS:
+                if draw < probability:
+                    psv = round(rng.uniform(*psv_range), 1)
+                    edv = round(rng.uniform(*edv_range), 1)
+                    break
+                draw -= probability
+
+        values: dict = {}
+        for field, unit in blueprint.units.items():
+            if field == "psv":
+                values[field] = psv
+            elif field == "edv":
+                values[field] = min(edv, psv)
+            elif unit == "cm/s":
+                values[field] = _positive(rng, *profile.psv, floor=10)
+            elif unit == "cm":
+                mean, sd, rate = DIMENSION
+                if rng.random() < rate:
+                    values[field] = _positive(rng, mean, sd, floor=0.1)
+
+        if blueprint.artery in PLAQUE_VESSELS:
+            plaque = _weighted(rng, PLAQUE_TYPES)
+            if plaque:
+                values["plaque_type"] = plaque
+        if blueprint.artery == "vertebral":
+            draw = rng.random()
+            values["direction"] = "retrograde" if draw < STEAL_PREVALENCE else "antegrade"
+            if STEAL_PREVALENCE <= draw < STEAL_PREVALENCE + PRE_STEAL_PREVALENCE:
+                values["waveform"] = rng.choice(PRE_STEAL_WAVEFORMS)
+            else:
+                values["waveform"] = "normal"
+        return values
+
+    def segments(self, index: int) -> dict[str, dict]:
+        """
+        Measured segments of exam `index` (segment name → field values).
+        """
+        rng = self._rng(index)
+        has_graft = rng.random() < GRAFT_PREVALENCE
+        segments = {}
+        for blueprint in self.blueprints:
+            values = self._segment_values(rng, blueprint, has_graft)
+            if values:
+                segments[blueprint.segment_id] = values
+        return segments
+
+    # -------------------------------
+    # Output shapes
+    # -------------------------------
+    def exam_row(self, index: int) -> dict:
+        """
+        Exam `index` as a bulk import row (NDJSON shape).
+        """
+        rng = random.Random(f"{self.seed}:{index}:exam")
+        exam_date = self.start_date + timedelta(days=index % 365)
+        return {
+            "patient_name": f"Synthetic {self.seed}-{index:06d}",
+            "mrn": f"SYN{self.seed}-{index:06d}",
+            "accession": f"ACC{self.seed}-{index:06d}",
+            "gender": rng.choice(GENDERS),
+            "dob": (exam_date - timedelta(days=rng.randint(40 * 365, 90 * 365))).isoformat(),
+            "exam_date": exam_date.isoformat(),
+            "exam_type": self.exam_type,
+            "status": _weighted(rng, STATUSES),
+            "created_by": SYNTHETIC_SOURCE,
+            "site": self.site,
+            "segments": self.segments(index),
+        }
+
+    def rows(self, count: int, start: int = 0) -> Iterator[dict]:
+        """
+        Exams `start` .. `start + count - 1` as bulk import rows.
+        """
+        for index in range(start, start + count):
+            yield self.exam_row(index)
+
+    def segment_dict(self, index: int) -> dict[str, dict]:
+        """
+        Exam `index` as calculator input, shaped like `ExamSnapshot.segment_dict()`
+        (every template segment, unmeasured ones with None values).
+        """
+        measured = self.segments(index)
+        segment_data = {}
+        for blueprint in self.blueprints:
+            values = measured.get(blueprint.segment_id, {})
+            segment_data[blueprint.segment_id] = {
+                "psv": values.get("psv"),
+                "edv": values.get("edv"),
+                "direction": values.get("direction", ""),
+                "waveform": values.get("waveform", ""),
+                "cca_psv": None,
+                "morphology": None,
+                "plaque": None,
+            }
+        return segment_data
+
+
+def create_synthetic_exams(
+    count: int,
+    seed: int = 0,
+    exam_type: str = "carotid",
+    site: str = DEFAULT_TEMPLATE_SITE,
+    start: int = 0,
+    storage: str = "rows",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ImportSummary:
+    """
+    Insert `count` synthetic exams through the bulk import pipeline.
+
+    Args:
+        count (int): Number of exams.
+        seed (int): Generator seed.
+        exam_type (str): Template exam type.
+        site (str): Template site.
+        start (int): Index of the first exam (to extend an existing run).
+        storage (str): "rows" or "compact".
+        chunk_size (int): Exams inserted per transaction.
+
+    Returns:
+        ImportSummary: Created/failed counts.
+    """
+    generator = SyntheticExamGenerator(exam_type, site, seed)
+    rows = (ImportRow(line=start + offset + 1, data=row) for offset, row in enumerate(generator.rows(count, start)))
+    summary = import_exams(rows, created_by=SYNTHETIC_SOURCE, chunk_size=chunk_size, storage=storage)
+    logger.info(f"Created {summary.created} synthetic {exam_type} exams (seed={seed}, storage={storage})")
+    return summary
@@ -0,0 +1,151 @@
+# reports/services/worklist.py
+
+"""
+Exam Worklist
+
+Filtered exam lists (e.g. the physicians' "tech_signed" queue) with keyset
+pagination on (created_at, id), newest first.
+
+Instead of OFFSET, each page starts strictly after the last row of the previous
+one:
+
+    WHERE created_at <= :t AND (created_at < :t OR (created_at = :t AND id < :id))
+
+The ANDed `created_at <= :t` bound is redundant logically but lets the planner
+(Postgres cannot turn the OR alone into an index range) start a range scan on the
+composite (filter, -created_at, -id) indexes on Exam, so every page reads about
+`page_size + 1` rows no matter how deep the client scrolls.
+
+Cursors are opaque URL-safe strings encoding the last row's (created_at, id).
+"""
+
+import base64
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Mapping, Optional
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_date, parse_datetime
+
+from reports.models import Exam
+
+logger = logging.getLogger(__name__)  # module-level logger
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Query parameters compared for equality (all backed by indexes)
+EQUALITY_FILTERS = ("status", "exam_type", "reading_physician", "mrn", "accession")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, exam_id: int) -> str:
+    """
+    Encode a keyset position as an opaque cursor.
+    """
+    raw = f"{created_at.isoformat()}|{exam_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor produced by `encode_cursor()`.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, exam_id = raw.rsplit("|", 1)
+        created_at = parse_datetime(timestamp)
+        if created_at is None:
+            raise ValueError(timestamp)
+        return created_at, int(exam_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+@dataclass(frozen=True)
+class WorklistPage:
+    """
+    One page of the worklist.
+
+    Attributes:
+        exams (list[Exam]): Exams on the page, newest first.
+        next_cursor (str, optional): Cursor of the following page, None on the last page.
+    """
+    exams: list
+    next_cursor: Optional[str]
+
+
+def _parse_date_param(params: Mapping, name: str) -> Optional[date]:
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {name}: {value} (expected YYYY-MM-DD)")
+    return parsed
+
+
+def filter_worklist(params: Mapping, queryset: Optional[QuerySet] = None) -> QuerySet:
+    """
+    Apply worklist filters from query parameters.
+
+    Supported: status, exam_type, reading_physician, mrn, accession (exact) and
+    date_from / date_to (inclusive range on exam_date).
+
+    Raises:
+        ValueError: On a malformed date.
+    """
+    queryset = Exam.objects.all() if queryset is None else queryset
+
+    filters = {name: params[name] for name in EQUALITY_FILTERS if params.get(name)}
+    date_from = _parse_date_param(params, "date_from")
+    date_to = _parse_date_param(params, "date_to")
+    if date_from:
+        filters["exam_date__gte"] = date_from
+    if date_to:
+        filters["exam_date__lte"] = date_to
+
+    return queryset.filter(**filters)
+
+
+def paginate_worklist(queryset: QuerySet, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> WorklistPage:
+    """
+    Return one keyset page of `queryset`, ordered by (created_at, id) descending.
+
+    Args:
+        queryset (QuerySet): Filtered exams.
+        cursor (str, optional): `next_cursor` of the previous page.
+        page_size (int): Rows per page (clamped to 1..MAX_PAGE_SIZE).
+
+    Returns:
+        WorklistPage: The exams and the cursor of the next page.
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed.
+    """
+    page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+    queryset = queryset.order_by("-created_at", "-id")
+
+    if cursor:
+        created_at, exam_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lte=created_at),  # index range bound; the OR below only breaks ties
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=exam_id),
+        )
+
+    # One extra row tells whether another page exists
+    exams = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(exams) > page_size:
+        exams = exams[:page_size]
+        last = exams[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return WorklistPage(exams=exams, next_cursor=next_cursor)
@@ -1,42 +1,177 @@
 # reports/site/loader.py
 
+import hashlib
 import json
 import logging
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+
+from report_template.registry.frozen import FrozenDict, freeze
 
 logger = logging.getLogger(__name__)
 
-# Point to centralized template folder in report_template/templates
-BASE_DIR = Path(__file__).resolve().parents[2] / "report_template" / "templates"
+# Site criteria live under reports/site/<site>/criteria/<exam_type>.json
+SITE_DIR = Path(__file__).resolve().parent
+
+# Site used when an exam does not specify one
+DEFAULT_SITE = "mountsinai"
+
+# Site identifiers used elsewhere in the app (templates, exams) → criteria folder
+SITE_ALIASES = {
+    "mount_sinai_hospital": "mountsinai",
+    "mount_sinai_gp1c": "mountsinai",
+}
+
+
+class SiteCriteria(FrozenDict):
+    """
+    Frozen criteria for one (site, exam_type, version), tagged with their origin.
+
+    Attributes:
+        site (str): Criteria folder name (e.g., "mountsinai").
+        exam_type (str): Exam type (e.g., "carotid").
+        version (str): Value of the file's "version" key, or "unversioned".
+        fingerprint (str): SHA-256 of the file contents.
+    """
+
+    def __init__(self, data: dict, site: str, exam_type: str, version: str, fingerprint: str):
+        super().__init__(data)
+        self.site = site
+        self.exam_type = exam_type
+        self.version = version
+        self.fingerprint = fingerprint
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (dict(self), self.site, self.exam_type, self.version, self.fingerprint),
+        )
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    criteria: SiteCriteria
+
+
+_cache: dict[tuple[str, str, Optional[str]], _CacheEntry] = {}
+_cache_lock = threading.Lock()
+
+
+def resolve_site(site: Optional[str]) -> str:
+    """
+    Map a site identifier to its criteria folder name.
+
+    Args:
+        site (str, optional): Site identifier; None selects DEFAULT_SITE.
+
+    Returns:
+        str: Folder name under reports/site/.
+    """
+    site = site or DEFAULT_SITE
+    return SITE_ALIASES.get(site, site)
+
+
+def criteria_path(site: str, exam_type: str, version: Optional[str] = None) -> Path:
+    """
+    Build the criteria file path.
+
+    The active criteria are `<exam_type>.json`; pinned versions are kept alongside
+    as `<exam_type>@<version>.json`.
+    """
+    filename = f"{exam_type}.json" if version is None else f"{exam_type}@{version}.json"
+    return SITE_DIR / resolve_site(site) / "criteria" / filename
+
+
+def load_criteria(site: Optional[str], exam_type: str, version: Optional[str] = None) -> SiteCriteria:
+    """
+    Load site-specific criteria from an in-memory registry keyed by (site, exam_type, version).
+
+    Each file is parsed once. Later calls only `stat()` the file: if its mtime or
+    size changed, the contents are re-hashed and re-parsed only when the hash differs.
+
+    Args:
+        site (str, optional): Site identifier (aliases like "mount_sinai_hospital" are accepted).
+        exam_type (str): Exam type (e.g., "carotid").
+        version (str, optional): Pinned criteria version; None loads the active file.
+
+    Returns:
+        SiteCriteria: Immutable parsed criteria, shared between callers.
+
+    Raises:
+        FileNotFoundError: If the criteria file does not exist.
+        json.JSONDecodeError: If the file is present but invalid.
+    """
+    site = resolve_site(site)
+    key = (site, exam_type, version)
+    path = criteria_path(site, exam_type, version)
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{exam_type.title()} criteria not found at path: {path}") from None
+
+    entry = _cache.get(key)
+    if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+        return entry.criteria
+
+    with _cache_lock:
+        # Another thread may have refreshed the entry while we waited
+        entry = _cache.get(key)
+        if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry.criteria
 
+        raw = path.read_bytes()
+        fingerprint = hashlib.sha256(raw).hexdigest()
 
-def load_carotid_criteria(site: str = None) -> dict:
+        if entry and entry.criteria.fingerprint == fingerprint:
+            # File was touched but not changed: keep the parsed object
+            criteria = entry.criteria
+        else:
+            logger.debug(f"📁 Parsing {exam_type} criteria for site '{site}': {path}")
+            data = freeze(json.loads(raw))
+            criteria = SiteCriteria(
+                data,
+                site=site,
+                exam_type=exam_type,
+                version=str(data.get("version", version or "unversioned")),
+                fingerprint=fingerprint,
+            )
+
+        _cache[key] = _CacheEntry(stat.st_mtime_ns, stat.st_size, criteria)
+        return criteria
+
+
+def load_carotid_criteria(site: str = None, version: Optional[str] = None) -> SiteCriteria:
     """
-    Load carotid criteria JSON from the centralized templates folder.
+    Load carotid criteria for a site.
 
     All criteria files live under:
-        report_template/templates/<exam_type>/<exam_type>.json
+        reports/site/<site>/criteria/<exam_type>.json
 
     Example:
-        report_template/templates/carotid/carotid.json
+        reports/site/mountsinai/criteria/carotid.json
 
     Args:
-        site (str, optional): Currently unused. Included for compatibility
-                            with previous interface.
+        site (str, optional): Site identifier; defaults to DEFAULT_SITE.
+        version (str, optional): Pinned criteria version.
 
     Returns:
-        dict: Parsed JSON containing stenosis thresholds and vertebral rules.
+        SiteCriteria: Immutable stenosis thresholds and vertebral rules.
 
     Raises:
-        FileNotFoundError: If carotid.json is not found.
+        FileNotFoundError: If the site's carotid.json is not found.
         json.JSONDecodeError: If the file is present but invalid.
     """
-    path = BASE_DIR / "carotid" / "carotid.json"
+    return load_criteria(site, "carotid", version)
 
-    logger.debug(f"📁 Resolved carotid criteria path: {path}")
 
-    if not path.exists():
-        raise FileNotFoundError(f"Carotid criteria not found at path: {path}")
-
-    with open(path, "r") as f:
-        return json.load(f)
+def clear_criteria_cache() -> None:
+    """
+    Drop every cached criteria entry (mainly for tests).
+    """
+    with _cache_lock:
+        _cache.clear()
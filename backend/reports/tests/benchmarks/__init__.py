@@ -0,0 +1,27 @@
+# reports/tests/benchmarks/__init__.py
+
+"""
+Shared settings of the benchmark suite (see conftest.py for how to run it).
+"""
+
+import os
+
+import pytest
+
+BENCHMARK_SEED = 2024
+
+LARGE = bool(os.environ.get("BENCHMARK_LARGE"))
+
+# Exams per benchmark call
+SIZES = [
+    1,
+    100,
+    pytest.param(10_000, marks=pytest.mark.skipif(not LARGE, reason="set BENCHMARK_LARGE=1")),
+]
+
+
+def rounds_for(size: int) -> int:
+    """
+    Timed rounds per benchmark: many for small inputs, one for 10k exams.
+    """
+    return max(1, min(20, 1000 // size))
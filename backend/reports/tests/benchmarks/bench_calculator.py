@@ -0,0 +1,51 @@
+# reports/tests/benchmarks/bench_calculator.py
+# pytest reports/tests/benchmarks/bench_calculator.py
+
+import copy
+
+import pytest
+
+from reports.calculators.carotid_batch_calculator import CarotidBatchCalculator
+from reports.calculators.carotid_calculator import CarotidCalculator
+from reports.calculators.dependency_graph import get_dependency_graph
+from reports.services.synthetic_exams import SyntheticExamGenerator
+from reports.site.site_loader import load_carotid_criteria
+
+from reports.tests.benchmarks import BENCHMARK_SEED, LARGE, SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def segment_dicts():
+    generator = SyntheticExamGenerator(seed=BENCHMARK_SEED)
+    return [generator.segment_dict(index) for index in range(10_000 if LARGE else 100)]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_carotid_calculator_run_all(measure, segment_dicts, size):
+    criteria = load_carotid_criteria()
+    graph = get_dependency_graph("carotid")
+
+    def setup():
+        return (copy.deepcopy(segment_dicts[:size]),), {}
+
+    def run_all(exams):
+        for segments in exams:
+            CarotidCalculator(segments, criteria, graph).run_all()
+
+    measure(run_all, size, setup=setup)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_carotid_batch_calculator_run_all(measure, segment_dicts, size):
+    criteria = load_carotid_criteria()
+    graph = get_dependency_graph("carotid")
+
+    def setup():
+        return (dict(enumerate(copy.deepcopy(segment_dicts[:size]))),), {}
+
+    def run_all(exam_segments):
+        CarotidBatchCalculator(exam_segments, criteria, graph).run_all()
+
+    measure(run_all, size, setup=setup)
@@ -0,0 +1,36 @@
+# reports/tests/benchmarks/bench_exam_factory.py
+# pytest reports/tests/benchmarks/bench_exam_factory.py
+
+import itertools
+
+import pytest
+
+from reports.calculators.dependency_graph import DEFAULT_TEMPLATE_SITE
+from reports.services.exam_factory import create_exam_from_template
+from reports.services.synthetic_exams import create_synthetic_exams
+
+from reports.tests.benchmarks import BENCHMARK_SEED, SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_create_exam_from_template(measure, size):
+    def create():
+        for index in range(size):
+            create_exam_from_template("carotid", DEFAULT_TEMPLATE_SITE, {"name": f"Bench {index}"}, created_by="bench")
+
+    measure(create, size)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", ["rows", "compact"])
+@pytest.mark.parametrize("size", SIZES)
+def test_bulk_import_synthetic_exams(measure, size, storage):
+    starts = itertools.count(step=size)  # fresh exam indexes every round
+
+    def create():
+        create_synthetic_exams(size, seed=BENCHMARK_SEED + 1, start=next(starts), storage=storage)
+
+    measure(create, size)
@@ -0,0 +1,32 @@
+# reports/tests/benchmarks/bench_segments.py
+# pytest reports/tests/benchmarks/bench_segments.py
+
+import pytest
+
+from reports.calculators.carotid_batch_calculator import load_segment_dicts_for_exams
+from reports.models import Exam
+from reports.types.segments.carotid_segments import build_segment_dict
+
+from reports.tests.benchmarks import SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_build_segment_dict(measure, synthetic_exam_ids, size):
+    exams = list(Exam.objects.filter(id__in=synthetic_exam_ids[:size]))
+
+    def build_all():
+        for exam in exams:
+            build_segment_dict(exam)
+
+    measure(build_all, size)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_load_segment_dicts_for_exams(measure, synthetic_exam_ids, size):
+    ids = synthetic_exam_ids[:size]
+
+    measure(lambda: load_segment_dicts_for_exams(ids), size)
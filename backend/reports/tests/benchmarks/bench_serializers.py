@@ -0,0 +1,40 @@
+# reports/tests/benchmarks/bench_serializers.py
+# pytest reports/tests/benchmarks/bench_serializers.py
+
+import pytest
+
+from reports.models import Exam
+from reports.serializers import CarotidExamSerializer
+from reports.services.exam_snapshot import load_exam_snapshots
+
+from reports.tests.benchmarks import SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_carotid_exam_serializer_snapshots(measure, synthetic_exam_ids, size):
+    """List-view fast path: one snapshot query for every exam."""
+    ids = synthetic_exam_ids[:size]
+
+    def serialize():
+        exams = list(Exam.objects.filter(id__in=ids).order_by("id"))
+        context = {"segment_snapshots": load_exam_snapshots(ids)}
+        return CarotidExamSerializer(exams, many=True, context=context).data
+
+    measure(serialize, size)
+
+
+# The prefetch binds one parameter per segment, beyond SQLite's limit at 10k exams
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 100])
+def test_carotid_exam_serializer_prefetch(measure, synthetic_exam_ids, size):
+    """ORM path: segments and measurements from the prefetch cache."""
+    ids = synthetic_exam_ids[:size]
+
+    def serialize():
+        exams = CarotidExamSerializer.prefetch_segments(Exam.objects.filter(id__in=ids).order_by("id"))
+        return CarotidExamSerializer(exams, many=True).data
+
+    measure(serialize, size)
@@ -0,0 +1,93 @@
+# reports/tests/benchmarks/bench_views.py
+# pytest reports/tests/benchmarks/bench_views.py
+
+"""
+End-to-end carotid API calls (URL routing, DRF, serializers, ORM), one request
+per exam, over the first `size` synthetic exams.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.calculators.result_cache import result_cache
+from reports.models import Exam
+
+from reports.tests.benchmarks import SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_calculate_view(measure, api_client, synthetic_exam_ids, size):
+    ids = synthetic_exam_ids[:size]
+
+    def setup():
+        # Force a full calculation: no stored fingerprint, no cached results
+        Exam.objects.filter(id__in=ids).update(calculation_fingerprint="")
+        result_cache.clear()
+        return (), {}
+
+    def calculate():
+        for exam_id in ids:
+            response = api_client.post(reverse("calculate-carotid", args=[exam_id]))
+            assert response.status_code == 200
+
+    measure(calculate, size, setup=setup)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_update_segments_view(measure, api_client, synthetic_exam_ids, size):
+    ids = synthetic_exam_ids[:size]
+    psv = iter(range(100, 10**9))  # a new value every round, so every PATCH writes
+
+    def patch():
+        value = next(psv)
+        for exam_id in ids:
+            response = api_client.patch(
+                reverse("update-carotid-segments", args=[exam_id]),
+                {"ica_prox_right": {"psv": value}, "cca_dist_right": {"psv": 80}},
+                format="json",
+            )
+            assert response.status_code == 200
+
+    measure(patch, size)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_conclusion_view(measure, api_client, synthetic_exam_ids, size):
+    ids = synthetic_exam_ids[:size]
+
+    def conclusions():
+        for exam_id in ids:
+            response = api_client.get(reverse("carotid-conclusion", args=[exam_id]))
+            assert response.status_code == 200
+
+    measure(conclusions, size)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_worklist_view(measure, api_client, synthetic_exam_ids, size):
+    """Walk the worklist with keyset pagination until `size` exams were listed."""
+    page_size = min(size, 100)
+
+    def walk():
+        params, listed = {"page_size": page_size}, 0
+        while listed < size:
+            response = api_client.get(reverse("exam-worklist"), params)
+            assert response.status_code == 200
+            listed += len(response.data["results"])
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+
+    measure(walk, size)
@@ -0,0 +1,94 @@
+# reports/tests/benchmarks/conftest.py
+
+"""
+Benchmark suite for the report engine hot paths (requires pytest-benchmark).
+
+Not part of the default test run (pytest.ini collects tests/test_*.py only):
+
+    pytest reports/tests/benchmarks/bench_*.py                       # 1 and 100 exams
+    BENCHMARK_LARGE=1 pytest reports/tests/benchmarks/bench_*.py     # + 10,000 exams
+    pytest reports/tests/benchmarks/bench_*.py --benchmark-autosave  # store a baseline
+    pytest reports/tests/benchmarks/bench_*.py --benchmark-compare   # compare with it
+
+Inputs come from the deterministic synthetic exam generator
+(reports/services/synthetic_exams.py, seed BENCHMARK_SEED), so numbers are
+comparable across runs and machines.
+
+Besides latency, every benchmark records one instrumented call in `extra_info`:
+    queries         SQL queries issued
+    alloc_peak_kib  tracemalloc peak
+    alloc_net_kib   memory still allocated after the call
+(stored with the results: --benchmark-json / --benchmark-autosave).
+"""
+
+import logging
+import tracemalloc
+
+import pytest
+from django.db import connection
+
+from reports.tests.benchmarks import BENCHMARK_SEED, LARGE, rounds_for
+from reports.models import Exam
+from reports.services.synthetic_exams import SYNTHETIC_SOURCE, create_synthetic_exams
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logging():
+    """
+    Hot paths log at DEBUG/INFO; measure them as production runs them (WARNING).
+    """
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope="session")
+def synthetic_exam_ids(django_db_setup, django_db_blocker) -> list[int]:
+    """
+    IDs of the largest size's synthetic exams, inserted once per session.
+    """
+    count = 10_000 if LARGE else 100
+    with django_db_blocker.unblock():
+        create_synthetic_exams(count, seed=BENCHMARK_SEED)
+        return list(
+            Exam.objects.filter(created_by=SYNTHETIC_SOURCE).order_by("id").values_list("id", flat=True)
+        )
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark `target` and attach query count and allocations of one extra call.
+
+    Usage:
+        measure(target, size)                 # target() per round
+        measure(target, size, setup=setup)    # setup() → (args, kwargs) before each round
+    """
+    def run(target, size, setup=None):
+        args, kwargs = setup() if setup else ((), {})
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        tracemalloc.start()
+        try:
+            # execute_wrapper (unlike CaptureQueriesContext) needs no DB access for pure-Python targets
+            with connection.execute_wrapper(count_query):
+                target(*args, **kwargs)
+            net, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        benchmark.extra_info.update({
+            "exams": size,
+            "queries": len(queries),
+            "alloc_peak_kib": round(peak / 1024, 1),
+            "alloc_net_kib": round(net / 1024, 1),
+        })
+        if setup is None:
+            return benchmark.pedantic(target, rounds=rounds_for(size), iterations=1)
+        return benchmark.pedantic(target, setup=setup, rounds=rounds_for(size))
+
+    return run
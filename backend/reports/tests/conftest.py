@@ -19,3 +19,26 @@ def mock_external_auth(monkeypatch):
 
     # Replace the real authenticate method
     monkeypatch.setattr(ExternalJWTAuthentication, "authenticate", fake_authenticate)
+
+
+@pytest.fixture
+def make_carotid_exam(db):
+    """
+    Factory for carotid exams created from the Mount Sinai template.
+
+    `make_carotid_exam(name, segments=None, **patient)` creates the exam and
+    applies `segments` ({segment name: Measurement field values}) with one
+    UPDATE per segment. Without `segments`, ica_prox_right gets PSV 300 / EDV 100.
+    """
+    from reports.models import Measurement
+    from reports.services.exam_factory import create_exam_from_template
+
+    def make(name="Carotid", segments=None, **patient):
+        exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": name, **patient}, created_by="tech")
+        if segments is None:
+            segments = {"ica_prox_right": {"psv": 300, "edv": 100}}
+        for segment_name, fields in segments.items():
+            Measurement.objects.filter(segment__exam=exam, segment__name=segment_name).update(**fields)
+        return exam
+
+    return make
@@ -0,0 +1,29 @@
+# reports/tests/pdf_helpers.py
+#
+# Top-level render functions for PdfRenderPool tests. They run inside spawned
+# worker processes, so this module must not import Django.
+
+import os
+import time
+
+
+def echo_pdf(html, base_url=None):
+    return b"%PDF-" + html.encode()
+
+
+def slow_pdf(html, base_url=None):
+    time.sleep(float(html))
+    return b"%PDF-slow"
+
+
+def worker_pid(html, base_url=None):
+    return str(os.getpid()).encode()
+
+
+def failing_pdf(html, base_url=None):
+    raise ValueError("bad markup")
+
+
+def slow_worker_pid(html, base_url=None):
+    time.sleep(float(html))
+    return str(os.getpid()).encode()
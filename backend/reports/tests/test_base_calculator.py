@@ -13,6 +13,7 @@ and ensure safe extraction, evaluation, and calculation from raw segment data.
 import pytest
 from decimal import Decimal
 from reports.calculators.base_calculator import (
+    compile_expression,
     resolve_value_from_segment,
     evaluate_expression_with_variables,
     calculate_from_segment,
@@ -109,6 +110,37 @@ def test_evaluate_expression_invalid_variable():
     assert result is None
 
 
+def test_evaluate_expression_rejects_function_calls():
+    """Should return None for anything other than plain arithmetic."""
+    variables = {"psv": 300}
+    assert evaluate_expression_with_variables("__import__('os')", variables) is None
+    assert evaluate_expression_with_variables("psv.real", variables) is None
+
+
+# -----------------------------------------------------------------------------
+# ✅ Tests for compile_expression
+# -----------------------------------------------------------------------------
+
+def test_compile_expression_is_cached_per_text():
+    """The same formula text should return the same compiled object."""
+    assert compile_expression("psv / cca_psv") is compile_expression("psv / cca_psv")
+
+
+def test_compile_expression_collects_variables():
+    """Variable names referenced by the formula are exposed for lookups."""
+    compiled = compile_expression("(psv - edv) / -psv + 1.5")
+    assert compiled.variables == frozenset({"psv", "edv"})
+    assert compiled.evaluate({"psv": Decimal("200"), "edv": Decimal("50")}) == Decimal("0.75")
+
+
+def test_compile_expression_raises_for_invalid_syntax():
+    """Invalid formulas fail loudly at compile time."""
+    with pytest.raises(ValueError):
+        compile_expression("psv /")
+    with pytest.raises(ValueError):
+        compile_expression("psv ** 2")
+
+
 # -----------------------------------------------------------------------------
 # ✅ Tests for calculate_from_segment
 # -----------------------------------------------------------------------------
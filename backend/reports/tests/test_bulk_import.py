@@ -0,0 +1,125 @@
+# reports/tests/test_bulk_import.py
+# pytest reports/tests/test_bulk_import.py -v
+
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.models import Exam, Measurement, Segment
+from reports.services.bulk_import import import_exams, iter_csv_rows, iter_ndjson_rows
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+def exam_row(mrn="MRN1", **extra):
+    return {
+        "patient_name": "Doe, Jane",
+        "mrn": mrn,
+        "dob": "1950-01-02",
+        "exam_date": "2019-05-06",
+        "status": "finalized",
+        "segments": {"ica_prox_right": {"psv": 250, "edv": 80, "waveform": "Monophasic", "artery_diameter": "0.6"}},
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+def test_import_creates_exams_with_template_segments():
+    summary = import_exams(iter_ndjson_rows(io.StringIO(ndjson(exam_row(), exam_row("MRN2")))))
+
+    assert (summary.created, summary.failed) == (2, 0)
+    exam = Exam.objects.get(mrn="MRN1")
+    assert (exam.source, exam.status, exam.exam_type, exam.created_by) == ("import", "finalized", "carotid", "import")
+    assert Segment.objects.filter(exam=exam).count() == 40
+    measurement = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert (measurement.psv, measurement.edv, measurement.waveform) == (250, 80, "Monophasic")
+    assert measurement.additional_data["artery_diameter"] == 0.6
+    assert measurement.additional_data["artery_diameter_unit"] == "cm"
+
+
+@pytest.mark.django_db
+def test_invalid_rows_are_reported_without_aborting():
+    rows = ndjson(
+        exam_row("OK1"),
+        "{not json",
+        exam_row("BAD", dob="yesterday"),
+        exam_row("BAD2", segments={"aorta_prox": {"psv": 1}}),
+        exam_row("BAD3", segments={"ica_prox_right": {"psv": "fast", "stenosis_category": "70%"}}),
+        exam_row("", status="signed"),
+        exam_row("OK2"),
+    )
+
+    summary = import_exams(iter_ndjson_rows(io.StringIO(rows)), chunk_size=2)
+
+    assert (summary.created, summary.failed) == (2, 5)
+    errors = {error.line: error.errors for error in summary.errors}
+    assert "row" in errors[2]
+    assert "dob" in errors[3]
+    assert "segments.aorta_prox" in errors[4]
+    assert set(errors[5]) == {"segments.ica_prox_right.psv", "segments.ica_prox_right.stenosis_category"}
+    assert set(errors[6]) == {"mrn", "status"}
+    assert set(Exam.objects.values_list("mrn", flat=True)) == {"OK1", "OK2"}
+
+
+@pytest.mark.django_db
+def test_import_uses_constant_queries_per_chunk(django_assert_num_queries):
+    rows = list(iter_ndjson_rows(io.StringIO(ndjson(*(exam_row(f"M{i}") for i in range(6))))))
+
+    # Per chunk: SAVEPOINT/RELEASE + one INSERT per table (1 exam × 40 measurements
+    # stays under SQLite's bound-parameter limit, so nothing is split into batches)
+    with django_assert_num_queries(6 * 5):
+        summary = import_exams(rows, chunk_size=1)
+
+    assert summary.created == 6
+
+
+def test_csv_rows_split_exam_and_measurement_columns():
+    text = "patient_name,mrn,history,ica_prox_right.psv,ica_prox_right.edv\nDoe,M1,,250,\n"
+
+    [row] = list(iter_csv_rows(io.StringIO(text)))
+
+    assert row.data == {
+        "patient_name": "Doe", "mrn": "M1", "history": None,
+        "segments": {"ica_prox_right": {"psv": "250", "edv": None}},
+    }
+
+
+@pytest.mark.django_db
+def test_import_endpoint_streams_csv():
+    body = "patient_name,mrn,status,ica_prox_right.psv\nDoe,C1,finalized,250\nRoe,,draft,abc\n"
+
+    response = APIClient().post(reverse("import-exams"), data=body, content_type="text/csv")
+
+    assert response.status_code == 200
+    assert (response.data["created"], response.data["failed"]) == (1, 1)
+    assert response.data["errors"][0]["line"] == 2
+    assert Exam.objects.get(mrn="C1").created_by == "test_user"
+
+
+@pytest.mark.django_db
+def test_import_endpoint_rejects_unknown_content_type():
+    response = APIClient().post(reverse("import-exams"), data="x", content_type="text/plain")
+
+    assert response.status_code == 415
+
+
+@pytest.mark.django_db
+def test_import_exams_command_writes_errors(tmp_path):
+    source = tmp_path / "archive.ndjson"
+    source.write_text(ndjson(exam_row("F1"), exam_row("F2", gender="robot")))
+    errors = tmp_path / "rejected.ndjson"
+    out = io.StringIO()
+
+    call_command("import_exams", str(source), "--errors", str(errors), "--created-by", "migrator", stdout=out)
+
+    assert "Imported 1 exams; 1 rows rejected." in out.getvalue()
+    assert Exam.objects.get(mrn="F1").created_by == "migrator"
+    rejected = [json.loads(line) for line in errors.read_text().splitlines()]
+    assert rejected[0]["line"] == 2
+    assert "gender" in rejected[0]["errors"]
@@ -0,0 +1,182 @@
+# reports/tests/test_calculation_jobs.py
+# pytest reports/tests/test_calculation_jobs.py -v
+
+from datetime import timedelta
+
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reports.models import CalculationJob, Measurement
+from reports.services.calculation_jobs import (
+    claim_next_job,
+    enqueue_calculation,
+    process_next_job,
+    requeue_stale_jobs,
+    run_job,
+)
+
+
+@pytest.fixture
+def exam(make_carotid_exam):
+    return make_carotid_exam("Job Patient")
+
+
+@pytest.mark.django_db
+def test_enqueue_reuses_pending_job(exam):
+    first = enqueue_calculation(exam)
+    second = enqueue_calculation(exam)
+
+    assert first.id == second.id
+    assert first.status == CalculationJob.STATUS_QUEUED
+    assert CalculationJob.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_claimed_job_cannot_be_claimed_twice(exam):
+    job = enqueue_calculation(exam)
+
+    claimed = claim_next_job("worker-a")
+    assert claimed.id == job.id
+    assert claimed.status == CalculationJob.STATUS_RUNNING
+    assert claimed.worker == "worker-a"
+    assert claimed.attempts == 1
+
+    assert claim_next_job("worker-b") is None
+
+
+@pytest.mark.django_db
+def test_process_next_job_runs_calculator(exam):
+    job = enqueue_calculation(exam)
+
+    finished = process_next_job("worker-a")
+
+    assert finished.id == job.id
+    assert finished.status == CalculationJob.STATUS_SUCCEEDED
+    assert finished.progress == 100
+    assert finished.result["segments_saved"] > 0
+    assert finished.finished_at is not None
+    ica = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert ica.calculated_fields["stenosis_category"]
+    assert process_next_job("worker-a") is None
+
+
+@pytest.mark.django_db
+def test_failed_job_records_error(exam, mocker):
+    mocker.patch.dict(
+        "reports.services.calculation_jobs.JOB_RUNNERS",
+        {"carotid": mocker.Mock(side_effect=RuntimeError("criteria missing"))},
+    )
+    enqueue_calculation(exam)
+
+    job = process_next_job("worker-a")
+
+    assert job.status == CalculationJob.STATUS_FAILED
+    assert job.error == "criteria missing"
+
+
+@pytest.mark.django_db
+def test_requeue_stale_jobs(exam):
+    job = enqueue_calculation(exam)
+    claim_next_job("dead-worker")
+    CalculationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+    assert requeue_stale_jobs(timeout=60, max_attempts=2) == 1
+    job.refresh_from_db()
+    assert job.status == CalculationJob.STATUS_QUEUED
+
+    # Second claim uses up the attempts: the next recovery fails the job
+    claim_next_job("dead-worker")
+    CalculationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+    assert requeue_stale_jobs(timeout=60, max_attempts=2) == 1
+    job.refresh_from_db()
+    assert job.status == CalculationJob.STATUS_FAILED
+
+
+@pytest.mark.django_db
+def test_requeue_skips_long_running_jobs_with_a_heartbeat(exam):
+    job = enqueue_calculation(exam)
+    claim_next_job("busy-worker")
+    CalculationJob.objects.filter(id=job.id).update(
+        started_at=timezone.now() - timedelta(hours=1),
+        heartbeat_at=timezone.now(),
+    )
+
+    assert requeue_stale_jobs(timeout=60, max_attempts=2) == 0
+    job.refresh_from_db()
+    assert (job.status, job.worker) == (CalculationJob.STATUS_RUNNING, "busy-worker")
+
+
+@pytest.mark.django_db
+def test_requeued_job_outcome_is_not_recorded_by_the_old_worker(exam, mocker):
+    job = enqueue_calculation(exam)
+    old = claim_next_job("slow-worker")
+
+    def lose_job(exam, on_progress):
+        # The job is requeued and claimed by another worker while this one runs
+        CalculationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeue_stale_jobs(timeout=60, max_attempts=3)
+        claim_next_job("new-worker")
+        on_progress(50)
+        return 1
+
+    mocker.patch.dict("reports.services.calculation_jobs.JOB_RUNNERS", {"carotid": lose_job})
+    finished = run_job(old)
+
+    assert (finished.status, finished.worker, finished.progress) == (CalculationJob.STATUS_RUNNING, "new-worker", 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_heartbeat_runs_during_the_job(exam, mocker):
+    job = enqueue_calculation(exam)
+    claimed = claim_next_job("worker-a")
+    CalculationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+    beats = threading.Event()
+
+    def slow_runner(exam, on_progress):
+        # No progress reports: only the heartbeat thread keeps the job alive
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not beats.is_set():
+            if CalculationJob.objects.get(id=job.id).heartbeat_at > timezone.now() - timedelta(seconds=60):
+                beats.set()
+            time.sleep(0.02)
+        assert requeue_stale_jobs(timeout=60) == 0
+        return 1
+
+    mocker.patch.dict("reports.services.calculation_jobs.JOB_RUNNERS", {"carotid": slow_runner})
+    finished = run_job(claimed, heartbeat=0.05)
+
+    assert beats.is_set()
+    assert finished.status == CalculationJob.STATUS_SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_burst_command_drains_queue(exam):
+    enqueue_calculation(exam)
+
+    call_command("run_calculation_workers", burst=True)
+
+    assert not CalculationJob.objects.exclude(status=CalculationJob.STATUS_SUCCEEDED).exists()
+
+
+@pytest.mark.django_db
+def test_async_calculate_endpoint_returns_job(exam):
+    client = APIClient()
+
+    response = client.post(reverse("calculate-carotid", args=[exam.id]) + "?async=true")
+    assert response.status_code == 202
+    job_id = response.data["job"]["id"]
+    assert response.data["job"]["status"] == "queued"
+
+    process_next_job("worker-a")
+
+    status_response = client.get(response.data["status_url"])
+    assert status_response.status_code == 200
+    assert status_response.data["id"] == job_id
+    assert status_response.data["status"] == "succeeded"
+    assert status_response.data["progress"] == 100
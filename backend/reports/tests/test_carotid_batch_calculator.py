@@ -0,0 +1,111 @@
+# reports/tests/test_carotid_batch_calculator.py
+# pytest reports/tests/test_carotid_batch_calculator.py -v
+
+import copy
+
+import pytest
+from reports.models import Exam, Segment, Measurement, PreliminaryReport
+from reports.calculators.carotid_calculator import CarotidCalculator
+from reports.calculators.carotid_batch_calculator import (
+    CarotidBatchCalculator,
+    run_carotid_calculator_batch,
+)
+from reports.tests.test_carotid_calculator import MOCK_CRITERIA
+
+
+def _sample_exam_segments():
+    return {
+        1: {
+            "prox_ica_right": {"psv": 100, "edv": 20, "cca_psv": 80},
+            "mid_ica_right": {"psv": 107, "edv": 30, "cca_psv": None},
+            "dist_ica_right": {"psv": 150, "edv": 40},
+            "prox_ica_left": {"psv": 200, "edv": 90, "cca_psv": 100},
+            "mid_ica_left": {"psv": 200, "edv": 90, "cca_psv": 40},
+            "dist_ica_left": {"psv": 200, "edv": None},
+        },
+        2: {
+            "prox_ica_right": {"psv": 300, "edv": 150, "cca_psv": 70},
+            "mid_ica_right": {"psv": 300, "edv": 100},
+            "dist_ica_right": {"psv": 201, "edv": 50, "cca_psv": 40},  # 5.025 rounding tie
+            "cca_dist_right": {"psv": None, "edv": None},
+            "vertebral_right": {"direction": "Retrograde", "waveform": ""},
+            "vertebral_left": {"direction": "antegrade", "waveform": "early_systolic_deceleration"},
+            "prox_vertebral_left": {"direction": "antegrade", "waveform": "normal"},
+        },
+    }
+
+
+def test_batch_results_match_scalar_calculator():
+    """Every segment annotated by the batch engine should equal the scalar output."""
+    batch_input = _sample_exam_segments()
+    scalar_input = copy.deepcopy(batch_input)
+
+    batch = CarotidBatchCalculator(batch_input, MOCK_CRITERIA)
+    batch.run_all()
+
+    for exam_id, segments in scalar_input.items():
+        CarotidCalculator(segments, MOCK_CRITERIA).run_all()
+        assert batch.get_segment_data()[exam_id] == segments
+
+
+def test_batch_calculator_handles_empty_input():
+    batch = CarotidBatchCalculator({}, MOCK_CRITERIA)
+    batch.run_all()
+    assert batch.get_segment_data() == {}
+
+
+@pytest.mark.django_db
+def test_run_carotid_calculator_batch_persists_results(mocker):
+    mocker.patch(
+        "reports.calculators.carotid_batch_calculator.load_carotid_criteria",
+        return_value=MOCK_CRITERIA,
+    )
+    exam_ids = []
+    for psv in (100, 300):
+        exam = Exam.objects.create(patient_name="Batch", mrn="B1", exam_type="carotid", created_by="tester")
+        segment = Segment.objects.create(exam=exam, name="prox_ica_right", artery="ica", side="right")
+        Measurement.objects.create(segment=segment, psv=psv, edv=150)
+        exam_ids.append(exam.id)
+
+    updated = run_carotid_calculator_batch(exam_ids, chunk_size=1)
+
+    assert updated == 2
+    categories = [
+        Measurement.objects.get(segment__exam_id=exam_id).calculated_fields["stenosis_category"]
+        for exam_id in exam_ids
+    ]
+    assert categories == ["0–19%", "80–99%"]
+
+
+@pytest.mark.django_db
+def test_run_carotid_calculator_batch_refreshes_outputs_of_rescored_exams(mocker):
+    mocker.patch(
+        "reports.calculators.carotid_batch_calculator.load_carotid_criteria",
+        return_value=MOCK_CRITERIA,
+    )
+    exams = []
+    for psv in (100, 300):
+        exam = Exam.objects.create(patient_name="Batch", mrn="B2", exam_type="carotid", created_by="tester")
+        segment = Segment.objects.create(exam=exam, name="prox_ica_right", artery="ica", side="right")
+        Measurement.objects.create(segment=segment, psv=psv, edv=150)
+        exams.append(exam)
+    edited, fresh = exams
+    PreliminaryReport.objects.create(exam=edited, text="Edited by tech", generated_text="old", fingerprint="old")
+    Exam.objects.filter(id__in=[e.id for e in exams]).update(status="finalized", report_pdf_key="reports/old.pdf")
+
+    run_carotid_calculator_batch([e.id for e in exams])
+
+    for exam in exams:
+        exam.refresh_from_db()
+        assert exam.calculation_fingerprint
+        assert exam.report_pdf_key == ""
+        assert exam.preliminary.fingerprint == exam.calculation_fingerprint
+        assert exam.preliminary.generated_text
+    assert edited.preliminary.text == "Edited by tech"
+    assert fresh.preliminary.text == fresh.preliminary.generated_text
+
+    # An unchanged re-run leaves the exams alone
+    Exam.objects.filter(id=fresh.id).update(report_pdf_key="reports/new.pdf")
+    run_carotid_calculator_batch([e.id for e in exams])
+    fresh.refresh_from_db()
+    assert fresh.report_pdf_key == "reports/new.pdf"
@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import ANY, MagicMock
+from reports.models import Exam, Segment, Measurement
 from reports.calculators.carotid_calculator import (
     CarotidCalculator,
     run_carotid_calculator,
@@ -16,7 +17,7 @@ MOCK_CRITERIA = {
         "20_39": {"psv_min": 105, "psv_max": 109},
         "40_59": {"psv_min": 110, "psv_max": 179},
         "60_79": {"psv_min": 180, "psv_max": 240, "edv_max": 134},
-        "80_99": {"psv_min": 241, "edv_min": 135},
+        "80_99": {"psv_min": 241, "edv_min": 135, "unconfirmed_label": "Uncertain (PSV >240, EDV not >135)"},
         "upgrade_if_ratio_gt": 4
     },
     "vertebral_rules": {
@@ -139,25 +140,45 @@ def test_log_all_segments_runs(caplog):
 # Calculator Helpers (New)
 # ------------------------------------------------------------------------------
 
-def test_save_segment_results_to_exam_saves_fields():
-    mock_exam = MagicMock()
-    mock_segment = MagicMock()
-    mock_measurement = MagicMock()
-
-    mock_exam.segments.get.return_value = mock_segment
-    mock_segment.measurement = mock_measurement
+@pytest.mark.django_db
+def test_save_segment_results_to_exam_saves_fields(django_assert_num_queries):
+    exam = Exam.objects.create(patient_name="Save", mrn="S1", exam_type="carotid", created_by="tester")
+    for name in ("prox_ica_right", "prox_ica_left"):
+        segment = Segment.objects.create(exam=exam, name=name, artery="ica")
+        Measurement.objects.create(segment=segment)
 
     data = {
-        "prox_ica_right": {
-            "stenosis_category": "60–79%",
-            "ica_cca_ratio": 2.2,
-        }
+        "prox_ica_right": {"stenosis_category": "60–79%", "ica_cca_ratio": 2.2},
+        "prox_ica_left": {"stenosis_category": "0–19%"},
     }
 
-    save_segment_results_to_exam(mock_exam, data)
+    # One SELECT + one bulk UPDATE for all segments
+    with django_assert_num_queries(2):
+        saved = save_segment_results_to_exam(exam, data)
+
+    assert saved == 2
+    measurement = Measurement.objects.get(segment__exam=exam, segment__name="prox_ica_right")
+    assert measurement.calculated_fields == data["prox_ica_right"]
+
+
+@pytest.mark.django_db
+def test_save_segment_results_to_exam_skips_unchanged_rows(django_assert_num_queries):
+    exam = Exam.objects.create(patient_name="Save", mrn="S2", exam_type="carotid", created_by="tester")
+    segment = Segment.objects.create(exam=exam, name="prox_ica_right", artery="ica")
+    measurement = Measurement.objects.create(
+        segment=segment, calculated_fields={"stenosis_category": "0–19%"},
+        derived_stenosis_category="0–19%", stenosis_grade=0,
+    )
+
+    with django_assert_num_queries(1):
+        saved = save_segment_results_to_exam(exam, {"prox_ica_right": {"stenosis_category": "0–19%"}})
 
-    assert mock_measurement.calculated_fields == data["prox_ica_right"]
-    mock_measurement.save.assert_called_once()
+    assert saved == 0
+
+    # Identical JSON but a stale finding column (e.g., a client-written grade) is repaired
+    Measurement.objects.filter(id=measurement.id).update(stenosis_grade=80)
+    assert save_segment_results_to_exam(exam, {"prox_ica_right": {"stenosis_category": "0–19%"}}) == 1
+    assert Measurement.objects.get(id=measurement.id).stenosis_grade == 0
 
 def test_run_carotid_calculator_executes(mocker):
     mock_exam = MagicMock()
@@ -167,8 +188,66 @@ def test_run_carotid_calculator_executes(mocker):
     mocker.patch("reports.calculators.carotid_calculator.load_carotid_criteria", return_value=MOCK_CRITERIA)
     mock_calc_instance = MagicMock()
     mocker.patch("reports.calculators.carotid_calculator.CarotidCalculator", return_value=mock_calc_instance)
+    mock_cache = mocker.patch("reports.calculators.carotid_calculator.result_cache")
+    mock_cache.get.return_value = None
+    mock_save = mocker.patch("reports.calculators.carotid_calculator.save_segment_results_to_exam")
+    mock_materialize = mocker.patch("reports.calculators.carotid_calculator.materialize_conclusion")
+    mocker.patch("reports.calculators.carotid_calculator.transaction")
 
     run_carotid_calculator(mock_exam)
 
     mock_calc_instance.run_all.assert_called_once()
     mock_calc_instance.get_segment_data.assert_called_once()
+    mock_save.assert_called_once_with(mock_exam, mock_calc_instance.get_segment_data.return_value, ANY)
+    mock_materialize.assert_called_once_with(mock_exam, mock_calc_instance.get_segment_data.return_value, ANY)
+
+
+# ------------------------------------------------------------------------------
+# Fingerprint / Result Cache
+# ------------------------------------------------------------------------------
+
+@pytest.fixture
+def calculated_exam(settings, make_carotid_exam):
+    from reports.calculators.result_cache import result_cache
+
+    settings.CALCULATION_RESULT_CACHE = None  # in-process tier only
+    result_cache.clear()
+    return make_carotid_exam("Cache")
+
+
+@pytest.mark.django_db
+def test_unchanged_exam_skips_calculation(calculated_exam, mocker, django_assert_num_queries):
+    assert run_carotid_calculator(calculated_exam) > 0
+    assert len(calculated_exam.calculation_fingerprint) == 64
+
+    run_all = mocker.spy(CarotidCalculator, "run_all")
+    # Only the snapshot read: no recompute, no writes
+    with django_assert_num_queries(1):
+        assert run_carotid_calculator(calculated_exam) == 0
+    run_all.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_identical_inputs_reuse_cached_results(calculated_exam, make_carotid_exam, mocker):
+    run_carotid_calculator(calculated_exam)
+    twin = make_carotid_exam("Twin")
+
+    run_all = mocker.spy(CarotidCalculator, "run_all")
+    run_carotid_calculator(twin)
+
+    run_all.assert_not_called()
+    assert twin.calculation_fingerprint == calculated_exam.calculation_fingerprint
+    stored = Measurement.objects.get(segment__exam=twin, segment__name="ica_prox_right").calculated_fields
+    assert stored["stenosis_category"]
+
+
+@pytest.mark.django_db
+def test_segment_update_invalidates_fingerprint(calculated_exam):
+    from reports.services.segment_updates import apply_segment_updates
+
+    run_carotid_calculator(calculated_exam)
+    apply_segment_updates(calculated_exam, {"ica_prox_right": {"psv": 120}})
+
+    calculated_exam.refresh_from_db()
+    assert calculated_exam.calculation_fingerprint == ""
+    assert run_carotid_calculator(calculated_exam) > 0
@@ -0,0 +1,53 @@
+# reports/tests/test_carotid_serializers.py
+# pytest reports/tests/test_carotid_serializers.py -v
+
+import pytest
+from reports.models import Exam, Measurement
+from reports.serializers.carotid import CarotidExamSerializer
+from reports.services.exam_snapshot import load_exam_snapshots
+
+
+@pytest.fixture
+def make_exam(make_carotid_exam):
+    def make(name):
+        exam = make_carotid_exam(name, {"ica_prox_right": {
+            "psv": 250, "edv": 90, "plaque_type": "calcified", "direction": "antegrade",
+            "calculated_fields": {"stenosis_category": "60–79%"},
+        }})
+        m = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+        m.additional_data["artery_diameter"] = 0.6
+        m.save()
+        Measurement.objects.create(segment=m.segment, psv=260)
+        return exam
+
+    return make
+
+
+@pytest.mark.django_db
+def test_snapshot_fast_path_matches_drf_output(make_exam):
+    exam = make_exam("Parity")
+
+    drf_data = CarotidExamSerializer(exam).data
+    fast_data = CarotidExamSerializer(
+        exam, context={"segment_snapshots": load_exam_snapshots([exam.id])}
+    ).data
+
+    assert fast_data["segments"] == drf_data["segments"]
+    ica = next(s for s in fast_data["segments"] if s["name"] == "ica_prox_right")
+    assert [m["psv"] for m in ica["measurements"]] == [250.0, 260.0]
+    assert ica["measurements"][0]["arteryDiameter"] == 0.6
+
+
+@pytest.mark.django_db
+def test_prefetched_list_serialization_uses_constant_queries(django_assert_num_queries, make_exam):
+    for index in range(3):
+        make_exam(f"List {index}")
+
+    queryset = CarotidExamSerializer.prefetch_segments(Exam.objects.all())
+
+    # Exams + segments + measurements, regardless of exam or segment count
+    with django_assert_num_queries(3):
+        data = CarotidExamSerializer(queryset, many=True).data
+
+    assert len(data) == 3
+    assert all(len(exam["segments"]) == 40 for exam in data)
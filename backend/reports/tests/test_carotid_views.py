@@ -104,3 +104,196 @@ def test_get_conclusion(api_client):
     response = api_client.get(conclusion_url)
     assert response.status_code == 200
     assert "conclusion" in response.data
+
+
+@pytest.mark.django_db
+def test_update_segments_persists_in_bulk(api_client, django_assert_max_num_queries):
+    from reports.models import Measurement
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Bulk Patch"}, created_by="tech")
+    payload = {
+        "ica_prox_right": {"psv": 300, "edv": 100, "direction": "antegrade"},
+        "cca_dist_right": {"psv": 75, "cca_psv": 70},
+        "not_a_segment": {"psv": 1},
+    }
+
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+    # Update (lock + bulk update) plus incremental recalculation (snapshot + bulk update)
+    with django_assert_max_num_queries(10):
+        response = api_client.patch(patch_url, payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["segments_updated"] == 2
+    ica = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert (ica.psv, ica.edv, ica.direction) == (300, 100, "antegrade")
+    assert Measurement.objects.get(segment__exam=exam, segment__name="cca_dist_right").psv == 75
+
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compact", [False, True])
+def test_update_segments_skips_invalid_segments(api_client, compact):
+    from reports.services.compact_store import pack_exam
+    from reports.services.exam_factory import create_exam_from_template
+    from reports.services.exam_snapshot import load_exam_snapshot
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Bad Patch"}, created_by="tech")
+    if compact:
+        pack_exam(exam)
+    payload = {
+        "ica_prox_right": {"psv": "abc", "edv": 50},
+        "cca_dist_right": {"psv": 80, "ica_cca_ratio": "1.5"},
+    }
+
+    response = api_client.patch(reverse("update-carotid-segments", args=[exam.id]), payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["segments_updated"] == 1
+    assert list(response.data["errors"]) == ["ica_prox_right"]
+    assert list(response.data["errors"]["ica_prox_right"]) == ["psv"]
+    measurements = {s.name: s.measurement for s in load_exam_snapshot(exam.id).segments}
+    assert (measurements["ica_prox_right"].psv, measurements["ica_prox_right"].edv) == (None, None)
+    assert (measurements["cca_dist_right"].psv, measurements["cca_dist_right"].ica_cca_ratio) == (80, 1.5)
+
+
+@pytest.mark.django_db
+def test_update_segments_ignores_calculator_owned_fields(api_client):
+    from reports.models import Measurement
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Owned"}, created_by="tech")
+    payload = {"ica_prox_right": {
+        "psv": 120, "calculated_fields": {"stenosis_category": "80–99%"},
+        "stenosis_grade": 80, "vertebral_flow": "steal", "derived_stenosis_category": "80–99%",
+    }}
+
+    api_client.patch(reverse("update-carotid-segments", args=[exam.id]) + "?recalculate=false", payload, format="json")
+
+    ica = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert ica.psv == 120
+    assert (ica.calculated_fields, ica.stenosis_grade, ica.vertebral_flow, ica.derived_stenosis_category) == ({}, None, "", "")
+
+@pytest.mark.django_db
+def test_update_segments_recalculates_dependents(api_client):
+    from reports.models import Measurement
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Dirty Patch"}, created_by="tech")
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+
+    response = api_client.patch(patch_url, {"ica_prox_right": {"psv": 300, "edv": 100}}, format="json")
+    assert response.data["segments_recalculated"] == ["ica_prox_right"]
+
+    # A CCA PSV edit recomputes the same-side ICA segments that divide by it
+    response = api_client.patch(patch_url, {"cca_dist_right": {"psv": 60}}, format="json")
+    assert response.data["segments_recalculated"] == [
+        "cca_dist_right", "ica_prox_right", "ica_mid_right", "ica_dist_right",
+    ]
+    ica = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert ica.calculated_fields["cca_psv"] == 60
+    assert ica.calculated_fields["ica_cca_ratio"] == 5.0
+
+    # Fields the ICA does not read leave it alone
+    response = api_client.patch(patch_url, {"cca_dist_right": {"edv": 20}}, format="json")
+    assert response.data["segments_recalculated"] == ["cca_dist_right"]
+
+    response = api_client.patch(patch_url + "?recalculate=false", {"cca_dist_right": {"psv": 100}}, format="json")
+    assert response.data["segments_recalculated"] == []
+
+
+@pytest.mark.django_db
+def test_conclusion_is_materialized_by_calculator(api_client, make_carotid_exam, django_assert_num_queries):
+    from reports.models import PreliminaryReport
+
+    exam = make_carotid_exam("Materialized")
+    api_client.post(reverse("calculate-carotid", args=[exam.id]))
+
+    report = PreliminaryReport.objects.get(exam=exam)
+    assert "Ica Prox Right" in report.text
+
+    # Served from PreliminaryReport with a single query
+    conclusion_url = reverse("carotid-conclusion", args=[exam.id])
+    with django_assert_num_queries(1):
+        response = api_client.get(conclusion_url)
+    assert response.data["conclusion"] == report.text
+
+    # A measurement edit re-materializes the text when the PATCH commits
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+    api_client.patch(patch_url, {"ica_prox_right": {"psv": 100, "edv": 20}}, format="json")
+    updated = PreliminaryReport.objects.get(exam=exam)
+    assert updated.text != report.text
+    assert updated.fingerprint == Exam.objects.get(id=exam.id).calculation_fingerprint != ""
+    with django_assert_num_queries(1):
+        response = api_client.get(conclusion_url)
+    assert response.data["conclusion"] == updated.text
+
+
+@pytest.mark.django_db
+def test_conclusion_of_stale_exam_stays_on_fast_path(api_client, django_assert_num_queries):
+    from reports.models import PreliminaryReport
+    from reports.services.exam_factory import create_exam_from_template
+
+    # Never calculated: generated once, then served from the stored report
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Stale"}, created_by="tech")
+    conclusion_url = reverse("carotid-conclusion", args=[exam.id])
+    first = api_client.get(conclusion_url).data["conclusion"]
+    report = PreliminaryReport.objects.get(exam=exam)
+    assert report.fingerprint == Exam.objects.get(id=exam.id).inputs_marker
+    with django_assert_num_queries(1):
+        assert api_client.get(conclusion_url).data["conclusion"] == first
+
+    # Inputs edited without recalculation: regenerated once, then fast again
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+    api_client.patch(patch_url + "?recalculate=false", {"ica_prox_right": {"psv": 120}}, format="json")
+    assert Exam.objects.get(id=exam.id).inputs_marker != report.fingerprint
+    api_client.get(conclusion_url)
+    assert PreliminaryReport.objects.get(exam=exam).fingerprint == Exam.objects.get(id=exam.id).inputs_marker
+    with django_assert_num_queries(1):
+        api_client.get(conclusion_url)
+
+
+@pytest.mark.django_db
+def test_patch_keeps_results_current(api_client):
+    from reports.calculators.carotid_calculator import run_carotid_calculator
+    from reports.models import Measurement
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Current"}, created_by="tech")
+    api_client.post(reverse("calculate-carotid", args=[exam.id]))
+
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+    api_client.patch(patch_url, {"cca_dist_right": {"psv": 80}}, format="json")
+
+    # The incremental results are the full calculation's: nothing left to recompute
+    exam.refresh_from_db()
+    stored = dict(Measurement.objects.filter(segment__exam=exam).values_list("segment__name", "calculated_fields"))
+    assert run_carotid_calculator(exam) == 0
+    exam.calculation_fingerprint = ""
+    run_carotid_calculator(exam)
+    assert dict(Measurement.objects.filter(segment__exam=exam).values_list("segment__name", "calculated_fields")) == stored
+
+
+@pytest.mark.django_db
+def test_edited_conclusion_survives_recalculation(api_client):
+    from reports.models import PreliminaryReport
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Edited"}, created_by="tech")
+    api_client.post(reverse("calculate-carotid", args=[exam.id]))
+    PreliminaryReport.objects.filter(exam=exam).update(text="Edited by the technologist.")
+
+    patch_url = reverse("update-carotid-segments", args=[exam.id])
+    api_client.patch(patch_url, {"ica_prox_right": {"psv": 300, "edv": 100}}, format="json")
+
+    report = PreliminaryReport.objects.get(exam=exam)
+    assert report.is_edited
+    assert report.text == "Edited by the technologist."
+    assert "Ica Prox Right" in report.generated_text
+    response = api_client.get(reverse("carotid-conclusion", args=[exam.id]))
+    assert response.data["conclusion"] == "Edited by the technologist."
+
+    # Also after the stored results went stale (e.g., ?recalculate=false)
+    api_client.patch(patch_url + "?recalculate=false", {"ica_prox_right": {"psv": 120}}, format="json")
+    response = api_client.get(reverse("carotid-conclusion", args=[exam.id]))
+    assert response.data["conclusion"] == "Edited by the technologist."
@@ -0,0 +1,162 @@
+# reports/tests/test_cohort.py
+# pytest reports/tests/test_cohort.py -v
+
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.calculators.carotid_batch_calculator import run_carotid_calculator_batch
+from reports.calculators.carotid_calculator import CarotidCalculator, run_carotid_calculator
+from reports.calculators.derived_columns import derived_columns, stenosis_grade
+from reports.models import Exam, Measurement
+from reports.services.cohort import cohort_findings, filter_cohort
+from reports.services.compact_store import pack_exam, unpack_exam
+from reports.tests.test_carotid_calculator import MOCK_CRITERIA
+
+
+@pytest.fixture
+def make_exam(make_carotid_exam):
+    def make(name, exam_date, **velocities):
+        """Create a calculated carotid exam; velocities map segment → (psv, edv)."""
+        exam = make_carotid_exam(name, {segment: {"psv": psv, "edv": edv} for segment, (psv, edv) in velocities.items()})
+        Exam.objects.filter(id=exam.id).update(exam_date=exam_date)
+        exam.refresh_from_db()
+        run_carotid_calculator(exam)
+        return exam
+
+    return make
+
+
+@pytest.fixture
+def cohort(make_exam):
+    return {
+        "right_high": make_exam("Right", date(2025, 3, 1), ica_prox_right=(300, 150)),
+        "left_high": make_exam("Left", date(2025, 3, 2), cca_ica_bpg_prox_left=(300, 150)),
+        "right_low": make_exam("Low", date(2025, 3, 3), ica_prox_right=(100, 20)),
+        "old_high": make_exam("Old", date(2023, 1, 1), ica_prox_right=(300, 150)),
+    }
+
+
+@pytest.mark.parametrize("category, grade", [
+    ("0–19%", 0),
+    ("60–79%", 60),
+    ("80–99%", 80),
+    ("≥70% (ICA/CCA > 4)", 70),
+    ("Uncertain (missing or high EDV)", None),
+    ("Uncertain (PSV >240, EDV not >135)", None),
+    ("", None),
+])
+def test_stenosis_grade_is_the_category_lower_bound(category, grade):
+    assert stenosis_grade(category) == grade
+
+
+def test_calculator_flags_vertebral_flow():
+    segments = {
+        "vertebral_right": {"direction": "retrograde", "waveform": ""},
+        "vertebral_left": {"direction": "antegrade", "waveform": "bidirectional"},
+        "prox_vertebral_left": {"direction": "antegrade", "waveform": "normal"},
+    }
+
+    calculator = CarotidCalculator(segments, MOCK_CRITERIA)
+    calculator.run_all()
+
+    flows = {name: derived_columns(data)["vertebral_flow"] for name, data in segments.items()}
+    assert flows == {"vertebral_right": "steal", "vertebral_left": "pre_steal", "prox_vertebral_left": "normal"}
+
+
+@pytest.mark.django_db
+def test_calculator_populates_typed_columns(cohort):
+    measurement = Measurement.objects.get(segment__exam=cohort["right_high"], segment__name="ica_prox_right")
+
+    assert measurement.derived_stenosis_category == measurement.calculated_fields["stenosis_category"] == "80–99%"
+    assert measurement.stenosis_grade == 80
+
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("calculate", [run_carotid_calculator, lambda exam: run_carotid_calculator_batch([exam.id])])
+def test_calculator_keeps_entered_ratio_and_category(calculate, make_carotid_exam):
+    exam = make_carotid_exam("Entered", {"ica_prox_right": {
+        "psv": 300, "edv": 150, "ica_cca_ratio": 4.5, "stenosis_category": "tech: >70%",
+    }})
+
+    calculate(exam)  # no CCA PSV: the calculator derives no ratio
+
+    measurement = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert (measurement.ica_cca_ratio, measurement.stenosis_category) == (4.5, "tech: >70%")
+    assert (measurement.derived_ica_cca_ratio, measurement.derived_stenosis_category) == (None, "80–99%")
+    assert list(filter_cohort({"stenosis_min": "80"})) == [exam]
+    assert not filter_cohort({"ratio_min": "4"}).exists()  # cohorts match derived findings only
+
+@pytest.mark.django_db
+def test_cohort_filters_by_grade_side_and_date(cohort):
+    any_side = filter_cohort({"stenosis_min": "70"})
+    right = filter_cohort({"stenosis_min": "70", "side": "right", "artery": "ica"})
+    right_2025 = filter_cohort({"stenosis_min": "70", "side": "right", "date_from": "2025-01-01"})
+
+    assert set(any_side) == {cohort["right_high"], cohort["left_high"], cohort["old_high"]}
+    assert set(right) == {cohort["right_high"], cohort["old_high"]}
+    assert list(right_2025) == [cohort["right_high"]]
+    with pytest.raises(ValueError):
+        filter_cohort({"side": "right"})  # no finding filter
+    with pytest.raises(ValueError):
+        filter_cohort({"stenosis_min": "severe"})
+
+
+@pytest.mark.django_db
+def test_cohort_matches_vertebral_flow(make_carotid_exam):
+    exam, batch_exam = (
+        make_carotid_exam(name, {"va_prox_right": {"direction": "retrograde"}}) for name in ("Steal", "Batch")
+    )
+
+    run_carotid_calculator(exam)
+    run_carotid_calculator_batch([batch_exam.id], site="mount_sinai_hospital")
+
+    assert set(filter_cohort({"vertebral_flow": "steal"})) == {exam, batch_exam}
+    assert cohort_findings([exam.id], {"vertebral_flow": "steal"})[exam.id] == [{
+        "segment": "va_prox_right", "side": "right", "stenosis_category": "",
+        "stenosis_grade": None, "ica_cca_ratio": None, "vertebral_flow": "steal",
+    }]
+    normal = Measurement.objects.get(segment__exam=exam, segment__name="va_mid_right")
+    assert normal.vertebral_flow == "normal"
+    with pytest.raises(ValueError):
+        filter_cohort({"vertebral_flow": "sideways"})
+
+
+@pytest.mark.django_db
+def test_cohort_excludes_compact_exams(cohort):
+    pack_exam(cohort["right_low"])
+    pack_exam(cohort["right_high"])
+
+    assert set(filter_cohort({"stenosis_min": "70", "side": "right"})) == {cohort["old_high"]}
+
+    unpack_exam(cohort["right_high"])  # restores the typed finding columns
+
+    assert set(filter_cohort({"stenosis_min": "70", "side": "right"})) == {cohort["right_high"], cohort["old_high"]}
+
+
+@pytest.mark.django_db
+def test_cohort_query_uses_grade_index(cohort):
+    if connection.vendor != "sqlite":
+        pytest.skip("query plan check is SQLite-specific")
+
+    plan = filter_cohort({"stenosis_min": "70", "side": "right"}).explain()
+
+    assert "measurement_grade_idx" in plan
+
+
+@pytest.mark.django_db
+def test_cohort_endpoint_lists_matching_segments(cohort):
+    client = APIClient()
+
+    response = client.get(reverse("exam-cohort"), {"stenosis_min": 70, "side": "right", "date_from": "2025-01-01"})
+    invalid = client.get(reverse("exam-cohort"), {"side": "right"})
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.data["results"]] == [cohort["right_high"].id]
+    assert response.data["results"][0]["findings"][0]["segment"] == "ica_prox_right"
+    assert response.data["results"][0]["findings"][0]["stenosis_grade"] == 80
+    assert invalid.status_code == 400
@@ -0,0 +1,180 @@
+# reports/tests/test_compact_store.py
+# pytest reports/tests/test_compact_store.py -v
+
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.calculators.carotid_batch_calculator import run_carotid_calculator_batch
+from reports.calculators.carotid_calculator import run_carotid_calculator
+from reports.models import Exam, Measurement, MeasurementBlock, PreliminaryReport, Segment, SegmentLayout
+from reports.serializers import CarotidExamSerializer
+from reports.services.bulk_import import import_exams, iter_ndjson_rows
+from reports.services.compact_store import CompactStoreError, pack_exam, unpack_exam
+from reports.services.exam_snapshot import load_exam_snapshot, load_exam_snapshots
+
+
+@pytest.fixture
+def make_exam(make_carotid_exam):
+    def make(name="Compact"):
+        exam = make_carotid_exam(name, {"ica_prox_right": {"psv": 300, "edv": 100, "plaque_type": "calcified"}})
+        measurement = Measurement.objects.get(segment__exam=exam, segment__name="cca_dist_right")
+        measurement.psv = 60
+        measurement.additional_data = {**measurement.additional_data, "artery_diameter": 0.7}
+        measurement.save()
+        return exam
+
+    return make
+
+
+@pytest.mark.django_db
+def test_pack_replaces_rows_with_one_block_and_keeps_the_snapshot(make_exam):
+    exam = make_exam()
+    before = load_exam_snapshot(exam.id)
+
+    pack_exam(exam)
+
+    after = load_exam_snapshot(exam.id)
+    assert not Segment.objects.filter(exam=exam).exists()
+    assert MeasurementBlock.objects.filter(exam=exam).count() == 1
+    assert Exam.objects.get(id=exam.id).storage_mode == "compact"
+    assert after.segment_dict(include_calculated=True) == before.segment_dict(include_calculated=True)
+    assert [(s.name, s.artery, s.side) for s in after.segments] == [(s.name, s.artery, s.side) for s in before.segments]
+    assert after.segments[0].measurement.additional_data == before.segments[0].measurement.additional_data
+    cca = next(s for s in after.segments if s.name == "cca_dist_right")
+    assert cca.measurement.additional_data["artery_diameter"] == 0.7
+
+
+@pytest.mark.django_db
+def test_unpack_restores_rows(make_exam):
+    exam = make_exam()
+    before = load_exam_snapshot(exam.id).segment_dict(include_calculated=True)
+    pack_exam(exam)
+
+    restored = unpack_exam(exam)
+
+    assert restored == Segment.objects.filter(exam=exam).count() == 40
+    assert not MeasurementBlock.objects.filter(exam=exam).exists()
+    assert load_exam_snapshot(exam.id).segment_dict(include_calculated=True) == before
+    with pytest.raises(CompactStoreError):
+        unpack_exam(exam)
+
+
+@pytest.mark.django_db
+def test_exams_from_one_template_share_a_layout(make_exam):
+    exams = [make_exam(f"P{i}") for i in range(3)]
+    for exam in exams:
+        pack_exam(exam)
+
+    assert SegmentLayout.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_mixed_storage_snapshots_load_together(django_assert_num_queries, make_exam):
+    rows_exam, compact_exam = make_exam("Rows"), make_exam("Packed")
+    pack_exam(compact_exam)
+
+    with django_assert_num_queries(2):
+        snapshots = load_exam_snapshots([rows_exam.id, compact_exam.id], ["ica_prox_right"])
+
+    assert snapshots[rows_exam.id].segment_dict() == snapshots[compact_exam.id].segment_dict()
+    assert [s.name for s in snapshots[compact_exam.id].segments] == ["ica_prox_right"]
+
+
+@pytest.mark.django_db
+def test_calculator_and_serializer_work_on_compact_exams(make_exam):
+    rows_exam, compact_exam = make_exam("Rows"), make_exam("Packed")
+    pack_exam(compact_exam)
+
+    run_carotid_calculator(rows_exam)
+    saved = run_carotid_calculator(compact_exam)
+
+    assert saved > 0
+    assert (load_exam_snapshot(compact_exam.id).segment_dict(include_calculated=True)
+            == load_exam_snapshot(rows_exam.id).segment_dict(include_calculated=True))
+    assert (CarotidExamSerializer(Exam.objects.get(id=compact_exam.id)).data["segments"]
+            == CarotidExamSerializer(Exam.objects.get(id=rows_exam.id)).data["segments"])
+
+
+@pytest.mark.django_db
+def test_batch_calculator_writes_compact_blocks(make_exam):
+    exam = make_exam()
+    pack_exam(exam)
+
+    updated = run_carotid_calculator_batch([exam.id], site="mount_sinai_hospital")
+
+    block = MeasurementBlock.objects.get(exam=exam)
+    assert updated > 0
+    assert block.calculated["ica_prox_right"]["stenosis_category"]
+
+
+
+@pytest.mark.django_db
+def test_calculator_keeps_entered_columns_of_compact_exams(make_exam):
+    exam = make_exam()
+    Measurement.objects.filter(segment__exam=exam, segment__name="ica_prox_right").update(
+        ica_cca_ratio=4.5, stenosis_category="tech: >70%",
+    )
+    pack_exam(exam)
+
+    run_carotid_calculator(exam)
+
+    ica = next(s for s in load_exam_snapshot(exam.id).segments if s.name == "ica_prox_right").measurement
+    assert (ica.ica_cca_ratio, ica.stenosis_category) == (4.5, "tech: >70%")
+    assert ica.calculated_fields["stenosis_category"] != "tech: >70%"
+
+    unpack_exam(exam)
+    measurement = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert (measurement.ica_cca_ratio, measurement.stenosis_category) == (4.5, "tech: >70%")
+    assert measurement.derived_stenosis_category == ica.calculated_fields["stenosis_category"]
+
+@pytest.mark.django_db
+def test_segment_patch_updates_compact_block(make_exam):
+    exam = make_exam()
+    Exam.objects.filter(id=exam.id).update(calculation_fingerprint="f" * 64)
+    exam.refresh_from_db()
+    pack_exam(exam)
+    url = reverse("update-carotid-segments", args=[exam.id])
+
+    response = APIClient().patch(url, {"cca_dist_right": {"psv": 50, "waveform": "biphasic"}}, format="json")
+
+    assert response.status_code == 200
+    cca = next(s for s in load_exam_snapshot(exam.id).segments if s.name == "cca_dist_right").measurement
+    assert (cca.psv, cca.waveform) == (50.0, "biphasic")
+    ica = next(s for s in load_exam_snapshot(exam.id).segments if s.name == "ica_prox_right").measurement
+    assert ica.calculated_fields["cca_psv"] == 50
+    # Results were current before the edit: the fingerprint and conclusion are refreshed
+    fingerprint = Exam.objects.get(id=exam.id).calculation_fingerprint
+    assert fingerprint not in ("", "f" * 64)
+    assert PreliminaryReport.objects.get(exam=exam).fingerprint == fingerprint
+
+
+@pytest.mark.django_db
+def test_compact_import_writes_blocks():
+    row = {"patient_name": "Imported", "mrn": "M1", "exam_type": "carotid",
+           "segments": {"ica_prox_right": {"psv": 250, "edv": 80}}}
+
+    summary = import_exams(iter_ndjson_rows(io.StringIO(json.dumps(row) + "\n")), storage="compact")
+
+    exam = Exam.objects.get(mrn="M1")
+    assert summary.created == 1
+    assert exam.storage_mode == "compact"
+    assert not Segment.objects.filter(exam=exam).exists()
+    assert load_exam_snapshot(exam.id).segment_dict()["ica_prox_right"]["psv"] == 250
+
+
+@pytest.mark.django_db
+def test_compact_exams_command_round_trip(make_exam):
+    exam = make_exam()
+    Exam.objects.filter(id=exam.id).update(status="finalized")
+
+    call_command("compact_exams", "--status", "finalized", stdout=io.StringIO())
+    assert Exam.objects.get(id=exam.id).storage_mode == "compact"
+
+    call_command("compact_exams", str(exam.id), "--unpack", stdout=io.StringIO())
+    assert Exam.objects.get(id=exam.id).storage_mode == "rows"
+    assert Segment.objects.filter(exam=exam).count() == 40
@@ -0,0 +1,85 @@
+# reports/tests/test_dependency_graph.py
+# pytest reports/tests/test_dependency_graph.py -v
+
+import pytest
+
+from reports.calculators.carotid_calculator import CarotidCalculator
+from reports.calculators.dependency_graph import (
+    CAROTID_DEPENDENCY_RULES,
+    DependencyRule,
+    build_dependency_graph,
+    get_dependency_graph,
+)
+from reports.site.site_loader import load_carotid_criteria
+
+SEGMENTS = [
+    {"id": "ica_prox_right", "vessel": "ica", "side": "right", "position": "prox"},
+    {"id": "cca_prox_right", "vessel": "cca", "side": "right", "position": "prox"},
+    {"id": "cca_dist_right", "vessel": "cca", "side": "right", "position": "dist"},
+    {"id": "ica_prox_left", "vessel": "ica", "side": "left", "position": "prox"},
+    {"id": "cca_mid_left", "vessel": "cca", "side": "left", "position": "mid"},
+    {"id": "va_prox_left", "vessel": "vertebral", "side": "left", "position": "prox"},
+]
+
+
+def test_ica_reads_same_side_distal_cca_first():
+    graph = build_dependency_graph(SEGMENTS, CAROTID_DEPENDENCY_RULES)
+
+    assert [(i.field, i.source, i.source_field) for i in graph.inputs["ica_prox_right"]] == [
+        ("cca_psv", "cca_dist_right", "psv")
+    ]
+    # No distal CCA on the left: fall back to mid
+    assert graph.inputs["ica_prox_left"][0].source == "cca_mid_left"
+
+
+def test_order_puts_sources_before_readers():
+    graph = build_dependency_graph(SEGMENTS, CAROTID_DEPENDENCY_RULES)
+
+    assert graph.order.index("cca_dist_right") < graph.order.index("ica_prox_right")
+    assert graph.order.index("cca_mid_left") < graph.order.index("ica_prox_left")
+    assert set(graph.order) == {seg["id"] for seg in SEGMENTS}
+
+
+def test_affected_follows_only_read_fields():
+    graph = build_dependency_graph(SEGMENTS, CAROTID_DEPENDENCY_RULES)
+
+    assert graph.affected(["cca_dist_right"]) == ["cca_dist_right", "ica_prox_right"]
+    assert graph.affected({"cca_dist_right": ("edv",)}) == ["cca_dist_right"]
+    assert graph.affected({"cca_dist_right": ("psv",), "va_prox_left": None}) == [
+        "cca_dist_right", "ica_prox_right", "va_prox_left",
+    ]
+    assert graph.affected(["ica_prox_left", "unknown"]) == ["ica_prox_left", "unknown"]
+
+
+def test_cycle_is_rejected():
+    rules = (
+        DependencyRule("ica", "cca_psv", "cca", "psv", ("dist",)),
+        DependencyRule("cca", "ica_psv", "ica", "psv", ("prox",)),
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        build_dependency_graph(SEGMENTS, rules)
+
+
+def test_calculator_joins_cca_psv_from_graph():
+    graph = build_dependency_graph(SEGMENTS, CAROTID_DEPENDENCY_RULES)
+    segments = {
+        "ica_prox_right": {"psv": 300, "edv": 100, "cca_psv": None},
+        "cca_dist_right": {"psv": 75, "edv": 20},
+    }
+    calc = CarotidCalculator(segments, load_carotid_criteria("mountsinai"), graph)
+    calc.run_all()
+
+    assert segments["ica_prox_right"]["cca_psv"] == 75
+    assert segments["ica_prox_right"]["ica_cca_ratio"] == 4.0
+
+    # Incremental pass recomputes the ICA after a CCA change and clears stale output
+    segments["cca_dist_right"]["psv"] = None
+    assert calc.recalculate({"cca_dist_right": ["psv"]}) == ["cca_dist_right", "ica_prox_right"]
+    assert "ica_cca_ratio" not in segments["ica_prox_right"]
+
+
+def test_carotid_template_graph_is_cached():
+    graph = get_dependency_graph("carotid")
+
+    assert graph is get_dependency_graph("carotid")
+    assert graph.inputs["ica_prox_right"][0].source == "cca_dist_right"
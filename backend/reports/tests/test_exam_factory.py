@@ -39,3 +39,39 @@ def test_create_exam_from_carotid_template():
         assert segment.measurements.count() == 1
         m = segment.measurements.first()
         assert isinstance(m, Measurement)
+
+
+@pytest.mark.django_db
+def test_create_exam_uses_constant_number_of_queries(django_assert_max_num_queries):
+    patient_data = {"name": "Bulk Patient", "gender": "female", "mrn": "MRN999"}
+
+    # Exam insert + one bulk insert per table (+ savepoint bookkeeping)
+    with django_assert_max_num_queries(6):
+        exam = create_exam_from_template("carotid", "mount_sinai_hospital", patient_data, created_by="tech")
+
+    m = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert m.additional_data["psv_unit"] == "cm/s"
+    assert m.additional_data["artery_diameter"] is None
+
+
+@pytest.mark.django_db
+def test_placeholder_names_use_counter_not_table_count(django_assert_max_num_queries):
+    from reports.services.exam_factory import generate_placeholder_name
+
+    first = generate_placeholder_name("male")
+    Exam.objects.all().delete()  # numbering must not depend on table size
+
+    with django_assert_max_num_queries(4):
+        second = generate_placeholder_name("female")
+
+    first_number = int(first.split("#")[1])
+    assert first.startswith("John Doe #")
+    assert second == f"Jane Doe #{first_number + 1:03}"
+
+
+@pytest.mark.django_db
+def test_sequence_counter_creates_row_on_first_use():
+    from reports.models import SequenceCounter
+
+    assert SequenceCounter.next_value("test_counter") == 1
+    assert SequenceCounter.next_value("test_counter") == 2
@@ -0,0 +1,47 @@
+# reports/tests/test_exam_snapshot.py
+# pytest reports/tests/test_exam_snapshot.py -v
+
+import pytest
+from reports.models import Exam, Segment, Measurement
+from reports.services.exam_snapshot import load_exam_snapshot, load_exam_snapshots
+
+
+def _make_exam(mrn, segments):
+    exam = Exam.objects.create(patient_name="Snapshot", mrn=mrn, exam_type="carotid", created_by="tester")
+    for name, measurements in segments.items():
+        segment = Segment.objects.create(exam=exam, name=name, artery="ica", side="right")
+        for fields in measurements:
+            Measurement.objects.create(segment=segment, **fields)
+    return exam
+
+
+@pytest.mark.django_db
+def test_load_exam_snapshots_uses_one_query(django_assert_num_queries):
+    first = _make_exam("S1", {"ica_prox_right": [{"psv": 120}], "ica_mid_right": [{"psv": 90}]})
+    second = _make_exam("S2", {"ica_prox_right": [{"psv": 300, "calculated_fields": {"stenosis_category": "80–99%"}}]})
+
+    with django_assert_num_queries(1):
+        snapshots = load_exam_snapshots([first.id, second.id])
+
+    assert [s.name for s in snapshots[first.id].segments] == ["ica_prox_right", "ica_mid_right"]
+    assert snapshots[second.id].segment_dict()["ica_prox_right"]["psv"] == 300
+    assert snapshots[second.id].segment_dict(include_calculated=True)["ica_prox_right"]["stenosis_category"] == "80–99%"
+
+
+@pytest.mark.django_db
+def test_segment_dict_uses_first_measurement_and_skips_empty_segments():
+    exam = _make_exam("S3", {"ica_prox_right": [{"psv": 100}, {"psv": 999}], "eca_right": []})
+
+    snapshot = load_exam_snapshot(exam.id)
+
+    assert len(snapshot.segments) == 2
+    assert [m.psv for m in snapshot.segments[0].measurements] == [100, 999]
+    assert snapshot.segments[1].measurement is None
+    assert snapshot.segment_dict() == {
+        "ica_prox_right": {
+            "psv": 100, "edv": None, "direction": "", "waveform": "",
+            "cca_psv": None, "morphology": None, "plaque": None,
+        }
+    }
+    with pytest.raises(TypeError):
+        snapshot.segments[0].measurement.calculated_fields["x"] = 1
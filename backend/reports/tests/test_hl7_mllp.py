@@ -0,0 +1,278 @@
+# reports/tests/test_hl7_mllp.py
+# pytest reports/tests/test_hl7_mllp.py -v
+
+import asyncio
+import io
+import threading
+
+import pytest
+from django.core.management import call_command
+
+from reports.hl7.mllp import (
+    DiskSpool,
+    MllpConnection,
+    MllpConnectionPool,
+    MllpSender,
+    build_ack,
+    frame,
+    message_control_id,
+    parse_ack,
+    read_frame,
+)
+from reports.models import Exam
+from reports.services.exam_factory import create_exam_from_template
+
+
+def make_message(control_id):
+    return f"MSH|^~\\&|LUMEN|FAC|MIRTH|EMR|20250101000000||ORU^R01^ORU_R01|{control_id}|P|2.5.1\rPID|1||MRN\r"
+
+
+class StandInReceiver:
+    """
+    Local MLLP receiver running in its own thread/event loop.
+
+    Attributes:
+        ack_code (str): Code returned in every ACK.
+        hold (int): Buffer this many messages per connection, then ACK them in reverse order.
+        drop_first (bool): Close the first connection after reading one message, without ACK.
+    """
+
+    def __init__(self):
+        self.received: list[str] = []
+        self.connections = 0
+        self.ack_code = "AA"
+        self.hold = 1
+        self.delay = 0.0
+        self.drop_first = False
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        drop = self.drop_first and self.connections == 1
+        held = []
+        try:
+            while True:
+                message = await read_frame(reader)
+                self.received.append(message)
+                if drop:
+                    break
+                held.append(message)
+                if len(held) < self.hold:
+                    continue
+                await asyncio.sleep(self.delay)
+                for message in reversed(held):
+                    writer.write(frame(build_ack(message, self.ack_code)))
+                held.clear()
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+@pytest.fixture
+def receiver():
+    server = StandInReceiver().start()
+    yield server
+    server.stop()
+
+
+def test_ack_round_trip():
+    message = make_message("CTRL1")
+
+    ack = parse_ack(build_ack(message, "AE", "bad"))
+
+    assert message_control_id(message) == "CTRL1"
+    assert (ack.code, ack.control_id, ack.text, ack.accepted) == ("AE", "CTRL1", "bad", False)
+
+
+def test_pool_reuses_persistent_connections(receiver):
+    async def run():
+        async with MllpConnectionPool("127.0.0.1", receiver.port, size=2) as pool:
+            sender = MllpSender(pool)
+            return await sender.deliver_many(make_message(f"M{i}") for i in range(40))
+
+    results = asyncio.run(run())
+
+    assert all(result.delivered for result in results)
+    assert [result.control_id for result in results] == [f"M{i}" for i in range(40)]
+    assert len(receiver.received) == 40
+    assert receiver.connections == 2
+
+
+def test_pipelined_acks_are_correlated_by_control_id(receiver):
+    receiver.hold = 3  # the receiver answers three messages at a time, in reverse order
+
+    async def run():
+        connection = MllpConnection("127.0.0.1", receiver.port, max_in_flight=3)
+        try:
+            return await asyncio.gather(*(connection.send(make_message(f"P{i}")) for i in range(6)))
+        finally:
+            await connection.close()
+
+    acks = asyncio.run(run())
+
+    assert [ack.control_id for ack in acks] == [f"P{i}" for i in range(6)]
+    assert receiver.connections == 1
+
+
+def test_in_flight_limit_applies_backpressure(receiver):
+    receiver.delay = 0.02
+
+    async def run():
+        async with MllpConnectionPool("127.0.0.1", receiver.port, size=1, max_in_flight=2) as pool:
+            connection = pool.connections[0]
+            peak = 0
+
+            async def watch():
+                nonlocal peak
+                while True:
+                    peak = max(peak, connection.in_flight)
+                    await asyncio.sleep(0.001)
+
+            watcher = asyncio.create_task(watch())
+            results = await MllpSender(pool).deliver_many(make_message(f"B{i}") for i in range(10))
+            watcher.cancel()
+            return results, peak
+
+    results, peak = asyncio.run(run())
+
+    assert all(result.delivered for result in results)
+    assert peak == 2
+
+
+def test_deliver_many_bounds_workers_and_pulls_lazily():
+    class SlowPool:
+        capacity = 3
+        active = peak = done = 0
+
+        async def send(self, message):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.001)
+            self.active -= 1
+            self.done += 1
+            return parse_ack(build_ack(message))
+
+    pool, ahead = SlowPool(), []
+
+    def messages():
+        for i in range(20):
+            ahead.append(i + 1 - pool.done)  # messages pulled but not yet acknowledged
+            yield make_message(f"L{i}")
+
+    results = asyncio.run(MllpSender(pool).deliver_many(messages()))
+
+    assert [result.control_id for result in results] == [f"L{i}" for i in range(20)]
+    assert pool.peak == max(ahead) == pool.capacity
+
+
+def test_negative_ack_is_not_retried_or_spooled(receiver, tmp_path):
+    receiver.ack_code = "AE"
+    spool = DiskSpool(tmp_path)
+
+    async def run():
+        async with MllpConnectionPool("127.0.0.1", receiver.port, size=1) as pool:
+            return await MllpSender(pool, spool, backoff=0).deliver(make_message("N1"))
+
+    result = asyncio.run(run())
+
+    assert not result.delivered
+    assert result.ack.code == "AE"
+    assert len(receiver.received) == 1
+    assert len(spool) == 0
+
+
+def test_dropped_connection_is_retried_on_a_new_one(receiver):
+    receiver.drop_first = True
+
+    async def run():
+        async with MllpConnectionPool("127.0.0.1", receiver.port, size=1) as pool:
+            return await MllpSender(pool, backoff=0).deliver(make_message("R1"))
+
+    result = asyncio.run(run())
+
+    assert result.delivered
+    assert receiver.connections == 2
+
+
+def test_unreachable_destination_spools_then_drains(tmp_path):
+    spool = DiskSpool(tmp_path / "spool")
+    down = StandInReceiver().start()
+    port = down.port
+    down.stop()
+
+    async def send(port):
+        async with MllpConnectionPool("127.0.0.1", port, size=1, timeout=1) as pool:
+            return await MllpSender(pool, spool, retries=1, backoff=0).deliver(make_message("S1"))
+
+    result = asyncio.run(send(port))
+
+    assert not result.delivered
+    assert result.spooled is not None
+    assert spool.read(result.spooled) == make_message("S1")
+
+    up = StandInReceiver().start()
+    try:
+        async def drain():
+            async with MllpConnectionPool("127.0.0.1", up.port, size=1) as pool:
+                return await MllpSender(pool, spool).drain_spool()
+
+        drained = asyncio.run(drain())
+    finally:
+        up.stop()
+
+    assert [r.control_id for r in drained] == ["S1"]
+    assert drained[0].delivered
+    assert len(spool) == 0
+
+
+@pytest.mark.django_db
+def test_send_oru_messages_command(receiver, settings, tmp_path):
+    settings.HL7_MLLP_HOST = "127.0.0.1"
+    settings.HL7_MLLP_PORT = receiver.port
+    settings.HL7_SPOOL_DIR = tmp_path / "spool"
+    settings.HL7_MLLP_POOL_SIZE = 1
+    exams = [
+        create_exam_from_template("carotid", "mount_sinai_hospital", {"name": f"P{i}"}, created_by="tech")
+        for i in range(3)
+    ]
+    Exam.objects.filter(id__in=[exam.id for exam in exams]).update(status="finalized")
+    draft = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Draft"}, created_by="tech")
+    out = io.StringIO()
+
+    call_command("send_oru_messages", *[str(exam.id) for exam in [*exams, draft]], "--chunk-size", "2", stdout=out)
+
+    assert len(receiver.received) == 3
+    assert all(message.startswith("MSH|") and "ORU^R01" in message for message in receiver.received)
+    assert receiver.connections == 1  # the pool is kept across chunks
+    assert f"Skipped 1 exams that are not finalized carotid exams: [{draft.id}]" in out.getvalue()
+    assert "3 delivered, 0 not delivered" in out.getvalue()
@@ -0,0 +1,171 @@
+# reports/tests/test_hl7_oru.py
+# pytest reports/tests/test_hl7_oru.py -v
+
+from datetime import date, datetime
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.calculators.carotid_calculator import run_carotid_calculator
+from reports.hl7.oru_payload_builder import (
+    build_oru_batch,
+    build_oru_message,
+    escape,
+    get_oru_template,
+)
+from reports.models import Exam, Measurement, PreliminaryReport
+
+NOW = datetime(2025, 3, 4, 5, 6, 7)
+
+
+@pytest.fixture
+def make_exam(make_carotid_exam):
+    def make(name="Doe, Jane", **extra):
+        patient = {"mrn": "MRN1", "accession": "ACC1", "gender": "female",
+                   "dob": date(1950, 1, 2), "cpt_code": "93880", **extra}
+        return make_carotid_exam(name, {"ica_prox_right": {
+            "psv": 250.5, "edv": 80, "calculated_fields": {"stenosis_category": "70-99%", "ica_cca_ratio": 4.2},
+        }}, **patient)
+
+    return make
+
+
+def segments(message):
+    return [line.split("|") for line in message.split("\r") if line]
+
+
+def test_escape_replaces_delimiters():
+    assert escape("a|b^c&d~e\\f") == "a\\F\\b\\S\\c\\T\\d\\R\\e\\E\\f"
+
+
+def test_oru_template_is_compiled_once_per_version():
+    compiled = get_oru_template("carotid")
+
+    assert get_oru_template("carotid") is compiled
+    identifiers = [spec.head.split("|")[2] for spec in compiled.specs]
+    assert "ica_prox_right.psv^ICA Prox (Right) PSV^L" in identifiers
+    assert "ica_prox_right.stenosis_category^ICA Prox (Right) Stenosis^L" in identifiers
+
+
+@pytest.mark.django_db
+def test_build_oru_message_structure(make_exam):
+    exam = make_exam()
+    Exam.objects.filter(id=exam.id).update(calculation_fingerprint="f" * 64)
+    PreliminaryReport.objects.create(
+        exam=exam, text="Severe right ICA stenosis.\nNo left findings.", fingerprint="f" * 64
+    )
+    exam = Exam.objects.select_related("preliminary").get(id=exam.id)
+
+    lines = segments(build_oru_message(exam, now=NOW))
+
+    assert [line[0] for line in lines[:3]] == ["MSH", "PID", "OBR"]
+    assert lines[0][6] == "20250304050607"
+    assert lines[0][8] == "ORU^R01^ORU_R01"
+    assert lines[0][11] == "2.5.1"
+    assert lines[1][5] == "Doe^Jane"
+    assert lines[1][7] == "19500102"
+    assert lines[1][8] == "F"
+    assert lines[2][2] == "ACC1"
+    assert lines[2][25] == "P"
+
+    obx = {line[3]: line for line in lines if line[0] == "OBX"}
+    psv = obx["ica_prox_right.psv^ICA Prox (Right) PSV^L"]
+    assert (psv[2], psv[5], psv[6], psv[11]) == ("NM", "250.5", "cm/s", "P")
+    assert obx["ica_prox_right.stenosis_category^ICA Prox (Right) Stenosis^L"][5] == "70-99%"
+    assert obx["ica_prox_right.ica_cca_ratio^ICA Prox (Right) ICA/CCA Ratio^L"][5] == "4.2"
+
+    impression = [line[5] for line in lines if line[0] == "OBX" and line[2] == "TX"]
+    assert impression == ["Severe right ICA stenosis.", "No left findings."]
+    set_ids = [int(line[1]) for line in lines if line[0] == "OBX"]
+    assert set_ids == list(range(1, len(set_ids) + 1))
+
+
+@pytest.mark.django_db
+def test_build_oru_message_reports_vertebral_flow(make_exam):
+    exam = make_exam()
+    Measurement.objects.filter(segment__exam=exam, segment__name="va_prox_right").update(direction="retrograde")
+    run_carotid_calculator(exam)
+
+    obx = {line[3]: line for line in segments(build_oru_message(exam, conclusion="", now=NOW)) if line[0] == "OBX"}
+
+    flow = next(line for identifier, line in obx.items() if identifier.startswith("va_prox_right.vertebral_comment^"))
+    assert "subclavian steal" in flow[5]
+
+
+@pytest.mark.django_db
+def test_build_oru_message_reports_interpreter_in_obr32(make_exam):
+    exam = make_exam()
+    Exam.objects.filter(id=exam.id).update(reading_physician="Smith, Ann")
+    exam.refresh_from_db()
+
+    obr = segments(build_oru_message(exam, conclusion="", now=NOW))[2]
+
+    assert obr[16] == ""  # Ordering Provider is not the reading physician
+    assert obr[22] == "20250304050607"
+    assert obr[32] == "&Smith&Ann"
+
+
+@pytest.mark.django_db
+def test_build_oru_message_formats_numbers_in_fixed_point(make_exam):
+    exam = make_exam()
+    Measurement.objects.filter(segment__exam=exam, segment__name="ica_prox_right").update(psv=1000.0, edv=0.00000015)
+
+    obx = {line[3]: line for line in segments(build_oru_message(exam, conclusion="", now=NOW)) if line[0] == "OBX"}
+
+    assert obx["ica_prox_right.psv^ICA Prox (Right) PSV^L"][5] == "1000"
+    assert obx["ica_prox_right.edv^ICA Prox (Right) EDV^L"][5] == "0.00000015"
+    assert obx["ica_prox_right.ica_cca_ratio^ICA Prox (Right) ICA/CCA Ratio^L"][5] == "4.2"
+
+
+@pytest.mark.django_db
+def test_build_oru_message_escapes_patient_text(make_exam):
+    exam = make_exam(name="O|Brien, Pat^rick")
+
+    pid = segments(build_oru_message(exam, conclusion="", now=NOW))[1]
+
+    assert pid[5] == "O\\F\\Brien^Pat\\S\\rick"
+
+
+@pytest.mark.django_db
+def test_oru_batch_wraps_messages_with_constant_queries(django_assert_num_queries, make_exam):
+    for index in range(3):
+        exam = make_exam(accession=f"ACC{index}")
+        Exam.objects.filter(id=exam.id).update(status="finalized")
+    exams = Exam.objects.select_related("preliminary").order_by("id")
+
+    with django_assert_num_queries(2):  # exams + one snapshot query for the chunk
+        batch = build_oru_batch(exams, now=NOW)
+
+    lines = segments(batch)
+    assert lines[0][0] == "FHS"
+    assert lines[1][0] == "BHS"
+    assert [line[0] for line in lines[-2:]] == ["BTS", "FTS"]
+    assert lines[-2][1] == "3"
+    assert [line[25] for line in lines if line[0] == "OBR"] == ["F", "F", "F"]
+
+
+@pytest.mark.django_db
+def test_carotid_oru_endpoint_returns_payload(make_exam):
+    exam = make_exam()
+
+    response = APIClient().get(reverse("carotid-oru", args=[exam.id]))
+
+    assert response.status_code == 200
+    assert response.data["exam_id"] == exam.id
+    assert response.data["payload"].startswith("MSH|^~\\&|")
+
+
+@pytest.mark.django_db
+def test_export_oru_batch_command_writes_finalized_exams(tmp_path, make_exam):
+    finalized = make_exam(accession="DONE")
+    Exam.objects.filter(id=finalized.id).update(status="finalized")
+    make_exam(accession="DRAFT")
+    output = tmp_path / "results.hl7"
+
+    call_command("export_oru_batch", "--output", str(output))
+
+    lines = segments(output.read_bytes().decode())
+    assert [line[2] for line in lines if line[0] == "OBR"] == ["DONE"]
+    assert lines[-2] == ["BTS", "1"]
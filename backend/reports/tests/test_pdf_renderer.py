@@ -0,0 +1,252 @@
+# reports/tests/test_pdf_renderer.py
+# pytest reports/tests/test_pdf_renderer.py -v
+
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.pdf_templates.renderer import (
+    PdfRenderBusy,
+    PdfRenderError,
+    PdfRenderPool,
+    PdfRenderTimeout,
+)
+from reports.tests import pdf_helpers
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def factory(render_fn, **kwargs):
+        pool = PdfRenderPool(render_fn=render_fn, initializer=None, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_pool_renders_in_warm_workers(make_pool):
+    pool = make_pool(pdf_helpers.worker_pid, workers=1)
+    pool.warm_up()
+
+    first = pool.render("<p>1</p>")
+    second = pool.render("<p>2</p>")
+
+    assert first == second  # same long-lived worker process
+    assert make_pool(pdf_helpers.echo_pdf, workers=1).render("<p>hi</p>") == b"%PDF-<p>hi</p>"
+
+
+def test_worker_errors_are_wrapped(make_pool):
+    pool = make_pool(pdf_helpers.failing_pdf, workers=1)
+
+    with pytest.raises(PdfRenderError, match="bad markup"):
+        pool.render("<p>x</p>")
+
+
+def test_timeout_kills_worker_and_pool_recovers(make_pool):
+    pool = make_pool(pdf_helpers.slow_pdf, workers=1, timeout=0.5)
+
+    with pytest.raises(PdfRenderTimeout):
+        pool.render("30")
+
+    pool.timeout = 10
+    assert pool.render("0") == b"%PDF-slow"
+
+
+def test_queued_jobs_do_not_count_queue_time(make_pool):
+    pool = make_pool(pdf_helpers.slow_pdf, workers=1, max_pending=4, timeout=1.0)
+    pool.warm_up()
+    results = []
+
+    def render():
+        results.append(pool.render("0.6"))
+
+    threads = [threading.Thread(target=render) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The last job waited ~1.2s behind the others, longer than the timeout
+    assert results == [b"%PDF-slow"] * 3
+
+
+def test_timeout_recycles_only_the_stuck_worker(make_pool):
+    pool = make_pool(pdf_helpers.slow_worker_pid, workers=2, timeout=1.0)
+    pool.warm_up()
+    errors = []
+
+    def stuck():
+        try:
+            pool.render("30")
+        except PdfRenderTimeout as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=stuck)
+    thread.start()
+    time.sleep(0.5)
+    healthy = pool.render("1.0")  # still running when the stuck worker is killed
+    thread.join()
+
+    pids = {pool.render("0") for _ in range(4)}
+    assert len(errors) == 1
+    assert healthy in pids  # the healthy worker survived
+    assert len(pids) == 2  # the stuck one was replaced
+
+
+def test_pool_rejects_jobs_beyond_max_pending(make_pool):
+    pool = make_pool(pdf_helpers.slow_pdf, workers=1, max_pending=1, timeout=10)
+    pool.warm_up()
+
+    worker = threading.Thread(target=pool.render, args=("1.5",))
+    worker.start()
+    try:
+        time.sleep(0.3)  # the first job now holds the only slot
+        with pytest.raises(PdfRenderBusy):
+            pool.render("0")
+    finally:
+        worker.join()
+
+    assert pool.render("0") == b"%PDF-slow"
+
+
+@pytest.fixture(autouse=True)
+def artifact_root(settings, tmp_path):
+    settings.PDF_ARTIFACT_ROOT = tmp_path / "pdf_artifacts"
+    return settings.PDF_ARTIFACT_ROOT
+
+
+@pytest.mark.django_db
+def test_carotid_pdf_endpoint_renders_report_html(make_carotid_exam, mocker):
+    exam = make_carotid_exam("Pdf Patient")
+    render = mocker.patch("reports.views.carotid_views.render_pdf", return_value=b"%PDF-1.7 test")
+
+    response = APIClient().get(reverse("carotid-pdf", args=[exam.id]))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/pdf"
+    assert b"".join(response.streaming_content) == b"%PDF-1.7 test"
+    html = render.call_args.args[0]
+    assert "Pdf Patient" in html
+    assert "ICA Prox (Right)" in html
+
+
+@pytest.mark.django_db
+def test_carotid_pdf_endpoint_reports_busy_pool(mocker):
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Busy"}, created_by="tech")
+    mocker.patch("reports.views.carotid_views.render_pdf", side_effect=PdfRenderBusy("full"))
+
+    response = APIClient().get(reverse("carotid-pdf", args=[exam.id]))
+
+    assert response.status_code == 503
+    assert response["Retry-After"] == "5"
+
+
+@pytest.fixture
+def pdf_exam(mocker):
+    from reports.services.exam_factory import create_exam_from_template
+
+    exam = create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Stored"}, created_by="tech")
+    render = mocker.patch("reports.views.carotid_views.render_pdf", return_value=b"%PDF-0123456789")
+    return exam, render
+
+
+@pytest.mark.django_db
+def test_pdf_artifacts_are_reused_until_measurements_change(pdf_exam, artifact_root):
+    exam, render = pdf_exam
+    client = APIClient()
+    url = reverse("carotid-pdf", args=[exam.id])
+
+    first = client.get(url)
+    second = client.get(url)
+
+    assert render.call_count == 1
+    assert first["ETag"] == second["ETag"]
+    assert len(list(artifact_root.glob("*/*.pdf"))) == 1
+
+    client.patch(reverse("update-carotid-segments", args=[exam.id]), {"ica_prox_right": {"psv": 250}}, format="json")
+    third = client.get(url)
+
+    assert render.call_count == 2
+    assert third["ETag"] != first["ETag"]
+
+
+@pytest.mark.django_db
+def test_pdf_etag_and_range_requests(pdf_exam):
+    exam, _ = pdf_exam
+    client = APIClient()
+    url = reverse("carotid-pdf", args=[exam.id])
+    etag = client.get(url)["ETag"]
+
+    not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+
+    partial = client.get(url, HTTP_RANGE="bytes=5-8")
+    assert partial.status_code == 206
+    assert partial["Content-Range"] == "bytes 5-8/15"
+    assert b"".join(partial.streaming_content) == b"0123"
+
+    suffix = client.get(url, HTTP_RANGE="bytes=-3")
+    assert b"".join(suffix.streaming_content) == b"789"
+
+    assert client.get(url, HTTP_RANGE="bytes=99-").status_code == 416
+
+
+@pytest.mark.django_db
+def test_finalized_exam_pins_its_artifact(pdf_exam, mocker):
+    from reports.models import Exam
+
+    exam, render = pdf_exam
+    Exam.objects.filter(id=exam.id).update(status="finalized")
+    client = APIClient()
+    url = reverse("carotid-pdf", args=[exam.id])
+
+    client.get(url)
+    exam.refresh_from_db()
+    assert len(exam.report_pdf_key) == 64
+
+    build_html = mocker.patch("reports.views.carotid_views.build_carotid_report_html")
+    response = client.get(url)
+
+    assert response.status_code == 200
+    build_html.assert_not_called()
+    assert render.call_count == 1
+
+
+@pytest.mark.django_db
+def test_exam_level_edits_unpin_the_artifact(pdf_exam):
+    from reports.models import Exam, PreliminaryReport
+
+    exam, render = pdf_exam
+    Exam.objects.filter(id=exam.id).update(status="finalized")
+    client = APIClient()
+    url = reverse("carotid-pdf", args=[exam.id])
+    first = client.get(url)
+
+    # Patient info / physician edits (admin, serializers) go through Exam.save()
+    exam.refresh_from_db()
+    exam.patient_name = "Renamed Patient"
+    exam.reading_physician = "Dr. Reader"
+    exam.save(update_fields=["patient_name", "reading_physician"])
+    assert Exam.objects.get(id=exam.id).report_pdf_key == ""
+    second = client.get(url)
+
+    assert render.call_count == 2
+    assert second["ETag"] != first["ETag"]
+
+    # Conclusion edits go through PreliminaryReport.save()
+    report = PreliminaryReport.objects.get(exam=exam)
+    report.text = "Edited by the technologist."
+    report.save()
+    third = client.get(url)
+
+    assert render.call_count == 3
+    assert third["ETag"] != second["ETag"]
@@ -0,0 +1,59 @@
+# reports/tests/test_segment_uniqueness.py
+# pytest reports/tests/test_segment_uniqueness.py -v
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from reports.models import Exam, Measurement, Segment
+from reports.services.exam_factory import create_exam_from_template
+
+
+@pytest.fixture
+def exam():
+    return create_exam_from_template("carotid", "mount_sinai_hospital", {"name": "Unique"}, created_by="tech")
+
+
+@pytest.mark.django_db
+def test_duplicate_segment_names_are_rejected(exam):
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Segment.objects.create(exam=exam, name="ica_prox_right", artery="ica", side="right")
+
+
+@pytest.mark.django_db
+def test_segment_lookup_uses_unique_index(exam):
+    if connection.vendor != "sqlite":
+        pytest.skip("query plan check is SQLite-specific")
+
+    plan = Segment.objects.filter(exam=exam, name="ica_prox_right").explain()
+
+    assert "segment_exam_name_uniq" in plan or "sqlite_autoindex" in plan
+
+
+@pytest.mark.django_db(transaction=True)  # runs real migrations
+def test_merge_migration_collapses_duplicates(exam):
+    before = [("reports", "0009_exam_worklist_indexes")]  # before the unique constraint
+    executor = MigrationExecutor(connection)
+    executor.migrate(before)
+    try:
+        # Historical models match the rolled-back schema
+        apps = executor.loader.project_state(before).apps
+        OldSegment, OldMeasurement = apps.get_model("reports", "Segment"), apps.get_model("reports", "Measurement")
+        Exam.objects.filter(id=exam.id).update(calculation_fingerprint="f" * 64)
+        keep = OldSegment.objects.get(exam_id=exam.id, name="ica_prox_right")
+        OldMeasurement.objects.filter(segment=keep).update(edv=90, additional_data={"note": "kept", "depth": 2})
+        kept = OldMeasurement.objects.get(segment=keep)
+        duplicate = OldSegment.objects.create(exam_id=exam.id, name="ica_prox_right", artery="ica", side="right")
+        moved = OldMeasurement.objects.create(segment=duplicate, psv=300, additional_data={"depth": 3})
+    finally:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    merged = Measurement.objects.get(segment__exam=exam, segment__name="ica_prox_right")
+    assert not Segment.objects.filter(id=duplicate.id).exists()
+    assert not Measurement.objects.filter(id=moved.id).exists()
+    assert (merged.id, merged.segment_id) == (kept.id, keep.id)
+    assert (merged.psv, merged.edv) == (300, 90)
+    assert merged.additional_data == {"note": "kept", "depth": 3}
+    assert Segment.objects.filter(exam=exam, name="ica_prox_right").count() == 1
+    assert Exam.objects.get(id=exam.id).calculation_fingerprint == ""
@@ -1,6 +1,10 @@
 # reports/tests/test_site_loader.py
 
+import json
+import os
+
 import pytest
+from reports.site import site_loader
 from reports.site.site_loader import load_carotid_criteria
 
 # to run Lumen\backend> 
@@ -22,3 +26,40 @@ def test_load_unknown_site_raises_error():
     with pytest.raises(FileNotFoundError):
         load_carotid_criteria("unknownsite")
 
+
+
+def test_criteria_are_cached_and_shared():
+    """Repeated loads (including site aliases) return the same parsed object."""
+    first = load_carotid_criteria("mountsinai")
+    assert load_carotid_criteria("mount_sinai_hospital") is first
+    assert load_carotid_criteria() is first
+
+
+def test_criteria_are_read_only():
+    criteria = load_carotid_criteria("mountsinai")
+    with pytest.raises(TypeError):
+        criteria["stenosis_thresholds"]["80_99"]["psv_min"] = 1
+    with pytest.raises(TypeError):
+        criteria.update({"x": 1})
+
+
+def test_criteria_reload_when_file_changes(tmp_path, monkeypatch):
+    """A modified file is re-parsed; an unchanged one keeps the cached object."""
+    monkeypatch.setattr(site_loader, "SITE_DIR", tmp_path)
+    site_loader.clear_criteria_cache()
+    path = tmp_path / "testsite" / "criteria" / "carotid.json"
+    path.parent.mkdir(parents=True)
+
+    path.write_text(json.dumps({"version": "1", "stenosis_thresholds": {}}))
+    first = load_carotid_criteria("testsite")
+    assert first.version == "1"
+
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 10_000_000))
+    assert load_carotid_criteria("testsite") is first  # touched, same content
+
+    path.write_text(json.dumps({"version": "2", "stenosis_thresholds": {}}))
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 20_000_000))
+    second = load_carotid_criteria("testsite")
+    assert second.version == "2"
+    assert second.fingerprint != first.fingerprint
+    site_loader.clear_criteria_cache()
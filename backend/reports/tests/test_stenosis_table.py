@@ -0,0 +1,70 @@
+# reports/tests/test_stenosis_table.py
+# pytest reports/tests/test_stenosis_table.py -v
+
+import pytest
+from reports.calculators.carotid_calculator import CarotidCalculator
+from reports.calculators.carotid_batch_calculator import CarotidBatchCalculator
+from reports.calculators.stenosis_table import compile_stenosis_table, get_stenosis_table
+from reports.tests.test_carotid_calculator import MOCK_CRITERIA
+
+# A site with three bands instead of five
+THREE_BAND_CRITERIA = {
+    "stenosis_thresholds": {
+        "0_49": {"psv_max": 124},
+        "50_69": {"psv_min": 125, "psv_max": 229, "edv_max": 100},
+        "70_99": {"psv_min": 230, "edv_min": 101},
+        "upgrade_if_ratio_gt": 3.5,
+    },
+    "vertebral_rules": {},
+}
+
+
+@pytest.mark.parametrize("psv, edv, ratio, expected", [
+    (50, None, None, ("0–19%", None)),
+    (104.5, None, None, (None, None)),  # gap between bands
+    (107, 20, None, ("20–39%", None)),
+    (200, 90, 2.0, ("60–79%", None)),
+    (200, 90, 5.0, ("≥70% (ICA/CCA > 4)", "Ratio > 4.0 suggests upgrade to ≥70% stenosis.")),
+    (200, None, None, ("Uncertain (missing or high EDV)", "Unable to confirm 60–79% due to missing or high EDV.")),
+    (300, 150, None, ("80–99%", None)),
+    (300, 100, None, ("Uncertain (PSV >240, EDV not >135)", "PSV suggests high-grade, but EDV does not confirm.")),
+])
+def test_classify_matches_mount_sinai_rules(psv, edv, ratio, expected):
+    table = get_stenosis_table(MOCK_CRITERIA)
+    assert table.classify(psv, edv, ratio) == expected
+
+
+def test_table_is_shared_between_calculators():
+    first = CarotidCalculator({}, MOCK_CRITERIA)
+    second = CarotidCalculator({}, dict(MOCK_CRITERIA))
+    assert first.stenosis_table is second.stenosis_table
+
+
+def test_unconfirmed_category_states_the_real_bounds():
+    table = compile_stenosis_table({
+        "0_69": {"psv_max": 229.5},
+        "70_99": {"psv_min": 229.6, "edv_min": 100.5},
+    })
+
+    assert table.classify(230, 90, None)[0] == "Uncertain (PSV ≥229.6, EDV <100.5)"
+
+
+def test_overlapping_bands_raise_value_error():
+    with pytest.raises(ValueError, match="Overlapping"):
+        compile_stenosis_table({"a_b": {"psv_max": 120}, "c_d": {"psv_min": 100}})
+
+
+def test_custom_band_count_in_scalar_and_batch_calculators():
+    segments = {
+        "ica_prox_right": {"psv": 100},
+        "ica_mid_right": {"psv": 150, "edv": 60, "cca_psv": 40},
+        "ica_dist_right": {"psv": 250, "edv": 90},
+    }
+    batch = CarotidBatchCalculator({1: {k: dict(v) for k, v in segments.items()}}, THREE_BAND_CRITERIA)
+    batch.run_all()
+    CarotidCalculator(segments, THREE_BAND_CRITERIA).run_all()
+
+    assert segments["ica_prox_right"]["stenosis_category"] == "0–49%"
+    assert segments["ica_mid_right"]["stenosis_category"] == "≥70% (ICA/CCA > 3.5)"
+    assert segments["ica_dist_right"]["stenosis_category"] == "Uncertain (PSV ≥230, EDV <101)"
+    assert batch.get_segment_data()[1] == segments
@@ -0,0 +1,67 @@
+# reports/tests/test_synthetic_exams.py
+# pytest reports/tests/test_synthetic_exams.py -v
+
+import io
+
+import pytest
+from django.core.management import call_command
+
+from reports.calculators.carotid_calculator import CarotidCalculator
+from reports.models import Exam, Segment
+from reports.services.exam_snapshot import load_exam_snapshots
+from reports.services.synthetic_exams import SYNTHETIC_SOURCE, SyntheticExamGenerator, create_synthetic_exams
+from reports.tests.test_carotid_calculator import MOCK_CRITERIA
+
+
+def test_generator_is_deterministic_and_prefix_stable():
+    first = list(SyntheticExamGenerator(seed=3).rows(20))
+    second = list(SyntheticExamGenerator(seed=3).rows(5, start=15))
+
+    assert first == list(SyntheticExamGenerator(seed=3).rows(20))
+    assert first[15:] == second
+    assert first != list(SyntheticExamGenerator(seed=4).rows(20))
+
+
+def test_generated_values_are_plausible():
+    generator = SyntheticExamGenerator(seed=1)
+    exams = [generator.segments(index) for index in range(500)]
+
+    ica = [values for segments in exams for name, values in segments.items() if name.startswith("ica_")]
+    severe = sum(values["psv"] >= 230 for values in ica) / len(ica)
+    assert 0.01 < severe < 0.1
+    assert all(values.get("edv", 0) <= values["psv"] for segments in exams for values in segments.values())
+    assert any(values.get("direction") == "retrograde" for segments in exams for values in segments.values())
+
+
+def test_segment_dict_runs_through_the_calculator():
+    segment_data = SyntheticExamGenerator(seed=0).segment_dict(0)
+
+    CarotidCalculator(segment_data, MOCK_CRITERIA).run_all()
+
+    assert segment_data["ica_prox_right"].get("stenosis_category")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", ["rows", "compact"])
+def test_create_synthetic_exams_matches_generator(storage):
+    generator = SyntheticExamGenerator(seed=5)
+
+    summary = create_synthetic_exams(3, seed=5, storage=storage)
+
+    exams = list(Exam.objects.filter(created_by=SYNTHETIC_SOURCE).order_by("id"))
+    snapshots = load_exam_snapshots([exam.id for exam in exams])
+    assert (summary.created, summary.failed) == (3, 0)
+    assert [exam.storage_mode for exam in exams] == [storage] * 3
+    for index, exam in enumerate(exams):
+        assert exam.mrn == generator.exam_row(index)["mrn"]
+        assert snapshots[exam.id].segment_dict() == generator.segment_dict(index)
+
+
+@pytest.mark.django_db
+def test_generate_synthetic_exams_command():
+    out = io.StringIO()
+
+    call_command("generate_synthetic_exams", "2", "--seed", "9", stdout=out)
+
+    assert "Created 2 synthetic exams" in out.getvalue()
+    assert Segment.objects.filter(exam__created_by=SYNTHETIC_SOURCE).count() == 80
@@ -0,0 +1,138 @@
+# reports/tests/test_worklist.py
+# pytest reports/tests/test_worklist.py -v
+
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reports.models import Exam
+from reports.services.worklist import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    filter_worklist,
+    paginate_worklist,
+)
+
+
+def make_exams(count, **fields):
+    base = timezone.now()
+    exams = Exam.objects.bulk_create([
+        Exam(patient_name=f"P{i}", mrn=f"M{i}", created_by="tech", exam_type="carotid", **fields)
+        for i in range(count)
+    ])
+    # Pairs of exams share a timestamp so the id tie-break matters
+    for index, exam in enumerate(exams):
+        Exam.objects.filter(id=exam.id).update(created_at=base - timedelta(minutes=index // 2))
+    return exams
+
+
+def test_cursor_round_trip():
+    now = timezone.now()
+
+    assert decode_cursor(encode_cursor(now, 42)) == (now, 42)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_every_exam_once(django_assert_num_queries):
+    make_exams(7, status="tech_signed")
+    expected = list(Exam.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    seen, cursor = [], None
+    while True:
+        with django_assert_num_queries(1):
+            page = paginate_worklist(Exam.objects.all(), cursor=cursor, page_size=3)
+        seen.extend(exam.id for exam in page.exams)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_keyset_pages_within_equal_timestamps():
+    exams = make_exams(7)
+    Exam.objects.update(created_at=timezone.now())  # every cursor falls inside one timestamp
+
+    seen, cursor = [], None
+    while True:
+        page = paginate_worklist(Exam.objects.all(), cursor=cursor, page_size=2)
+        seen.extend(exam.id for exam in page.exams)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == sorted((exam.id for exam in exams), reverse=True)
+
+
+@pytest.mark.django_db
+def test_keyset_filter_bounds_created_at():
+    make_exams(3)
+    cursor = paginate_worklist(Exam.objects.all(), page_size=1).next_cursor
+
+    with CaptureQueriesContext(connection) as queries:
+        paginate_worklist(Exam.objects.all(), cursor=cursor, page_size=1)
+
+    sql = queries[0]["sql"]
+    assert '"created_at" <= ' in sql and " AND (" in sql
+
+
+@pytest.mark.django_db
+def test_filters_apply_to_status_physician_and_dates():
+    make_exams(3, status="tech_signed", reading_physician="dr_a", exam_date=date(2025, 1, 10))
+    make_exams(2, status="draft", reading_physician="dr_a", exam_date=date(2025, 1, 10))
+    make_exams(2, status="tech_signed", reading_physician="dr_b", exam_date=date(2024, 6, 1))
+
+    queue = filter_worklist({"status": "tech_signed", "reading_physician": "dr_a"})
+    in_range = filter_worklist({"status": "tech_signed", "date_from": "2025-01-01", "date_to": "2025-01-31"})
+
+    assert queue.count() == 3
+    assert in_range.count() == 3
+    with pytest.raises(ValueError):
+        filter_worklist({"date_from": "January"})
+
+
+@pytest.mark.django_db
+def test_status_queue_uses_composite_index():
+    if connection.vendor != "sqlite":
+        pytest.skip("query plan check is SQLite-specific")
+    make_exams(3, status="tech_signed")
+    page_query = Exam.objects.filter(status="tech_signed").order_by("-created_at", "-id")[:51]
+
+    plan = page_query.explain()
+
+    assert "exam_status_created_idx" in plan
+    assert "TEMP B-TREE" not in plan  # rows come pre-sorted from the index
+
+
+@pytest.mark.django_db
+def test_worklist_endpoint_follows_next_cursor():
+    make_exams(5, status="tech_signed")
+    make_exams(2, status="draft")
+    client = APIClient()
+
+    first = client.get(reverse("exam-worklist"), {"status": "tech_signed", "page_size": 3})
+    second = client.get(reverse("exam-worklist"), {"status": "tech_signed", "page_size": 3,
+                                                   "cursor": first.data["next_cursor"]})
+
+    assert first.status_code == 200
+    assert len(first.data["results"]) == 3
+    assert "cursor=" in first.data["next"]
+    assert len(second.data["results"]) == 2
+    assert second.data["next_cursor"] is None
+    assert {row["status"] for row in first.data["results"] + second.data["results"]} == {"tech_signed"}
+
+
+@pytest.mark.django_db
+def test_worklist_endpoint_rejects_bad_cursor():
+    response = APIClient().get(reverse("exam-worklist"), {"cursor": "%%%"})
+
+    assert response.status_code == 400
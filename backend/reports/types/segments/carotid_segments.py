@@ -11,6 +11,7 @@ The returned format feeds the CarotidCalculator and downstream reporting logic.
 import logging
 from typing import Optional
 from reports.models import Exam
+from reports.services.exam_snapshot import load_exam_snapshot
 from reports.types.segments.base_arterial_segments import ArterialSegmentBase
 
 # Configure logger
@@ -28,13 +29,15 @@ class CarotidSegmentDict(ArterialSegmentBase):
     ica_cca_ratio: Optional[float]
     stenosis_category: Optional[str]
     vertebral_comment: Optional[str]
+    vertebral_flow: Optional[str]
 
 
 def build_segment_dict(exam: Exam) -> dict[str, dict]:
     """
     Construct a dictionary of segment measurements from a carotid exam.
 
-    Handles both OneToOne and ForeignKey relations between Segment and Measurement.
+    Segments and their measurements are read with a single joined query via
+    `load_exam_snapshot()`; the first measurement of each segment is used.
 
     Args:
         exam (Exam): A carotid Exam instance containing segment and measurement data.
@@ -42,38 +45,9 @@ def build_segment_dict(exam: Exam) -> dict[str, dict]:
     Returns:
         dict[str, dict]: A mapping of segment name → measurement dictionary.
     """
-    segment_data = {}
-
     logger.info(f"Building segment data from Exam ID: {exam.id}")
 
-    for segment in exam.segments.all():
-        name = segment.name  # e.g., "prox_ica_right"
-
-        # Try to retrieve measurement safely
-        m = None
-        if hasattr(segment, "measurement"):
-            # OneToOne relation
-            m = segment.measurement
-        elif hasattr(segment, "measurements"):
-            # ForeignKey relation — use the first measurement if multiple exist
-            related = segment.measurements.all()
-            m = related.first() if hasattr(related, "first") else None
-
-        if not m:
-            logger.warning(f"No measurement found for segment '{name}' in exam {exam.id}")
-            continue
-
-        logger.debug(f"Processing segment '{name}'")
-
-        segment_data[name] = {
-            "psv": getattr(m, "psv", None),
-            "edv": getattr(m, "edv", None),
-            "direction": getattr(m, "direction", None),
-            "waveform": getattr(m, "waveform", None),
-            "cca_psv": getattr(m, "cca_psv", None),
-            "morphology": getattr(m, "morphology", None),
-            "plaque": getattr(m, "plaque_description", None),
-        }
+    segment_data = load_exam_snapshot(exam.id).segment_dict()
 
     logger.info(
         f"Segment build complete for Exam ID: {exam.id}. "
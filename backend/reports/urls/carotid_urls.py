@@ -16,12 +16,15 @@ urlpatterns = [
     # 🔹 Run ICA/CCA ratio, stenosis %, vertebral logic and persist output
     path("reports/carotid/<int:exam_id>/calculate/", views.calculate_carotid_exam, name="calculate-carotid"),
 
+    # 🔹 Poll a queued calculation (created by calculate/?async=true)
+    path("reports/carotid/jobs/<int:job_id>/", views.get_calculation_job, name="carotid-calculation-job"),
+
     # 🔹 Generate an editable clinical conclusion from segment results
     path("reports/carotid/<int:exam_id>/conclusion/", views.get_carotid_conclusion, name="carotid-conclusion"),
 
-    # 🔹 Return the PDF export of the report (placeholder for now)
+    # 🔹 Return the PDF export of the report (rendered in the PDF worker pool)
     path("reports/carotid/<int:exam_id>/pdf/", views.get_carotid_pdf, name="carotid-pdf"),
 
-    # 🔹 Return HL7 ORU message payload (placeholder for now)
+    # 🔹 Return the HL7 ORU^R01 result message for the exam
     path("reports/carotid/<int:exam_id>/oru_payload/", views.get_carotid_oru_payload, name="carotid-oru"),
 ]
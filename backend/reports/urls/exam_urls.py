@@ -0,0 +1,12 @@
+# reports/urls/exam_urls.py
+
+from django.urls import path
+from reports.views import exam_views as views
+
+urlpatterns = [
+    # 🔹 Worklist of exams (filters + keyset pagination on created_at, id)
+    path("reports/exams/", views.get_exam_worklist, name="exam-worklist"),
+
+    # 🔹 Cohort query on derived findings (stenosis grade, ICA/CCA ratio, vertebral flow)
+    path("reports/cohort/", views.get_exam_cohort, name="exam-cohort"),
+]
@@ -0,0 +1,9 @@
+# reports/urls/import_urls.py
+
+from django.urls import path
+from reports.views import import_views as views
+
+urlpatterns = [
+    # 🔹 Stream NDJSON/CSV exams (with measurements) into the database in chunks
+    path("reports/import/", views.import_exams_view, name="import-exams"),
+]
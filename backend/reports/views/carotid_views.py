@@ -5,9 +5,9 @@ This module defines API endpoints for carotid ultrasound workflows, including:
 - Loading the form template
 - Creating exams
 - Updating segment measurements
-- Running calculations
+- Running calculations (inline, or queued as a background job)
 - Returning report text
-- Generating PDF and HL7 payloads
+- Rendering the PDF report (process-pool WeasyPrint) and HL7 payloads
 
 These endpoints orchestrate interaction between the frontend and the calculator/serializer layer.
 """
@@ -18,23 +18,55 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.urls import reverse
 
 from report_template.registry.template_registry import get_template
-from reports.models import Exam
+from reports.models import CalculationJob, Exam
 
+from reports.serializers import CalculationJobSerializer
 from reports.serializers.carotid import CarotidExamSerializer
-from reports.calculators.carotid_calculator import run_carotid_calculator
-from reports.services.conclusion_generator import generate_conclusion
-from reports.types.segments.carotid_segments import build_segment_dict
+from reports.calculators.carotid_calculator import recalculate_carotid_segments, run_carotid_calculator
+from reports.services.preliminary_reports import get_current_conclusion
+from reports.services.segment_updates import apply_segment_updates
+from reports.services.exam_snapshot import load_exam_snapshots
+from reports.services.calculation_jobs import enqueue_calculation
 
-# If implemented later:
-# from reports.pdf_templates.renderer import render_pdf
-# from reports.hl7.oru_payload_builder import build_oru_message
+from reports.pdf_templates.artifact_store import artifact_key, get_artifact_store, serve_artifact
+from reports.pdf_templates.carotid_report import build_carotid_report_html
+from reports.pdf_templates.renderer import PdfRenderBusy, PdfRenderTimeout, render_pdf
+
+from reports.hl7.oru_payload_builder import build_oru_message
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+def _serialize_exam(exam: Exam) -> dict:
+    """
+    Serialize a carotid exam using the snapshot fast path (one query for all segments).
+    """
+    snapshots = load_exam_snapshots([exam.id])
+    return CarotidExamSerializer(exam, context={"segment_snapshots": snapshots}).data
+
+
+def _flag(request, name: str, default: bool = False) -> bool:
+    """
+    Read a boolean query parameter (?name=true / ?name=false).
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def _wants_async(request) -> bool:
+    """
+    True when the client opted into background calculation (?async=true).
+    """
+    return _flag(request, "async")
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def get_carotid_template(request):
@@ -86,7 +118,7 @@ def create_carotid_exam(request):
             logger.info(f"Carotid exam created: ID={exam.id}, patient={exam.patient_name}")
             return Response({
                 "message": "Carotid exam created successfully.",
-                "exam": CarotidExamSerializer(exam).data
+                "exam": _serialize_exam(exam)
             }, status=status.HTTP_201_CREATED)
 
         logger.warning(f"Validation failed for carotid exam creation: {serializer.errors}")
@@ -107,6 +139,18 @@ def create_carotid_exam(request):
 def update_carotid_segments(request, exam_id):
     """
     Updates raw measurement values in existing carotid segments.
+    All targeted measurements are loaded in one query and saved with one bulk
+    update inside a single transaction.
+
+    The edited segments, and the segments that read them (e.g., ICA segments
+    after a same-side distal CCA PSV change), are then recalculated in the same
+    transaction. If the exam's results were current before the edit, its
+    fingerprint and preliminary conclusion are refreshed as well. Pass
+    ?recalculate=false to skip this (e.g., bulk data entry).
+
+    Only measurement inputs are writable (see UPDATABLE_MEASUREMENT_FIELDS).
+    A segment with an invalid value is skipped and listed in "errors"
+    (segment → field → messages); the other segments are still updated.
     Payload format:
     {
         "prox_ica_right": { "psv": 300, "edv": 100 },
@@ -118,31 +162,23 @@ def update_carotid_segments(request, exam_id):
     try:
         exam = get_object_or_404(Exam, id=exam_id, exam_type="carotid")
         payload = request.data
-        updated_count = 0
-
-        for segment_name, updates in payload.items():
-            try:
-                segment = exam.segments.get(name=segment_name)
-                measurement = segment.measurement
-                if not measurement:
-                    logger.warning(f"No measurement found for segment '{segment_name}'")
-                    continue
 
-                for field, value in updates.items():
-                    if hasattr(measurement, field):
-                        setattr(measurement, field, value)
-
-                measurement.save()
-                updated_count += 1
-                logger.debug(f"Updated segment '{segment_name}'")
-
-            except Exception as inner_exc:
-                logger.warning(f"Failed to update segment '{segment_name}': {str(inner_exc)}")
-
-        logger.info(f"Segment update complete: {updated_count} segments updated")
+        with transaction.atomic():
+            results_current = bool(exam.calculation_fingerprint)
+            result = apply_segment_updates(exam, payload)
+            recalculated = []
+            if result.changed and _flag(request, "recalculate", default=True):
+                recalculated = recalculate_carotid_segments(exam, result.changed, results_current=results_current)
+
+        logger.info(
+            f"Segment update complete: {result.updated} segments updated, "
+            f"{len(recalculated)} recalculated"
+        )
         return Response({
             "message": "Segment data updated successfully.",
-            "segments_updated": updated_count
+            "segments_updated": result.updated,
+            "segments_recalculated": recalculated,
+            "errors": result.errors,
         }, status=status.HTTP_200_OK)
 
     except Exam.DoesNotExist:
@@ -164,15 +200,28 @@ def update_carotid_segments(request, exam_id):
 def calculate_carotid_exam(request, exam_id):
     """
     Runs the carotid calculator logic and saves results to calculated_fields.
+
+    With ?async=true the calculation is queued instead and the response
+    (202 Accepted) carries the job; poll `carotid-calculation-job` for its status.
     """
     logger.info(f"Calculation request received for exam ID: {exam_id}")
 
     try:
         exam = get_object_or_404(Exam, id=exam_id, exam_type="carotid")
+
+        if _wants_async(request):
+            job = enqueue_calculation(exam)
+            logger.info(f"Calculation for exam ID {exam.id} queued as job #{job.id}")
+            return Response({
+                "message": "Calculation queued.",
+                "job": CalculationJobSerializer(job).data,
+                "status_url": reverse("carotid-calculation-job", args=[job.id]),
+            }, status=status.HTTP_202_ACCEPTED)
+
         run_carotid_calculator(exam)
         exam.refresh_from_db()
         logger.info(f"Calculation complete for exam ID: {exam.id}")
-        return Response(CarotidExamSerializer(exam).data)
+        return Response(_serialize_exam(exam))
 
     except Exception as e:
         logger.exception(f"Unhandled exception while calculating carotid exam ID {exam_id}")
@@ -182,17 +231,31 @@ def calculate_carotid_exam(request, exam_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["GET"])
+def get_calculation_job(request, job_id):
+    """
+    Returns the status, progress and result summary of a background calculation job.
+    """
+    job = get_object_or_404(CalculationJob, id=job_id)
+    return Response(CalculationJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 def get_carotid_conclusion(request, exam_id):
     """
-    Returns the generated clinical conclusion based on the carotid segment data. 
+    Returns the generated clinical conclusion based on the carotid segment data
+    and the calculated fields stored by the last calculator run.
+
+    The conclusion materialized in PreliminaryReport is served as-is (one query)
+    until the exam's measurements change; only then is it regenerated.
     """
     logger.info(f"Conclusion request received for exam ID: {exam_id}")
 
     try:
-        exam = get_object_or_404(Exam, id=exam_id, exam_type="carotid")
-        segments = build_segment_dict(exam)
-        conclusion = generate_conclusion(segments)
+        exam = get_object_or_404(
+            Exam.objects.select_related("preliminary"), id=exam_id, exam_type="carotid"
+        )
+        conclusion = get_current_conclusion(exam)
 
         logger.info(f"Conclusion generated for exam ID {exam_id}")
         return Response({
@@ -218,15 +281,52 @@ def get_carotid_conclusion(request, exam_id):
 @api_view(['GET'])
 def get_carotid_pdf(request, exam_id):
     """
-    Returns PDF export of the carotid exam (placeholder for now).
+    Returns the PDF export of the carotid exam.
+
+    PDFs are kept in a content-addressed artifact store keyed by the report HTML,
+    stylesheets and template version: an unchanged exam is served from disk
+    (with ETag / Range support) and only new content is rendered, in the warm
+    render pool (bounded queue, per-job timeout). Finalized exams pin their
+    artifact key, so re-opening them skips even rebuilding the HTML.
     """
     logger.info(f"PDF export requested for exam ID: {exam_id}")
 
     try:
+        exam = get_object_or_404(
+            Exam.objects.select_related("preliminary"), id=exam_id, exam_type="carotid"
+        )
+        store = get_artifact_store()
+        filename = f"carotid_exam_{exam.id}.pdf"
+        finalized = exam.status == "finalized"
+
+        key = exam.report_pdf_key if finalized and exam.report_pdf_key else None
+        if key is None or not store.exists(key):
+            html = build_carotid_report_html(exam)
+            key = artifact_key(html)
+            if not store.exists(key):
+                pdf = render_pdf(html, base_url=request.build_absolute_uri("/"))
+                store.put(key, pdf)
+                logger.info(f"PDF rendered for exam ID {exam.id} ({len(pdf)} bytes)")
+            if finalized and exam.report_pdf_key != key:
+                Exam.objects.filter(id=exam.id).update(report_pdf_key=key)
+
+        return serve_artifact(request, store, key, filename)
+
+    except PdfRenderBusy as e:
+        logger.warning(f"PDF renderer busy; rejecting export for exam ID {exam_id}")
+        response = Response({
+            "message": "PDF renderer is busy. Please retry shortly.",
+            "error": str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response["Retry-After"] = "5"
+        return response
+
+    except PdfRenderTimeout as e:
+        logger.error(f"PDF rendering timed out for exam ID {exam_id}")
         return Response({
-            "message": "PDF generation not yet implemented for carotid exams.",
-            "exam_id": exam_id
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            "message": "PDF generation timed out.",
+            "error": str(e)
+        }, status=status.HTTP_504_GATEWAY_TIMEOUT)
 
     except Exception as e:
         logger.exception(f"Unhandled exception during PDF generation for exam ID {exam_id}")
@@ -239,15 +339,23 @@ def get_carotid_pdf(request, exam_id):
 @api_view(['GET'])
 def get_carotid_oru_payload(request, exam_id):
     """
-    Returns HL7 ORU payload for the carotid exam (placeholder for now).
+    Returns the HL7 v2.5.1 ORU^R01 message for the carotid exam.
+
+    OBX lines come from the segment mapping compiled once per template version;
+    the impression uses the materialized conclusion when it is current.
     """
     logger.info(f"HL7 ORU payload requested for exam ID: {exam_id}")
 
     try:
+        exam = get_object_or_404(
+            Exam.objects.select_related("preliminary"), id=exam_id, exam_type="carotid"
+        )
+        payload = build_oru_message(exam)
         return Response({
-            "message": "HL7 ORU generation not yet implemented for carotid exams.",
-            "exam_id": exam_id
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            "message": "HL7 ORU message generated.",
+            "exam_id": exam.id,
+            "payload": payload
+        }, status=status.HTTP_200_OK)
 
     except Exception as e:
         logger.exception(f"Unhandled exception during HL7 ORU generation for exam ID {exam_id}")
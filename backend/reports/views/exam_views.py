@@ -0,0 +1,116 @@
+"""
+Exam Worklist Views (API Layer)
+
+Cross-exam-type listing endpoints (worklist, cohort queries). Per-exam
+workflows live in the modality views (e.g. carotid_views.py).
+"""
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from reports.serializers import ExamBaseSerializer
+from reports.services.cohort import cohort_findings, filter_cohort
+from reports.services.worklist import (
+    DEFAULT_PAGE_SIZE,
+    InvalidCursor,
+    filter_worklist,
+    paginate_worklist,
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@api_view(["GET"])
+def get_exam_worklist(request):
+    """
+    Returns a page of exams, newest first, with keyset (cursor) pagination.
+
+    Query params: status, exam_type, reading_physician, mrn, accession,
+    date_from / date_to (exam_date, YYYY-MM-DD), page_size and cursor
+    (the `next_cursor` of the previous page).
+    """
+    params = request.query_params
+    logger.info(f"Worklist requested: {dict(params.items())}")
+
+    try:
+        try:
+            page_size = int(params.get("page_size") or getattr(settings, "WORKLIST_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+            queryset = filter_worklist(params)
+            page = paginate_worklist(queryset, cursor=params.get("cursor"), page_size=page_size)
+        except (InvalidCursor, ValueError) as e:
+            return Response({
+                "message": "Invalid worklist parameters.",
+                "error": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if page.next_cursor:
+            query = params.copy()
+            query["cursor"] = page.next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        return Response({
+            "results": ExamBaseSerializer(page.exams, many=True).data,
+            "next_cursor": page.next_cursor,
+            "next": next_url,
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("Unhandled exception while loading the exam worklist")
+        return Response({
+            "message": "An error occurred while loading the worklist.",
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def get_exam_cohort(request):
+    """
+    Returns a page of exams matching derived findings, newest first.
+
+    Query params: stenosis_min / stenosis_max (grade in %), stenosis_category,
+    ratio_min / ratio_max (ICA/CCA), vertebral_flow (normal, pre_steal, steal),
+    artery, side, segment, any worklist filter (status, exam_type, date_from /
+    date_to, ...), page_size and cursor. Each exam lists the matching segments
+    under `findings`. Exams in compact storage are not searched.
+    """
+    params = request.query_params
+    logger.info(f"Cohort query requested: {dict(params.items())}")
+
+    try:
+        try:
+            page_size = int(params.get("page_size") or getattr(settings, "WORKLIST_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+            queryset = filter_cohort(params)
+            page = paginate_worklist(queryset, cursor=params.get("cursor"), page_size=page_size)
+        except (InvalidCursor, ValueError) as e:
+            return Response({
+                "message": "Invalid cohort parameters.",
+                "error": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        findings = cohort_findings([exam.id for exam in page.exams], params)
+        results = ExamBaseSerializer(page.exams, many=True).data
+        for exam, row in zip(page.exams, results):
+            row["findings"] = findings.get(exam.id, [])
+
+        next_url = None
+        if page.next_cursor:
+            query = params.copy()
+            query["cursor"] = page.next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        return Response({
+            "results": results,
+            "next_cursor": page.next_cursor,
+            "next": next_url,
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("Unhandled exception while running a cohort query")
+        return Response({
+            "message": "An error occurred while running the cohort query.",
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,61 @@
+"""
+Bulk Import Views (API Layer)
+
+Streams NDJSON or CSV exam archives into the database (source "import").
+The request body is read line by line and inserted in chunks, so large uploads
+never have to fit in memory. See reports/services/bulk_import.py for row formats.
+"""
+
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from reports.services.bulk_import import IMPORT_SOURCE, import_exams, iter_import_rows
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Request Content-Type → import format
+IMPORT_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@api_view(["POST"])
+def import_exams_view(request):
+    """
+    Imports many exams with their measurements from an NDJSON or CSV request body.
+
+    Rows are validated and inserted in chunks; invalid rows are skipped and
+    reported (first 100) without aborting the import.
+    """
+    content_type = (request.content_type or "").split(";", 1)[0].strip().lower()
+    fmt = IMPORT_CONTENT_TYPES.get(content_type)
+    logger.info(f"Bulk import request received (content type: {content_type or 'none'})")
+
+    if fmt is None:
+        return Response({
+            "message": "Unsupported content type. Send application/x-ndjson or text/csv.",
+            "error": content_type,
+        }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    try:
+        created_by = getattr(request.user, "username", "") or IMPORT_SOURCE
+        summary = import_exams(iter_import_rows(request.stream or (), fmt), created_by=created_by)
+        return Response({
+            "message": f"Imported {summary.created} exams; {summary.failed} rows rejected.",
+            "created": summary.created,
+            "failed": summary.failed,
+            "errors": [error.as_dict() for error in summary.errors],
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("Unhandled exception during bulk exam import")
+        return Response({
+            "message": "An unexpected error occurred during the import.",
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)